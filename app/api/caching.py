@@ -0,0 +1,50 @@
+"""Conditional GETs: strong ETags derived from entity versions.
+
+A route loads the versions its representation depends on (from the
+entity caches when possible) and answers ``If-None-Match`` with 304
+before rendering anything.
+"""
+import hashlib
+from typing import Any, Dict
+
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import RESPONSE_CACHE_MAX_AGE
+
+# shared caches may keep responses, but revalidate them once stale
+CACHE_CONTROL = f"public, max-age={RESPONSE_CACHE_MAX_AGE}, must-revalidate"
+
+
+def make_etag(*versions: Any) -> str:
+    """Strong ETag of a representation identified by ``versions``"""
+    digest = hashlib.blake2b(repr(versions).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison, W/ prefixes are ignored
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+
+    return False
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag)
+    )
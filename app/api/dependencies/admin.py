@@ -0,0 +1,23 @@
+import secrets
+
+from fastapi import HTTPException, Security, status
+from fastapi.security import APIKeyHeader
+
+from app.core.config import ADMIN_TOKEN
+from app.resources import strings
+
+HEADER_KEY = "X-Admin-Token"
+
+
+def check_admin_token(
+    token: str = Security(APIKeyHeader(name=HEADER_KEY, auto_error=False)),
+) -> None:
+    """Admin routes are disabled while ``ADMIN_TOKEN`` is not configured"""
+    admin_token = str(ADMIN_TOKEN).encode()
+    # bytes, compare_digest rejects str with non-ASCII characters
+    if not admin_token or not token or not secrets.compare_digest(
+        token.encode(), admin_token
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=strings.ADMIN_TOKEN_INVALID
+        )
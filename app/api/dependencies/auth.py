@@ -1,4 +1,4 @@
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
 
 from fastapi import Depends, HTTPException, Security, requests, status
 from fastapi.security import APIKeyHeader
@@ -7,10 +7,14 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.api.dependencies.database import get_repository
 from app.core.config import JWT_TOKEN_PREFIX, SECRET_KEY
 from app.db.errors.users import EntityDoesNotExistError
+from app.db.repositories.tokens import TokensRepository
 from app.db.repositories.users import UsersRepository
-from app.models.schemas.users import User
+from app.models.domain.users import UserRecord
+from app.models.schemas.jwt import JWTPayload
 from app.resources import strings
 from app.services import jwt
+from app.services.revocation import revocation_set
+from app.services.token_cache import token_cache
 
 HEADER_KEY = "Authorization"
 
@@ -64,28 +68,64 @@ def _get_authorization_header_optional(
 
 async def _get_current_user(
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
     token: str = Depends(_get_authorization_header_retriever()),
-) -> User:
-    try:
-        username = jwt.get_username_from_token(token, str(SECRET_KEY))
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail=strings.MALFORMED_PAYLOAD,
-        )
-
-    try:
-        return await users_repo.get_user_by_username(username=username)
-    except EntityDoesNotExist:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail=strings.MALFORMED_PAYLOAD,
-        )
+) -> UserRecord:
+    _, user = await _authenticate(token, users_repo, tokens_repo)
+    return user
 
 
 async def _get_current_user_optional(
     repo: UsersRepository = Depends(get_repository(UsersRepository)),
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
     token: str = Depends(_get_authorization_header_retriever(required=False)),
-) -> Optional[User]:
+) -> Optional[UserRecord]:
     if token:
-        return await _get_current_user(repo, token)
+        return await _get_current_user(repo, tokens_repo, token)
 
     return None
+
+
+async def get_current_token_payload(
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
+    token: str = Depends(_get_authorization_header_retriever()),
+) -> JWTPayload:
+    payload, _ = await _authenticate(token, users_repo, tokens_repo)
+    return payload
+
+
+async def _authenticate(
+    token: str, users_repo: UsersRepository, tokens_repo: TokensRepository,
+) -> Tuple[JWTPayload, UserRecord]:
+    cached = token_cache.get(token)
+    if cached is not None:
+        payload = cached.claims
+    else:
+        try:
+            payload = jwt.get_payload_from_token(token, str(SECRET_KEY))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=strings.MALFORMED_PAYLOAD,
+            )
+
+    # memory only unless the bloom filter reports a (possibly false) hit
+    if payload.jti and revocation_set.might_contain(payload.jti):
+        if await tokens_repo.is_revoked(jti=payload.jti):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=strings.TOKEN_REVOKED,
+            )
+
+    if cached is not None:
+        return payload, cached.user
+
+    try:
+        user = await users_repo.get_user_by_username(username=payload.username)
+    except EntityDoesNotExistError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=strings.MALFORMED_PAYLOAD,
+        )
+
+    token_cache.set(token, payload, user)
+
+    return payload, user
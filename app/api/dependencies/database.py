@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import AsyncGenerator, Callable, Type
 
 from asyncpg.connection import Connection
@@ -5,6 +6,7 @@ from asyncpg.pool import Pool
 from fastapi import Depends
 from starlette.requests import Request
 
+from app.db.pool import acquire_connection
 from app.db.repositories.base import BaseRepository
 
 
@@ -15,16 +17,17 @@ def _get_db_pool(request: Request) -> Pool:
 async def _get_connection_from_pool(
     pool: Pool = Depends(_get_db_pool),
 ) -> AsyncGenerator[Connection, None]:
-    async with pool.acquire() as conn:
+    async with acquire_connection(pool) as conn:
         yield conn
 
 
+# memoized, so ``app.dependency_overrides[get_repository(Repo)]`` works
+@lru_cache(maxsize=None)
 def get_repository(
     repo_type: Type[BaseRepository],
-) -> Callable[[Connection], BaseRepository]:
-    def _get_repo(
-        conn: Connection = Depends(_get_connection_from_pool),
-    ) -> BaseRepository:
-        return repo_type(conn)
+) -> Callable[[Pool], BaseRepository]:
+    def _get_repo(pool: Pool = Depends(_get_db_pool)) -> BaseRepository:
+        # connections are acquired per query, see BaseRepository
+        return repo_type(pool)
 
     return _get_repo
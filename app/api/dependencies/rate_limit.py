@@ -0,0 +1,59 @@
+import math
+from json import JSONDecodeError
+from typing import Callable, Optional
+
+from starlette.requests import Request
+
+from app.core.config import RATE_LIMIT_PROXY_HOPS
+from app.services.errors import RateLimitExceededError
+from app.services.rate_limit import rate_limiter
+
+
+async def _get_identity(request: Request, field: str) -> Optional[str]:
+    # FastAPI has parsed and cached the body already, no extra read
+    try:
+        body = await request.json()
+    except (JSONDecodeError, UnicodeDecodeError):
+        return None
+
+    user = body.get("user") if isinstance(body, dict) else None
+    identity = user.get(field) if isinstance(user, dict) else None
+    return identity if isinstance(identity, str) else None
+
+
+def _get_client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else ""
+    if not RATE_LIMIT_PROXY_HOPS:
+        return peer
+
+    # entries left of the ones added by our proxies are sent by the client
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+    ]
+    if len(forwarded) < RATE_LIMIT_PROXY_HOPS:
+        return peer
+
+    return forwarded[-RATE_LIMIT_PROXY_HOPS]
+
+
+def check_rate_limit(*, identity_field: str) -> Callable:
+    """Limit attempts per client IP and per ``user.<identity_field>`` of body.
+
+    Behind proxies set ``RATE_LIMIT_PROXY_HOPS``, or all clients share the
+    bucket of the proxy address.
+
+    Meant to be the first dependency of a route, so rejected requests
+    cost neither database queries nor password hashing.
+    """
+
+    async def _check_rate_limit(request: Request) -> None:
+        wait = await rate_limiter.check(
+            ip=_get_client_ip(request),
+            identity=await _get_identity(request, identity_field),
+        )
+        if wait:
+            raise RateLimitExceededError(retry_after=math.ceil(wait))
+
+    return _check_rate_limit
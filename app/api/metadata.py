@@ -5,4 +5,12 @@ TAGS_METADATA: List[dict] = [
         "name": "users",
         "description": "Operations with users. The **login&signup** logic is also here.",
     },
+    {
+        "name": "polls",
+        "description": "Polls and voting, votes are stored in batches.",
+    },
+    {
+        "name": "admin",
+        "description": "Worker diagnostics, requires the `X-Admin-Token` header.",
+    },
 ]
@@ -0,0 +1,63 @@
+import time
+from typing import Dict, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import metrics, timing
+
+_durations: Dict[Tuple[str, int], metrics.Histogram] = {}
+
+
+def _duration_histogram(handler: str, status_code: int) -> metrics.Histogram:
+    histogram = _durations.get((handler, status_code))
+    if histogram is None:
+        histogram = _durations[handler, status_code] = metrics.histogram(
+            "http_request_duration_seconds",
+            "Time to handle HTTP requests",
+            labels={"handler": handler, "status": str(status_code)},
+        )
+    return histogram
+
+
+class ServerTimingMiddleware:
+    """Collect timing spans of every HTTP request.
+
+    Observes ``http_request_duration_seconds`` per handler and status and,
+    with ``server_timing``, reports the spans in a ``Server-Timing`` header.
+    Plain ASGI instead of ``BaseHTTPMiddleware``, which would buffer
+    responses through an extra task and queue.
+    """
+
+    def __init__(self, app: ASGIApp, *, server_timing: bool = False) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        token = timing.start_request()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timings = timing.current_timings()
+                if self.server_timing and timings is not None:
+                    timings["total"] = time.perf_counter() - started_at
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timing.format_server_timing(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timing.finish_request(token)
+            handler = getattr(scope.get("endpoint"), "__name__", "none")
+            _duration_histogram(handler, status_code).observe(
+                time.perf_counter() - started_at
+            )
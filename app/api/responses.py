@@ -0,0 +1,12 @@
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from app.core import serialization
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return serialization.dumps_bytes(content)
@@ -0,0 +1,95 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import (JSONResponse, PlainTextResponse, Response,
+                                 StreamingResponse)
+
+from app.api.dependencies.admin import check_admin_token
+from app.api.dependencies.database import get_repository
+from app.core.config import PROFILER_MAX_SECONDS
+from app.db.repositories.users import UsersRepository
+from app.resources import strings
+from app.services import profiler, users_import
+
+router = APIRouter()
+
+
+@router.get(
+    "/profile",
+    summary="Sample Worker Stacks",
+    name="admin:profile",
+    dependencies=[Depends(check_admin_token)],
+)
+async def profile_worker(
+    seconds: float = Query(5.0, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    output_format: str = Query(
+        "collapsed", alias="format", regex="^(collapsed|speedscope)$"
+    ),
+) -> Response:
+    """
+    Sample stacks of every thread of the worker that serves this request,
+    including the event loop and the password hashing threads.
+    """
+    try:
+        profile = await asyncio.get_event_loop().run_in_executor(
+            None, profiler.sample, seconds, interval_ms / 1000
+        )
+    except profiler.ProfilerBusyError as busy_error:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=strings.PROFILER_BUSY
+        ) from busy_error
+
+    if output_format == "speedscope":
+        return JSONResponse(profiler.to_speedscope(profile))
+
+    return PlainTextResponse(profiler.to_collapsed(profile))
+
+
+@router.post(
+    "/users/import",
+    summary="Bulk Import Users",
+    name="admin:import-users",
+    dependencies=[Depends(check_admin_token)],
+)
+async def import_users(
+    request: Request,
+    input_format: str = Query("ndjson", alias="format", regex="^(csv|ndjson)$"),
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> Response:
+    """
+    Load users from a CSV or NDJSON body, read as it is streamed in.
+    Rows with a taken username or email are skipped and reported.
+    """
+    try:
+        report = await users_import.users_importer.run(
+            users_repo, request.stream(), input_format
+        )
+    except users_import.ImportBusyError as busy_error:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=strings.USERS_IMPORT_BUSY
+        ) from busy_error
+
+    return JSONResponse(report.as_dict())
+
+
+@router.get(
+    "/users/export",
+    summary="Bulk Export Users",
+    name="admin:export-users",
+    dependencies=[Depends(check_admin_token)],
+)
+async def export_users(
+    output_format: str = Query("ndjson", alias="format", regex="^(csv|ndjson)$"),
+    hashes: bool = Query(False, description="include password hashes"),
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> Response:
+    """
+    Stream all users as CSV or NDJSON, in the format the import reads.
+    """
+    return StreamingResponse(
+        users_import.export_users(users_repo, output_format, hashes=hashes),
+        media_type=users_import.MEDIA_TYPES[output_format],
+    )
@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.routes import users
+from app.api.routes import admin, polls, users
 
 router = APIRouter()
 
 router.include_router(users.router, tags=["users"], prefix="/users")
+router.include_router(polls.router, tags=["polls"], prefix="/polls")
+router.include_router(admin.router, tags=["admin"], prefix="/admin")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from app.api.responses import FastJSONResponse
+from app.core.config import JWKS_MAX_AGE
+from app.services.keys import get_key_ring
+
+router = APIRouter()
+
+
+@router.get("/.well-known/jwks.json", include_in_schema=False, name="jwks")
+async def get_jwks() -> FastJSONResponse:
+    """Public keys of the key ring, for services verifying access tokens"""
+    return FastJSONResponse(
+        get_key_ring().jwks(),
+        headers={"Cache-Control": f"public, max-age={JWKS_MAX_AGE}"},
+    )
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from app.services import metrics
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("/metrics", include_in_schema=False, name="metrics")
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,170 @@
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Body, Depends, Path
+from fastapi.exceptions import HTTPException
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from app.api import caching
+from app.api.dependencies.auth import get_current_user_authorizer
+from app.api.dependencies.database import get_repository
+from app.api.responses import FastJSONResponse
+from app.db.errors.users import EntityDoesNotExistError
+from app.db.repositories.polls import PollsRepository
+from app.models.domain.polls import PollRecord, Vote
+from app.models.domain.users import UserRecord
+from app.models.schemas.polls import (MAX_ID, PollInCreate, PollInResponse,
+                                      VoteInCreate)
+from app.resources import strings
+from app.services import timing
+from app.services.live_results import live_results_hub
+from app.services.votes import vote_buffer
+
+router = APIRouter()
+
+
+def _poll_response(
+    poll: PollRecord,
+    status_code: int,
+    results: Optional[Dict[int, int]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> FastJSONResponse:
+    """Render ``PollInResponse`` straight from the poll read model"""
+    with timing.span("serialize"):
+        options = []
+        for option in poll.options:
+            option_content = {"id": option.id, "text": option.text}
+            if results is not None:
+                option_content["votes"] = results.get(option.id, 0)
+            options.append(option_content)
+
+        return FastJSONResponse(
+            {
+                "poll": {
+                    "id": poll.id,
+                    "author": poll.author,
+                    "question": poll.question,
+                    "created_at": poll.created_at.isoformat(),
+                    "closes_at": poll.closes_at.isoformat() if poll.closes_at else None,
+                    "options": options,
+                }
+            },
+            status_code=status_code,
+            headers=headers,
+        )
+
+
+async def _get_poll_or_404(polls_repo: PollsRepository, poll_id: int) -> PollRecord:
+    try:
+        return await polls_repo.get_poll(poll_id=poll_id)
+    except EntityDoesNotExistError as existence_error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=strings.POLL_DOES_NOT_EXIST,
+        ) from existence_error
+
+
+@router.post(
+    "",
+    status_code=status.HTTP_201_CREATED,
+    response_model=PollInResponse,
+    summary="Create Poll",
+    name="polls:create-poll",
+)
+async def create_poll(
+    poll_create: PollInCreate = Body(..., embed=True, alias="poll"),
+    current_user: UserRecord = Depends(get_current_user_authorizer()),
+    polls_repo: PollsRepository = Depends(get_repository(PollsRepository)),
+) -> FastJSONResponse:
+    """ Create a poll with its options, voting is open until ``closes_at`` """
+    poll = await polls_repo.create_poll(author=current_user, **poll_create.dict())
+    return _poll_response(poll, status.HTTP_201_CREATED)
+
+
+@router.get(
+    "/{poll_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=PollInResponse,
+    summary="Get Poll With Results",
+    name="polls:get-poll",
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified"}},
+)
+async def retrieve_poll(
+    request: Request,
+    poll_id: int = Path(..., ge=1, le=MAX_ID),
+    polls_repo: PollsRepository = Depends(get_repository(PollsRepository)),
+) -> Response:
+    """
+    Votes are counted once they are flushed, so results lag slightly.
+    Revalidate with ``If-None-Match``, the ``ETag`` changes with results.
+    """
+    poll = await _get_poll_or_404(polls_repo, poll_id)
+    results = await polls_repo.get_poll_results(poll_id=poll_id)
+    # a poll never changes once created, its results are its version
+    etag = caching.make_etag("poll", poll.id, sorted(results.items()))
+    if caching.is_not_modified(request, etag):
+        return caching.not_modified_response(etag)
+
+    return _poll_response(
+        poll, status.HTTP_200_OK, results, headers=caching.cache_headers(etag)
+    )
+
+
+@router.get(
+    "/{poll_id}/results/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Stream Poll Results",
+    name="polls:stream-results",
+    response_class=StreamingResponse,
+)
+async def stream_poll_results(
+    request: Request,
+    poll_id: int = Path(..., ge=1, le=MAX_ID),
+    polls_repo: PollsRepository = Depends(get_repository(PollsRepository)),
+) -> StreamingResponse:
+    """
+    Server-Sent Events with a ``snapshot`` of votes per option first and
+    ``delta`` events with the new totals of changed options after it.
+    """
+    poll = await _get_poll_or_404(polls_repo, poll_id)
+    results = await polls_repo.get_poll_results(poll_id=poll.id)
+    subscription = live_results_hub.subscribe(
+        poll.id, {option.id: results.get(option.id, 0) for option in poll.options}
+    )
+
+    return StreamingResponse(
+        live_results_hub.stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/{poll_id}/votes",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Vote In Poll",
+    name="polls:vote",
+)
+async def vote_in_poll(
+    poll_id: int = Path(..., ge=1, le=MAX_ID),
+    vote: VoteInCreate = Body(..., embed=True),
+    current_user: UserRecord = Depends(get_current_user_authorizer()),
+    polls_repo: PollsRepository = Depends(get_repository(PollsRepository)),
+) -> Response:
+    """
+    Accept a vote to be stored with the next batch. Only the first vote
+    of a user in a poll counts, later ones are accepted and dropped.
+    """
+    poll = await _get_poll_or_404(polls_repo, poll_id)
+    if poll.is_closed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=strings.POLL_CLOSED,
+        )
+    if not poll.has_option(vote.option_id):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=strings.POLL_OPTION_DOES_NOT_EXIST,
+        )
+
+    vote_buffer.submit(Vote(poll.id, current_user.id, vote.option_id))
+    return Response(status_code=status.HTTP_202_ACCEPTED)
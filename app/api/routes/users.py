@@ -1,57 +1,174 @@
-from fastapi import APIRouter, Body, Depends, Query
+import base64
+import binascii
+from typing import Any, Mapping, Optional, Tuple
+
+from fastapi import APIRouter, Body, Depends, Path, Query
 from fastapi.exceptions import HTTPException
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
 
-from app.api.dependencies.auth import get_current_user_authorizer
+from app.api import caching
+from app.api.dependencies.auth import (get_current_token_payload,
+                                       get_current_user_authorizer)
 from app.api.dependencies.database import get_repository
-from app.core import config
-from app.db.errors.users import EntityDoesNotExistError, WrongLoginError
+from app.api.dependencies.rate_limit import check_rate_limit
+from app.api.responses import FastJSONResponse
+from app.core import config, serialization
+from app.db.errors.users import (EntityAlreadyExistsError,
+                                 EntityDoesNotExistError,
+                                 EntityVersionConflictError, WrongLoginError)
+from app.db.repositories.tokens import TokensRepository
 from app.db.repositories.users import UsersRepository
-from app.models.schemas.users import (User, UserInCreate, UserInDB,
-                                      UserInLogin, UserInResponse,
-                                      UserInUpdate, UserWithStates,
-                                      UserWithToken)
+from app.models.domain.users import UserRecord
+from app.models.schemas.jwt import JWTPayload
+from app.models.schemas.users import (ProfileInResponse, UserInCreate,
+                                      UserInDB, UserInLogin, UserInResponse,
+                                      UserInUpdate, UsersInResponse,
+                                      UserWithStates)
 from app.resources import strings
-from app.services import jwt
-from app.services.auth import check_email_is_taken, check_username_is_taken
+from app.services import jwt, timing
+from app.services.revocation import revocation_set
 
 router = APIRouter()
 
 
+def _user_with_token_response(
+    user: UserRecord, status_code: int, token: str, refresh_token: Optional[str] = None,
+) -> FastJSONResponse:
+    """Render ``UserInResponse`` straight from the user read model.
+
+    Returning a response skips FastAPI validating and encoding the body
+    again, ``response_model`` is only kept for the OpenAPI schema.
+    """
+    with timing.span("serialize"):
+        user_content = {
+            "username": user.username,
+            "email": user.email,
+            "bio": user.bio,
+            "image": user.image,
+            "token": token,
+        }
+        if refresh_token is not None:
+            user_content["refresh_token"] = refresh_token
+
+        return FastJSONResponse({"user": user_content}, status_code=status_code)
+
+
+def _encode_cursor(row: Mapping[str, Any]) -> str:
+    position = [row.get("rank"), row["key"]]
+    return base64.urlsafe_b64encode(serialization.dumps_bytes(position)).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[float], str]:
+    try:
+        rank, key = serialization.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, ValueError, TypeError) as decode_error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=strings.SEARCH_CURSOR_INVALID,
+        ) from decode_error
+
+    if not isinstance(key, str) or not isinstance(rank, (int, float, type(None))):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=strings.SEARCH_CURSOR_INVALID,
+        )
+
+    return rank, key
+
+
+async def _new_session_response(
+    user: UserRecord, tokens_repo: TokensRepository, status_code: int,
+) -> FastJSONResponse:
+    access_token = jwt.create_access_token(user, str(config.SECRET_KEY))
+    refresh_token = await tokens_repo.create_refresh_token(
+        user_id=user.id, access_jti=access_token.jti
+    )
+    return _user_with_token_response(
+        user, status_code, access_token.token, refresh_token
+    )
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    response_model=UsersInResponse,
+    summary="Search Users",
+    name="users:search-users",
+)
+async def search_users(
+    query: str = Query(..., alias="q", min_length=1, max_length=254),
+    field: str = Query("username", regex="^(username|email)$"),
+    match: str = Query("prefix", regex="^(prefix|fuzzy)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, max_length=1024),
+    current_user: UserRecord = Depends(get_current_user_authorizer()),
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> FastJSONResponse:
+    """
+    Find users whose username (or email, for staff) starts with ``q`` or,
+    with ``match=fuzzy``, resembles it, best matches first. Pass
+    ``next_cursor`` as ``cursor`` to get the next page.
+    """
+    is_staff = current_user.is_staff or current_user.is_super
+    if field == "email" and not is_staff:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=strings.USERS_EMAIL_SEARCH_FORBIDDEN,
+        )
+
+    after_rank, after_key = _decode_cursor(cursor) if cursor else (None, "")
+    # one more row tells whether there is a next page
+    rows = await users_repo.search_users(
+        query=query,
+        field=field,
+        fuzzy=match == "fuzzy",
+        limit=limit + 1,
+        after_key=after_key,
+        after_rank=after_rank,
+    )
+
+    with timing.span("serialize"):
+        users = [
+            {
+                "username": row["username"],
+                "email": row["email"] if is_staff else None,
+                "bio": row["bio"],
+                "image": row["image"],
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+        return FastJSONResponse({"users": users, "next_cursor": next_cursor})
+
+
 @router.post(
     "/signup",
     status_code=status.HTTP_201_CREATED,
     response_model=UserInResponse,
     summary="Sign Up User",
     name="users:signup",
+    dependencies=[Depends(check_rate_limit(identity_field="email"))],
 )
 async def create_user(
     user_create: UserInCreate = Body(..., embed=True, alias="user"),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserInResponse:
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
+) -> FastJSONResponse:
     """ Some *markdown* description """
-    if await check_username_is_taken(users_repo, user_create.username):
+    try:
+        user = await users_repo.create_user(**user_create.dict())
+    except EntityAlreadyExistsError as existence_error:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=strings.USERNAME_TAKEN
-        )
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=strings.USERNAME_TAKEN
+            if existence_error.field == "username"
+            else strings.EMAIL_TAKEN,
+        ) from existence_error
 
-    if await check_email_is_taken(users_repo, user_create.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=strings.EMAIL_TAKEN
-        )
-
-    user = await users_repo.create_user(**user_create.dict())
-    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
-
-    return UserInResponse(
-        user=UserWithToken(
-            username=user.username,
-            email=user.email,
-            bio=user.bio,
-            image=user.image,
-            token=token,
-        )
-    )
+    return await _new_session_response(user, tokens_repo, status.HTTP_201_CREATED)
 
 
 @router.post(
@@ -60,35 +177,79 @@ async def create_user(
     response_model=UserInResponse,
     summary="Log In User",
     name="users:login",
+    dependencies=[Depends(check_rate_limit(identity_field="email_or_login"))],
 )
 async def login_user(
     user_login: UserInLogin = Body(..., embed=True, alias="user"),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserInResponse:
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
+) -> FastJSONResponse:
     """ Some *markdown* description """
     try:
-        user = await users_repo.get_user_by_username(username=user_login.email_or_login)
-    except EntityDoesNotExistError:
-        try:
-            user = await users_repo.get_user_by_email(email=user_login.email_or_login)
-        except EntityDoesNotExistError as existence_error:
-            raise WrongLoginError from existence_error
-
-    if not user.check_password(user_login.password):
+        user = await users_repo.get_user_by_login(login=user_login.email_or_login)
+    except EntityDoesNotExistError as existence_error:
+        raise WrongLoginError from existence_error
+
+    if not await user.check_password(user_login.password):
         raise WrongLoginError
 
-    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
+    return await _new_session_response(user, tokens_repo, status.HTTP_201_CREATED)
 
-    return UserInResponse(
-        user=UserWithToken(
-            username=user.username,
-            email=user.email,
-            bio=user.bio,
-            image=user.image,
-            token=token,
-        )
+
+@router.post(
+    "/token/refresh",
+    status_code=status.HTTP_201_CREATED,
+    response_model=UserInResponse,
+    summary="Refresh Access Token",
+    name="users:refresh-token",
+)
+async def refresh_access_token(
+    refresh_token: str = Body(..., embed=True),
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
+) -> FastJSONResponse:
+    """
+    Exchange a refresh token for a new access token and the next refresh
+    token. Every refresh token works once, replaying a used one revokes
+    its whole family.
+    """
+    access_jti = jwt.new_jti()
+    user, next_refresh_token = await tokens_repo.rotate_refresh_token(
+        refresh_token=refresh_token, access_jti=access_jti
+    )
+    access_token = jwt.create_access_token(
+        user, str(config.SECRET_KEY), jti=access_jti
     )
 
+    return _user_with_token_response(
+        user, status.HTTP_201_CREATED, access_token.token, next_refresh_token
+    )
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Log Out User",
+    name="users:logout",
+)
+async def logout_user(
+    payload: JWTPayload = Depends(get_current_token_payload),
+    refresh_token: Optional[str] = Body(None, embed=True),
+    tokens_repo: TokensRepository = Depends(get_repository(TokensRepository)),
+) -> Response:
+    """ Revoke the access token and, when given, the refresh token family """
+    revoked_jtis = []
+    if payload.jti:
+        await tokens_repo.revoke_access_token(jti=payload.jti, expires_at=payload.exp)
+        revoked_jtis.append(payload.jti)
+    if refresh_token:
+        revoked_jtis.extend(
+            await tokens_repo.revoke_refresh_token_family(refresh_token=refresh_token)
+        )
+    # effective on this worker right away, on the others after their sync
+    revocation_set.add(revoked_jtis)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 
 @router.put(
     "/update",
@@ -98,32 +259,80 @@ async def login_user(
     name="users:update-current-user",
 )
 async def update_user(
-    current_user: User = Depends(get_current_user_authorizer()),
+    current_user: UserRecord = Depends(get_current_user_authorizer()),
     user_update: UserInUpdate = Body(..., embed=True, alias="user"),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserInResponse:
+) -> FastJSONResponse:
     """ Some **desc** """
-    if user_update.username and user_update.username != current_user.username:
-        if await check_username_is_taken(users_repo, user_update.username):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail=strings.USERNAME_TAKEN,
-            )
+    try:
+        user = await users_repo.update_user(user=current_user, **user_update.dict())
+    except EntityAlreadyExistsError as existence_error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=strings.USERNAME_TAKEN
+            if existence_error.field == "username"
+            else strings.EMAIL_TAKEN,
+        ) from existence_error
+    except EntityVersionConflictError as conflict_error:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=strings.USER_CHANGED,
+        ) from conflict_error
 
-    if user_update.email and user_update.email != current_user.email:
-        if await check_email_is_taken(users_repo, user_update.email):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail=strings.EMAIL_TAKEN,
-            )
+    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
+    return _user_with_token_response(user, status.HTTP_200_OK, token)
 
-    user = await users_repo.update_user(user=current_user, **user_update.dict())
 
-    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
-    return UserInResponse(
-        user=UserWithToken(
-            username=user.username,
-            email=user.email,
-            bio=user.bio,
-            image=user.image,
-            token=token,
-        ),
-    )
+@router.get(
+    "/{username}",
+    status_code=status.HTTP_200_OK,
+    response_model=ProfileInResponse,
+    summary="Get Profile",
+    name="users:get-profile",
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified"}},
+)
+async def retrieve_profile(
+    request: Request,
+    username: str = Path(..., min_length=1, max_length=24),
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> Response:
+    """
+    Public profile of a user. Revalidate with ``If-None-Match``, the
+    ``ETag`` changes with every update of the user.
+
+    Revalidations are answered from the cached version of the user, without
+    loading it; with ``CACHE_BACKEND=none`` every request reads the user.
+    """
+    version = None
+    conditional = "if-none-match" in request.headers
+    if conditional:
+        version = await users_repo.get_user_version(username=username)
+        if version is not None:
+            etag = caching.make_etag("profile", *version)
+            if caching.is_not_modified(request, etag):
+                return caching.not_modified_response(etag)
+
+    try:
+        user = await users_repo.get_user_by_username(username=username)
+    except EntityDoesNotExistError as existence_error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=strings.USER_DOES_NOT_EXIST,
+        ) from existence_error
+
+    if conditional and version is None:
+        await users_repo.cache_user_version(user=user)
+
+    etag = caching.make_etag("profile", user.id, user.version)
+    if caching.is_not_modified(request, etag):
+        return caching.not_modified_response(etag)
+
+    with timing.span("serialize"):
+        return FastJSONResponse(
+            {
+                "profile": {
+                    "username": user.username,
+                    "bio": user.bio,
+                    "image": user.image,
+                }
+            },
+            headers=caching.cache_headers(etag),
+        )
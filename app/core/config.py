@@ -12,9 +12,140 @@ VERSION: str = config("VERSION", default="latest")
 DEBUG: bool = config("DEBUG", cast=bool, default=False)
 
 DATABASE_URL: URL = config("DATABASE_URL", cast=URL)
-MIN_CONNECTIONS_COUNT: int = config("MIN_CONNECTIONS_COUNT", cast=int, default=10)
+MIN_CONNECTIONS_COUNT: int = config("MIN_CONNECTIONS_COUNT", cast=int, default=2)
 MAX_CONNECTIONS_COUNT: int = config("MAX_CONNECTIONS_COUNT", cast=int, default=10)
+DB_POOL_ACQUIRE_TIMEOUT: float = config(
+    "DB_POOL_ACQUIRE_TIMEOUT", cast=float, default=5.0
+)
+DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = config(
+    "DB_MAX_INACTIVE_CONNECTION_LIFETIME", cast=float, default=300.0
+)
+DB_COMMAND_TIMEOUT: float = config("DB_COMMAND_TIMEOUT", cast=float, default=15.0)
+DB_STATEMENT_TIMEOUT_MS: int = config("DB_STATEMENT_TIMEOUT_MS", cast=int, default=10000)
 
 PATH_TO_MIGRATIONS: str = config("PATH_TO_MIGRATIONS", cast=str)
+MIGRATIONS_ON_STARTUP: str = config(
+    "MIGRATIONS_ON_STARTUP", cast=str, default="leader"
+)  # "off", "leader" or "always"
+MIGRATIONS_CONNECT_ATTEMPTS: int = config(
+    "MIGRATIONS_CONNECT_ATTEMPTS", cast=int, default=10
+)
+MIGRATIONS_CONNECT_MAX_DELAY: float = config(
+    "MIGRATIONS_CONNECT_MAX_DELAY", cast=float, default=5.0
+)
 
 SECRET_KEY: Secret = config("SECRET_KEY", cast=Secret)
+ADMIN_TOKEN: Secret = config("ADMIN_TOKEN", cast=Secret, default="")
+
+JWT_ALGORITHM: str = config("JWT_ALGORITHM", cast=str, default="HS256")  # or "ES256"
+JWT_KEYS_DIR: str = config("JWT_KEYS_DIR", cast=str, default="")
+JWT_SIGNING_KID: str = config("JWT_SIGNING_KID", cast=str, default="")
+JWT_ACCEPT_HS256: bool = config("JWT_ACCEPT_HS256", cast=bool, default=True)
+JWKS_MAX_AGE: int = config("JWKS_MAX_AGE", cast=int, default=300)
+
+ACCESS_TOKEN_EXPIRE_MINUTES: int = config(
+    "ACCESS_TOKEN_EXPIRE_MINUTES", cast=int, default=15
+)
+REFRESH_TOKEN_EXPIRE_DAYS: int = config("REFRESH_TOKEN_EXPIRE_DAYS", cast=int, default=30)
+REVOCATION_SYNC_INTERVAL: float = config(
+    "REVOCATION_SYNC_INTERVAL", cast=float, default=2.0
+)
+REVOCATION_REBUILD_INTERVAL: float = config(
+    "REVOCATION_REBUILD_INTERVAL", cast=float, default=300.0
+)
+REVOCATION_ERROR_RATE: float = config(
+    "REVOCATION_ERROR_RATE", cast=float, default=0.001
+)
+
+METRICS_ENABLED: bool = config("METRICS_ENABLED", cast=bool, default=False)
+SERVER_TIMING_ENABLED: bool = config("SERVER_TIMING_ENABLED", cast=bool, default=False)
+RESPONSE_CACHE_MAX_AGE: int = config("RESPONSE_CACHE_MAX_AGE", cast=int, default=0)
+
+PROFILER_MAX_SECONDS: float = config("PROFILER_MAX_SECONDS", cast=float, default=30.0)
+EVENT_LOOP_LAG_THRESHOLD: float = config(
+    "EVENT_LOOP_LAG_THRESHOLD", cast=float, default=0.1
+)  # 0 disables the monitor
+EVENT_LOOP_LAG_INTERVAL: float = config(
+    "EVENT_LOOP_LAG_INTERVAL", cast=float, default=0.5
+)
+
+PASSWORD_HASHER_EXECUTOR: str = config(
+    "PASSWORD_HASHER_EXECUTOR", cast=str, default="thread"
+)  # "thread" or "process"
+PASSWORD_HASHER_WORKERS: int = config("PASSWORD_HASHER_WORKERS", cast=int, default=4)
+PASSWORD_HASHER_QUEUE_SIZE: int = config(
+    "PASSWORD_HASHER_QUEUE_SIZE", cast=int, default=64
+)
+PASSWORD_HASHER_RETRY_AFTER: int = config(
+    "PASSWORD_HASHER_RETRY_AFTER", cast=int, default=1
+)
+
+USERS_IMPORT_BATCH_SIZE: int = config("USERS_IMPORT_BATCH_SIZE", cast=int, default=5000)
+USERS_IMPORT_WORKERS: int = config("USERS_IMPORT_WORKERS", cast=int, default=4)
+USERS_EXPORT_PREFETCH: int = config("USERS_EXPORT_PREFETCH", cast=int, default=1000)
+USERS_SEARCH_FUZZY_MATCHES: int = config(
+    "USERS_SEARCH_FUZZY_MATCHES", cast=int, default=1000
+)  # nearest fuzzy matches that can be paged through
+
+TOKEN_CACHE_MAX_SIZE: int = config("TOKEN_CACHE_MAX_SIZE", cast=int, default=10000)
+TOKEN_CACHE_TTL_SECONDS: int = config("TOKEN_CACHE_TTL_SECONDS", cast=int, default=60)
+
+POLL_CACHE_MAX_SIZE: int = config("POLL_CACHE_MAX_SIZE", cast=int, default=10000)
+POLL_CACHE_TTL_SECONDS: int = config("POLL_CACHE_TTL_SECONDS", cast=int, default=300)
+POLL_RESULTS_CACHE_TTL_SECONDS: float = config(
+    "POLL_RESULTS_CACHE_TTL_SECONDS", cast=float, default=1.0
+)
+POLL_TALLY_SHARDS: int = config("POLL_TALLY_SHARDS", cast=int, default=16)
+POLL_TALLY_RECONCILE_INTERVAL: float = config(
+    "POLL_TALLY_RECONCILE_INTERVAL", cast=float, default=3600.0
+)  # 0 disables the job
+POLL_TALLY_RECONCILE_BATCH_SIZE: int = config(
+    "POLL_TALLY_RECONCILE_BATCH_SIZE", cast=int, default=100
+)
+POLL_TALLY_RECONCILE_TIMEOUT: float = config(
+    "POLL_TALLY_RECONCILE_TIMEOUT", cast=float, default=60.0
+)  # per batch of polls, instead of DB_STATEMENT_TIMEOUT_MS
+LIVE_RESULTS_INTERVAL: float = config("LIVE_RESULTS_INTERVAL", cast=float, default=0.5)
+LIVE_RESULTS_HEARTBEAT_INTERVAL: float = config(
+    "LIVE_RESULTS_HEARTBEAT_INTERVAL", cast=float, default=15.0
+)
+LIVE_RESULTS_MAX_SUBSCRIBERS: int = config(
+    "LIVE_RESULTS_MAX_SUBSCRIBERS", cast=int, default=20000
+)
+LIVE_RESULTS_MAX_STREAM_SECONDS: float = config(
+    "LIVE_RESULTS_MAX_STREAM_SECONDS", cast=float, default=600.0
+)
+LIVE_RESULTS_RETRY_AFTER: int = config("LIVE_RESULTS_RETRY_AFTER", cast=int, default=5)
+VOTE_FLUSH_INTERVAL: float = config("VOTE_FLUSH_INTERVAL", cast=float, default=0.5)
+VOTE_FLUSH_SIZE: int = config("VOTE_FLUSH_SIZE", cast=int, default=1000)
+VOTE_BUFFER_MAX_PENDING: int = config(
+    "VOTE_BUFFER_MAX_PENDING", cast=int, default=100000
+)
+VOTE_RETRY_AFTER: int = config("VOTE_RETRY_AFTER", cast=int, default=1)
+
+RATE_LIMIT_BACKEND: str = config(
+    "RATE_LIMIT_BACKEND", cast=str, default="memory"
+)  # "none", "memory" or "redis" (at CACHE_URL)
+RATE_LIMIT_IP_PER_MINUTE: float = config(
+    "RATE_LIMIT_IP_PER_MINUTE", cast=float, default=60.0
+)
+RATE_LIMIT_IP_BURST: int = config("RATE_LIMIT_IP_BURST", cast=int, default=30)
+RATE_LIMIT_IDENTITY_PER_MINUTE: float = config(
+    "RATE_LIMIT_IDENTITY_PER_MINUTE", cast=float, default=10.0
+)
+RATE_LIMIT_IDENTITY_BURST: int = config("RATE_LIMIT_IDENTITY_BURST", cast=int, default=5)
+# proxies in front of the app that append the peer to X-Forwarded-For; the
+# client IP is the address the outermost of them saw, 0 uses the peer address
+RATE_LIMIT_PROXY_HOPS: int = config("RATE_LIMIT_PROXY_HOPS", cast=int, default=0)
+
+# "memory" is per worker and only invalidated by writes of that worker,
+# use it with a single worker only; "redis" is shared by all workers
+CACHE_BACKEND: str = config(
+    "CACHE_BACKEND", cast=str, default="none"
+)  # "none", "memory" or "redis"
+CACHE_URL: URL = config("CACHE_URL", cast=URL, default="redis://localhost:6379/0")
+CACHE_MAX_ENTRIES: int = config("CACHE_MAX_ENTRIES", cast=int, default=10000)
+CACHE_TTL_SECONDS: int = config("CACHE_TTL_SECONDS", cast=int, default=60)
+CACHE_NEGATIVE_TTL_SECONDS: int = config(
+    "CACHE_NEGATIVE_TTL_SECONDS", cast=int, default=10
+)
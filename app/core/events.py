@@ -1,26 +1,119 @@
-from typing import Callable
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
 
 from fastapi import FastAPI
 from loguru import logger
 
+from app.core.config import (DATABASE_URL, EVENT_LOOP_LAG_INTERVAL,
+                             EVENT_LOOP_LAG_THRESHOLD, MIGRATIONS_ON_STARTUP,
+                             POLL_TALLY_RECONCILE_BATCH_SIZE,
+                             POLL_TALLY_RECONCILE_INTERVAL,
+                             POLL_TALLY_RECONCILE_TIMEOUT)
 from app.db.events import connect_to_db, disconnect_db
-from app.db.migrations.migrate import make_migrations
+from app.db.migrations.migrate import (make_migrations_as_leader,
+                                       make_migrations_in_thread)
+from app.db.repositories.cache import users_cache
+from app.db.repositories.polls import PollsRepository
+from app.db.repositories.tokens import TokensRepository
 from app.db.repositories.users import UsersRepository
+from app.services import jwt, metrics
+from app.services.live_results import live_results_hub
+from app.services.loop_monitor import LoopLagMonitor
+from app.services.rate_limit import rate_limiter
+from app.services.revocation import revocation_set
+from app.services.security import password_hasher
+from app.services.tallies import TallyReconciler
+from app.services.users_import import users_importer
+from app.services.votes import vote_buffer
+
+
+async def _run_startup_migrations() -> None:
+    if MIGRATIONS_ON_STARTUP == "off":
+        return
+
+    logger.info("Running migrations script...")
+    if MIGRATIONS_ON_STARTUP == "always":
+        await make_migrations_in_thread()
+    elif MIGRATIONS_ON_STARTUP == "leader":
+        if not await make_migrations_as_leader():
+            logger.info("Another worker has migrated, skipping")
+            return
+    else:
+        raise ValueError(f"unsupported migrations mode: {MIGRATIONS_ON_STARTUP}")
+    logger.info("Migrations script is done")
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], step: str) -> Iterator[None]:
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[step] = time.perf_counter() - started_at
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
     async def start_app() -> None:
-        await connect_to_db(app)
+        started_at = time.perf_counter()
+        app.state.startup_timings = timings = {}
+        # migrate first, so the pool prepares statements against fresh schema
+        with _timed(timings, "migrations"):
+            await _run_startup_migrations()
+        with _timed(timings, "signing_keys"):
+            jwt.check_signing_keys()
+        with _timed(timings, "connect_to_db"):
+            await connect_to_db(app)
         app.state.users_repo = UsersRepository(app.state.pool)
-        logger.info("Running migrations script...")
-        make_migrations()
-        logger.info("Migrations script is done")
+        tokens_repo = TokensRepository(app.state.pool)
+        with _timed(timings, "revoked_tokens"):
+            await revocation_set.load(tokens_repo)
+        revocation_set.start(tokens_repo)
+        vote_buffer.start(PollsRepository(app.state.pool))
+        live_results_hub.start(PollsRepository(app.state.pool), str(DATABASE_URL))
+
+        app.state.tally_reconciler = None
+        if POLL_TALLY_RECONCILE_INTERVAL > 0:
+            app.state.tally_reconciler = TallyReconciler(
+                interval=POLL_TALLY_RECONCILE_INTERVAL,
+                batch_size=POLL_TALLY_RECONCILE_BATCH_SIZE,
+                timeout=POLL_TALLY_RECONCILE_TIMEOUT,
+            )
+            app.state.tally_reconciler.start(PollsRepository(app.state.pool))
+
+        app.state.loop_monitor = None
+        if EVENT_LOOP_LAG_THRESHOLD > 0:
+            app.state.loop_monitor = LoopLagMonitor(
+                threshold=EVENT_LOOP_LAG_THRESHOLD, interval=EVENT_LOOP_LAG_INTERVAL
+            )
+            app.state.loop_monitor.start()
+
+        app.state.startup_seconds = time.perf_counter() - started_at
+        metrics.gauge(
+            "app_startup_seconds",
+            "Time spent in startup handlers of this worker",
+            lambda: app.state.startup_seconds,
+        )
+        logger.info("Worker started in {0:.3f}s", app.state.startup_seconds)
 
     return start_app
 
 
 def create_stop_app_handler(app: FastAPI) -> Callable:
     async def stop_app() -> None:
+        if getattr(app.state, "loop_monitor", None) is not None:
+            await app.state.loop_monitor.stop()
+        await revocation_set.stop()
+        await live_results_hub.stop()
+        if getattr(app.state, "tally_reconciler", None) is not None:
+            await app.state.tally_reconciler.stop()
+        # before disconnecting, pending votes are flushed through the pool
+        await vote_buffer.stop(PollsRepository(app.state.pool))
         await disconnect_db(app)
+        password_hasher.shutdown()
+        users_importer.shutdown()
+        if users_cache is not None:
+            await users_cache.close()
+        await rate_limiter.close()
 
     return stop_app
@@ -0,0 +1,15 @@
+from typing import Any
+
+import orjson
+
+
+def dumps(content: Any) -> str:
+    return orjson.dumps(content).decode()
+
+
+def dumps_bytes(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+def loads(content: str) -> Any:
+    return orjson.loads(content)
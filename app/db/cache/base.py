@@ -0,0 +1,27 @@
+import abc
+from typing import Optional
+
+
+class CacheError(Exception):
+    """Raised when cache backend fails or replies with an error"""
+
+
+class CacheBackend(abc.ABC):
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return value stored under ``key`` or ``None``"""
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds"""
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Remove ``keys`` if they exist"""
+
+    @abc.abstractmethod
+    async def incr(self, key: str) -> int:
+        """Atomically increment integer stored under ``key`` (0 if missing)"""
+
+    async def close(self) -> None:
+        """Release resources held by the backend"""
@@ -0,0 +1,133 @@
+"""Tiny in-memory server speaking enough RESP for ``RespCacheBackend``.
+
+Meant for local development and tests, not for production::
+
+    python -m app.db.cache.fake_server --port 6380
+"""
+import argparse
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.db.cache.base import CacheError
+from app.db.cache.resp import read_reply
+from app.db.cache.scripts import GCRA_SCRIPT
+
+
+class FakeRespServer:
+    def __init__(self) -> None:
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        # EVAL runs Python twins of the known scripts, there is no Lua here
+        self._scripts: Dict[bytes, Callable[[List[bytes], List[bytes]], bytes]] = {
+            GCRA_SCRIPT.encode(): self._gcra,
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    writer.write(b"-ERR protocol error\r\n")
+                else:
+                    writer.write(self._dispatch(command))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, CacheError):
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, command: List[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name in {b"AUTH", b"SELECT"}:
+            return b"+OK\r\n"
+        if name == b"GET":
+            value = self._get(args[0])
+            if value is None:
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            expires_at = None
+            if len(args) == 4 and args[2].upper() == b"EX":
+                expires_at = time.monotonic() + int(args[3])
+            self._data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = sum(self._data.pop(key, None) is not None for key in args)
+            return b":%d\r\n" % removed
+        if name == b"INCR":
+            current = self._get(args[0])
+            _, expires_at = self._data.get(args[0], (b"", None))
+            try:
+                counter = int(current or 0) + 1
+            except ValueError:
+                return b"-ERR value is not an integer or out of range\r\n"
+            self._data[args[0]] = (str(counter).encode(), expires_at)
+            return b":%d\r\n" % counter
+        if name == b"EVAL":
+            script = self._scripts.get(args[0])
+            if script is None:
+                return b"-ERR fake server only runs scripts of app.db.cache.scripts\r\n"
+            keys_end = 2 + int(args[1])
+            return script(args[2:keys_end], args[keys_end:])
+        if name == b"FLUSHALL":
+            self._data.clear()
+            return b"+OK\r\n"
+
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    def _gcra(self, keys: List[bytes], argv: List[bytes]) -> bytes:
+        now, interval, capacity = (float(arg) for arg in argv)
+        tat = max(float(self._get(keys[0]) or now), now) + interval
+        wait = tat - now - capacity
+        if wait > 0:
+            reply = repr(wait).encode()
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+        expires_at = time.monotonic() + math.ceil((tat - now) * 1000) / 1000
+        self._data[keys[0]] = (repr(tat).encode(), expires_at)
+        return b"$1\r\n0\r\n"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        return value
+
+
+async def _serve(host: str, port: int) -> None:
+    server = FakeRespServer()
+    port = await server.start(host, port)
+    logger.info("Fake cache server listening on {0}:{1}", host, port)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    arguments = parser.parse_args()
+    asyncio.run(_serve(arguments.host, arguments.port))
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+from app.db.cache.base import CacheBackend, CacheError
+
+Reply = Union[None, int, bytes, List[Any]]
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def encode_command(*args: Union[str, bytes, int]) -> bytes:
+    chunks = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, int):
+            arg = str(arg)
+        if isinstance(arg, str):
+            arg = arg.encode()
+        chunks.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+
+    return b"".join(chunks)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Reply:
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        raise CacheError(payload.decode(errors="replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length == -1:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length == -1:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+
+    raise CacheError(f"unexpected reply from cache server: {line!r}")
+
+
+class RespCacheBackend(CacheBackend):
+    """Network cache speaking the Redis protocol (RESP).
+
+    Works against Redis, KeyDB, Dragonfly or the local fake server from
+    ``app.db.cache.fake_server``.
+    """
+
+    def __init__(
+        self, url: str, *, max_connections: int = 8, timeout: float = 0.5,
+    ) -> None:
+        parsed = urlparse(url)
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._password = parsed.password
+        self._db = int(parsed.path.lstrip("/") or 0)
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._idle: List[_Connection] = []
+        # created lazily so that it binds to the running event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._execute("GET", key)  # type: ignore
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._execute("SET", key, value, "EX", ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._execute("DEL", *keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._execute("INCR", key)  # type: ignore
+
+    async def eval(self, script: str, keys: Sequence[str], *args: str) -> Reply:
+        """Run a Lua ``script`` atomically on the server"""
+        return await self._execute("EVAL", script, len(keys), *keys, *args)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def _execute(self, *args: Union[str, bytes, int]) -> Reply:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_connections)
+
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else await self._connect()
+            try:
+                reply = await asyncio.wait_for(
+                    self._roundtrip(connection, encode_command(*args)), self._timeout
+                )
+            except CacheError:
+                self._idle.append(connection)
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as error:
+                connection[1].close()
+                raise CacheError(f"cache server is unavailable: {error!r}") from error
+            except BaseException:
+                # the reply may be half-read, the connection is unusable
+                connection[1].close()
+                raise
+
+            self._idle.append(connection)
+            return reply
+
+    async def _connect(self) -> _Connection:
+        try:
+            connection = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), self._timeout
+            )
+        except (OSError, asyncio.TimeoutError) as error:
+            raise CacheError(f"cache server is unavailable: {error!r}") from error
+
+        try:
+            if self._password:
+                await self._roundtrip(connection, encode_command("AUTH", self._password))
+            if self._db:
+                await self._roundtrip(connection, encode_command("SELECT", self._db))
+        except BaseException:
+            connection[1].close()
+            raise
+
+        return connection
+
+    @staticmethod
+    async def _roundtrip(connection: _Connection, command: bytes) -> Reply:
+        reader, writer = connection
+        writer.write(command)
+        await writer.drain()
+        return await read_reply(reader)
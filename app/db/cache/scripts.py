@@ -0,0 +1,15 @@
+"""Lua scripts run with ``EVAL``, ``fake_server`` has a twin of each"""
+
+# GCRA, the same decisions as a token bucket with one timestamp per key:
+# the "theoretical arrival time" at which the bucket would be full again
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or ARGV[1]), now)
+tat = tat + tonumber(ARGV[2])
+local wait = tat - now - tonumber(ARGV[3])
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000))
+return '0'
+"""
@@ -0,0 +1,28 @@
+import asyncio
+
+from asyncpg import InterfaceError, PostgresError
+from fastapi import HTTPException, status
+
+from app.resources.strings import DATABASE_UNAVAILABLE
+
+
+class DatabaseUnavailableError(HTTPException):
+    """Raised when no pooled connection could be acquired in time"""
+
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=DATABASE_UNAVAILABLE,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+# what background jobs retry on, InterfaceError covers a pooled connection
+# lost mid-query (ConnectionDoesNotExistError)
+DATABASE_ERRORS = (
+    PostgresError,
+    InterfaceError,
+    OSError,
+    asyncio.TimeoutError,
+    DatabaseUnavailableError,
+)
@@ -0,0 +1,12 @@
+from fastapi import HTTPException, status
+
+from app.resources.strings import INVALID_REFRESH_TOKEN
+
+
+class InvalidRefreshTokenError(HTTPException):
+    """Raised when refresh token is unknown, expired, used or revoked"""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN, detail=INVALID_REFRESH_TOKEN
+        )
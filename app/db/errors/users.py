@@ -7,6 +7,18 @@ class EntityDoesNotExistError(Exception):
     """Raised when entity not found in database"""
 
 
+class EntityAlreadyExistsError(Exception):
+    """Raised when entity conflicts with existing one by unique field"""
+
+    def __init__(self, field: str) -> None:
+        super().__init__(f"entity with this {field} already exists")
+        self.field = field
+
+
+class EntityVersionConflictError(Exception):
+    """Raised when entity was changed since it was loaded"""
+
+
 class WrongLoginError(HTTPException):
     """Raised when log in input is incorrect (login/email or/and password)"""
 
@@ -1,9 +1,27 @@
 import asyncpg
+from asyncpg.connection import Connection
 from fastapi import FastAPI
 from loguru import logger
 
-from app.core.config import (DATABASE_URL, MAX_CONNECTIONS_COUNT,
-                             MIN_CONNECTIONS_COUNT)
+from app.core import serialization
+from app.core.config import (DATABASE_URL, DB_COMMAND_TIMEOUT,
+                             DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+                             DB_STATEMENT_TIMEOUT_MS, MAX_CONNECTIONS_COUNT,
+                             MIN_CONNECTIONS_COUNT, PROJECT_NAME)
+from app.db.pool import register_pool_metrics
+from app.db.statements import registry
+
+
+async def _init_connection(conn: Connection) -> None:
+    for json_type in ("json", "jsonb"):
+        await conn.set_type_codec(
+            json_type,
+            schema="pg_catalog",
+            encoder=serialization.dumps,
+            decoder=serialization.loads,
+        )
+
+    await registry.prepare_all(conn)
 
 
 async def connect_to_db(app: FastAPI) -> None:
@@ -12,13 +30,22 @@ async def connect_to_db(app: FastAPI) -> None:
         str(DATABASE_URL),
         min_size=MIN_CONNECTIONS_COUNT,
         max_size=MAX_CONNECTIONS_COUNT,
+        max_inactive_connection_lifetime=DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+        command_timeout=DB_COMMAND_TIMEOUT,
+        init=_init_connection,
+        # startup parameters survive the RESET ALL issued on pool release
+        server_settings={
+            "application_name": PROJECT_NAME,
+            "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+        },
     )
+    register_pool_metrics(app.state.pool)
 
     logger.info("Connection established")
 
 
 async def disconnect_db(app: FastAPI) -> None:
     logger.info("Closing connection to database")
-    await app.state.conn.close()
+    await app.state.pool.close()
 
     logger.info("Connection closed")
@@ -0,0 +1,9 @@
+"""Apply pending migrations: ``python -m app.db.migrations``"""
+from loguru import logger
+
+from app.db.migrations.migrate import make_migrations
+
+if __name__ == "__main__":
+    logger.info("Running migrations script...")
+    make_migrations()
+    logger.info("Migrations script is done")
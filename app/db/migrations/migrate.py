@@ -1,21 +1,100 @@
+import asyncio
 import time
+from typing import TYPE_CHECKING, Iterator
 
-from psycopg2.errors import OperationalError
-from yoyo import get_backend, read_migrations
+import asyncpg
+from asyncpg.connection import Connection
+from loguru import logger
 
-from app.core.config import DATABASE_URL, PATH_TO_MIGRATIONS
+from app.core.config import (DATABASE_URL, MIGRATIONS_CONNECT_ATTEMPTS,
+                             MIGRATIONS_CONNECT_MAX_DELAY, PATH_TO_MIGRATIONS)
+from app.db.queries.locks import (ADVISORY_LOCK_QUERY, ADVISORY_UNLOCK_QUERY,
+                                  TRY_ADVISORY_LOCK_QUERY)
 
-while True:
-    try:
-        backend = get_backend(str(DATABASE_URL))
-        break
-    except OperationalError:
-        time.sleep(1)
+if TYPE_CHECKING:
+    from yoyo.backends import DatabaseBackend
+
+# arbitrary, but the same for every worker of every deployment
+MIGRATIONS_LOCK_ID = 7_046_311
+
+
+def _retry_delays() -> Iterator[float]:
+    """Backoff before each of ``MIGRATIONS_CONNECT_ATTEMPTS`` - 1 retries"""
+    delay = 0.1
+    for attempt in range(1, MIGRATIONS_CONNECT_ATTEMPTS):
+        logger.warning(
+            "Database is unavailable, retrying in {0:.1f}s ({1}/{2})",
+            delay,
+            attempt,
+            MIGRATIONS_CONNECT_ATTEMPTS,
+        )
+        yield delay
+        delay = min(delay * 2, MIGRATIONS_CONNECT_MAX_DELAY)
 
 
-migrations = read_migrations(PATH_TO_MIGRATIONS)
+def _get_backend() -> "DatabaseBackend":
+    # yoyo and psycopg2 are only needed by the worker that migrates
+    from psycopg2 import OperationalError
+    from yoyo import get_backend
+
+    delays = _retry_delays()
+    while True:
+        try:
+            return get_backend(str(DATABASE_URL))
+        except OperationalError:
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+
+async def _connect() -> Connection:
+    delays = _retry_delays()
+    while True:
+        try:
+            return await asyncpg.connect(str(DATABASE_URL))
+        except (
+            OSError,
+            asyncio.TimeoutError,
+            asyncpg.CannotConnectNowError,
+        ):
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
 
 
 def make_migrations() -> None:
+    from yoyo import read_migrations
+
+    backend = _get_backend()
+    migrations = read_migrations(PATH_TO_MIGRATIONS)
     with backend.lock():
         backend.apply_migrations(backend.to_apply(migrations))
+
+
+async def make_migrations_in_thread() -> None:
+    await asyncio.get_event_loop().run_in_executor(None, make_migrations)
+
+
+async def make_migrations_as_leader() -> bool:
+    """Migrate in a thread if no other worker is doing it right now.
+
+    Returns ``False`` when another worker held the lock, once it released
+    it, so that no worker serves requests before the schema is current.
+    """
+    conn = await _connect()
+    try:
+        if not await conn.fetchval(TRY_ADVISORY_LOCK_QUERY, MIGRATIONS_LOCK_ID):
+            await conn.fetchval(ADVISORY_LOCK_QUERY, MIGRATIONS_LOCK_ID)
+            await conn.fetchval(ADVISORY_UNLOCK_QUERY, MIGRATIONS_LOCK_ID)
+            return False
+
+        try:
+            await make_migrations_in_thread()
+        finally:
+            await conn.fetchval(ADVISORY_UNLOCK_QUERY, MIGRATIONS_LOCK_ID)
+    finally:
+        await conn.close()
+
+    return True
@@ -0,0 +1,20 @@
+from yoyo import step
+
+from app.db.queries.tables import (CHECK_USERS_EMAIL_UNIQUE_QUERY,
+                                   CHECK_USERS_USERNAME_UNIQUE_QUERY,
+                                   CREATE_USERS_EMAIL_UNIQUE_INDEX_QUERY,
+                                   CREATE_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+                                   DROP_USERS_EMAIL_UNIQUE_INDEX_QUERY,
+                                   DROP_USERS_USERNAME_UNIQUE_INDEX_QUERY)
+
+__depends__ = {"0001.create-tables"}
+
+steps = [
+    step(CHECK_USERS_USERNAME_UNIQUE_QUERY),
+    step(
+        CREATE_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+        DROP_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+    ),
+    step(CHECK_USERS_EMAIL_UNIQUE_QUERY),
+    step(CREATE_USERS_EMAIL_UNIQUE_INDEX_QUERY, DROP_USERS_EMAIL_UNIQUE_INDEX_QUERY),
+]
@@ -0,0 +1,42 @@
+from yoyo import step
+
+from app.db.queries.tables import (
+    ADD_USERS_EMAIL_NORMALIZED_COLUMN_QUERY,
+    CHECK_USERS_EMAIL_NORMALIZED_UNIQUE_QUERY,
+    CHECK_USERS_USERNAME_LOWER_UNIQUE_QUERY,
+    CREATE_USERS_EMAIL_NORMALIZED_UNIQUE_INDEX_QUERY,
+    CREATE_USERS_EMAIL_UNIQUE_INDEX_QUERY,
+    CREATE_USERS_USERNAME_LOWER_UNIQUE_INDEX_QUERY,
+    CREATE_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+    DROP_USERS_EMAIL_NORMALIZED_COLUMN_QUERY,
+    DROP_USERS_EMAIL_NORMALIZED_UNIQUE_INDEX_QUERY,
+    DROP_USERS_EMAIL_UNIQUE_INDEX_QUERY,
+    DROP_USERS_USERNAME_LOWER_UNIQUE_INDEX_QUERY,
+    DROP_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+    FILL_USERS_EMAIL_NORMALIZED_COLUMN_QUERY)
+
+__depends__ = {"0002.users-unique-indexes"}
+
+steps = [
+    step(
+        ADD_USERS_EMAIL_NORMALIZED_COLUMN_QUERY,
+        DROP_USERS_EMAIL_NORMALIZED_COLUMN_QUERY,
+    ),
+    step(FILL_USERS_EMAIL_NORMALIZED_COLUMN_QUERY),
+    step(CHECK_USERS_USERNAME_LOWER_UNIQUE_QUERY),
+    step(
+        CREATE_USERS_USERNAME_LOWER_UNIQUE_INDEX_QUERY,
+        DROP_USERS_USERNAME_LOWER_UNIQUE_INDEX_QUERY,
+    ),
+    step(CHECK_USERS_EMAIL_NORMALIZED_UNIQUE_QUERY),
+    step(
+        CREATE_USERS_EMAIL_NORMALIZED_UNIQUE_INDEX_QUERY,
+        DROP_USERS_EMAIL_NORMALIZED_UNIQUE_INDEX_QUERY,
+    ),
+    # case-insensitive indexes above make the exact ones redundant
+    step(
+        DROP_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+        CREATE_USERS_USERNAME_UNIQUE_INDEX_QUERY,
+    ),
+    step(DROP_USERS_EMAIL_UNIQUE_INDEX_QUERY, CREATE_USERS_EMAIL_UNIQUE_INDEX_QUERY),
+]
@@ -0,0 +1,19 @@
+from yoyo import step
+
+from app.db.queries.tables import (
+    CREATE_REFRESH_TOKENS_EXPIRES_AT_INDEX_QUERY,
+    CREATE_REFRESH_TOKENS_FAMILY_INDEX_QUERY,
+    CREATE_REFRESH_TOKENS_TABLE_QUERY,
+    CREATE_REVOKED_TOKENS_REVOKED_AT_INDEX_QUERY,
+    CREATE_REVOKED_TOKENS_TABLE_QUERY, DROP_REFRESH_TOKENS_TABLE_QUERY,
+    DROP_REVOKED_TOKENS_TABLE_QUERY)
+
+__depends__ = {"0003.users-lookup-indexes"}
+
+steps = [
+    step(CREATE_REFRESH_TOKENS_TABLE_QUERY, DROP_REFRESH_TOKENS_TABLE_QUERY),
+    step(CREATE_REFRESH_TOKENS_FAMILY_INDEX_QUERY),
+    step(CREATE_REFRESH_TOKENS_EXPIRES_AT_INDEX_QUERY),
+    step(CREATE_REVOKED_TOKENS_TABLE_QUERY, DROP_REVOKED_TOKENS_TABLE_QUERY),
+    step(CREATE_REVOKED_TOKENS_REVOKED_AT_INDEX_QUERY),
+]
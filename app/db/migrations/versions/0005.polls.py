@@ -0,0 +1,18 @@
+from yoyo import step
+
+from app.db.queries.tables import (CREATE_POLL_OPTIONS_TABLE_QUERY,
+                                   CREATE_POLLS_TABLE_QUERY,
+                                   CREATE_VOTES_OPTION_INDEX_QUERY,
+                                   CREATE_VOTES_TABLE_QUERY,
+                                   DROP_POLL_OPTIONS_TABLE_QUERY,
+                                   DROP_POLLS_TABLE_QUERY,
+                                   DROP_VOTES_TABLE_QUERY)
+
+__depends__ = {"0004.refresh-tokens"}
+
+steps = [
+    step(CREATE_POLLS_TABLE_QUERY, DROP_POLLS_TABLE_QUERY),
+    step(CREATE_POLL_OPTIONS_TABLE_QUERY, DROP_POLL_OPTIONS_TABLE_QUERY),
+    step(CREATE_VOTES_TABLE_QUERY, DROP_VOTES_TABLE_QUERY),
+    step(CREATE_VOTES_OPTION_INDEX_QUERY),
+]
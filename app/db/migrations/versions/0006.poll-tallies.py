@@ -0,0 +1,16 @@
+from yoyo import step
+
+from app.db.queries.tables import (CREATE_POLL_OPTION_TALLIES_POLL_INDEX_QUERY,
+                                   CREATE_POLL_OPTION_TALLIES_TABLE_QUERY,
+                                   DROP_POLL_OPTION_TALLIES_TABLE_QUERY,
+                                   FILL_POLL_OPTION_TALLIES_QUERY)
+
+__depends__ = {"0005.polls"}
+
+steps = [
+    step(
+        CREATE_POLL_OPTION_TALLIES_TABLE_QUERY, DROP_POLL_OPTION_TALLIES_TABLE_QUERY
+    ),
+    step(CREATE_POLL_OPTION_TALLIES_POLL_INDEX_QUERY),
+    step(FILL_POLL_OPTION_TALLIES_QUERY),
+]
@@ -0,0 +1,27 @@
+from yoyo import step
+
+from app.db.queries.tables import (CREATE_PG_TRGM_EXTENSION_QUERY,
+                                   CREATE_USERS_EMAIL_PATTERN_INDEX_QUERY,
+                                   CREATE_USERS_EMAIL_TRGM_INDEX_QUERY,
+                                   CREATE_USERS_USERNAME_PATTERN_INDEX_QUERY,
+                                   CREATE_USERS_USERNAME_TRGM_INDEX_QUERY,
+                                   DROP_USERS_EMAIL_PATTERN_INDEX_QUERY,
+                                   DROP_USERS_EMAIL_TRGM_INDEX_QUERY,
+                                   DROP_USERS_USERNAME_PATTERN_INDEX_QUERY,
+                                   DROP_USERS_USERNAME_TRGM_INDEX_QUERY)
+
+__depends__ = {"0006.poll-tallies"}
+
+steps = [
+    # the extension may be shared with other schemas, it is never dropped
+    step(CREATE_PG_TRGM_EXTENSION_QUERY),
+    step(
+        CREATE_USERS_USERNAME_PATTERN_INDEX_QUERY,
+        DROP_USERS_USERNAME_PATTERN_INDEX_QUERY,
+    ),
+    step(CREATE_USERS_EMAIL_PATTERN_INDEX_QUERY, DROP_USERS_EMAIL_PATTERN_INDEX_QUERY),
+    step(
+        CREATE_USERS_USERNAME_TRGM_INDEX_QUERY, DROP_USERS_USERNAME_TRGM_INDEX_QUERY
+    ),
+    step(CREATE_USERS_EMAIL_TRGM_INDEX_QUERY, DROP_USERS_EMAIL_TRGM_INDEX_QUERY),
+]
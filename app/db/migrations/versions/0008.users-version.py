@@ -0,0 +1,8 @@
+from yoyo import step
+
+from app.db.queries.tables import (ADD_USERS_VERSION_COLUMN_QUERY,
+                                   DROP_USERS_VERSION_COLUMN_QUERY)
+
+__depends__ = {"0007.users-search"}
+
+steps = [step(ADD_USERS_VERSION_COLUMN_QUERY, DROP_USERS_VERSION_COLUMN_QUERY)]
@@ -0,0 +1,28 @@
+from yoyo import step
+
+from app.db.queries.tables import (CREATE_USERS_EMAIL_TRGM_GIST_INDEX_QUERY,
+                                   CREATE_USERS_EMAIL_TRGM_INDEX_QUERY,
+                                   CREATE_USERS_USERNAME_TRGM_GIST_INDEX_QUERY,
+                                   CREATE_USERS_USERNAME_TRGM_INDEX_QUERY,
+                                   DROP_USERS_EMAIL_TRGM_GIST_INDEX_QUERY,
+                                   DROP_USERS_EMAIL_TRGM_INDEX_QUERY,
+                                   DROP_USERS_USERNAME_TRGM_GIST_INDEX_QUERY,
+                                   DROP_USERS_USERNAME_TRGM_INDEX_QUERY)
+
+__depends__ = {"0008.users-version"}
+
+steps = [
+    step(
+        CREATE_USERS_USERNAME_TRGM_GIST_INDEX_QUERY,
+        DROP_USERS_USERNAME_TRGM_GIST_INDEX_QUERY,
+    ),
+    step(
+        CREATE_USERS_EMAIL_TRGM_GIST_INDEX_QUERY,
+        DROP_USERS_EMAIL_TRGM_GIST_INDEX_QUERY,
+    ),
+    # the GiST indexes serve every search the GIN ones did
+    step(
+        DROP_USERS_USERNAME_TRGM_INDEX_QUERY, CREATE_USERS_USERNAME_TRGM_INDEX_QUERY
+    ),
+    step(DROP_USERS_EMAIL_TRGM_INDEX_QUERY, CREATE_USERS_EMAIL_TRGM_INDEX_QUERY),
+]
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from asyncpg.connection import Connection
+from asyncpg.pool import Pool
+
+from app.core.config import DB_POOL_ACQUIRE_TIMEOUT
+from app.db.errors.database import DatabaseUnavailableError
+from app.services import metrics, timing
+
+_in_use = 0
+_waiters = 0
+
+_acquire_latency = metrics.histogram(
+    "db_pool_acquire_seconds", "Time spent waiting for a pooled connection"
+)
+_acquire_timeouts = metrics.counter(
+    "db_pool_acquire_timeouts_total", "Pool acquires that hit DB_POOL_ACQUIRE_TIMEOUT"
+)
+
+
+def register_pool_metrics(pool: Pool) -> None:
+    metrics.gauge("db_pool_size", "Open pooled connections", lambda: pool_size(pool))
+    metrics.gauge("db_pool_in_use", "Pooled connections in use", lambda: _in_use)
+    metrics.gauge(
+        "db_pool_idle",
+        "Open pooled connections not in use",
+        lambda: max(0, pool_size(pool) - _in_use),
+    )
+    metrics.gauge("db_pool_waiters", "Requests waiting for a connection", lambda: _waiters)
+
+
+def pool_size(pool: Pool) -> int:
+    if hasattr(pool, "get_size"):
+        return pool.get_size()
+
+    # asyncpg < 0.25 has no public API for it
+    return sum(holder._con is not None for holder in pool._holders)
+
+
+@asynccontextmanager
+async def acquire_connection(pool: Pool) -> AsyncIterator[Connection]:
+    global _in_use, _waiters
+
+    _waiters += 1
+    started_at = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError as timeout_error:
+        _acquire_timeouts.inc()
+        raise DatabaseUnavailableError from timeout_error
+    finally:
+        _waiters -= 1
+        acquire_seconds = time.perf_counter() - started_at
+        _acquire_latency.observe(acquire_seconds)
+        timing.record("db_acquire", acquire_seconds)
+
+    _in_use += 1
+    try:
+        yield conn
+    finally:
+        _in_use -= 1
+        await pool.release(conn)
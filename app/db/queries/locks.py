@@ -0,0 +1,20 @@
+TRY_ADVISORY_LOCK_QUERY = """
+SELECT pg_try_advisory_lock($1)
+"""
+
+ADVISORY_LOCK_QUERY = """
+SELECT pg_advisory_lock($1)
+"""
+
+ADVISORY_UNLOCK_QUERY = """
+SELECT pg_advisory_unlock($1)
+"""
+
+TRY_ADVISORY_XACT_LOCK_QUERY = """
+SELECT pg_try_advisory_xact_lock($1)
+"""
+
+# SET LOCAL does not take parameters, the value is in milliseconds
+SET_LOCAL_STATEMENT_TIMEOUT_QUERY = """
+SELECT set_config('statement_timeout', $1, true)
+"""
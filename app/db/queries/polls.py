@@ -0,0 +1,100 @@
+CREATE_POLL = """
+WITH poll AS (
+    INSERT INTO polls (author_id, question, closes_at)
+    VALUES ($1, $2, $3)
+    RETURNING id, author_id, question, created_at, closes_at
+), options AS (
+    INSERT INTO poll_options (poll_id, position, text)
+    SELECT poll.id, option.position, option.text
+    FROM poll, unnest($4::text[]) WITH ORDINALITY AS option (text, position)
+    RETURNING id, position, text
+)
+SELECT poll.id, poll.question, poll.created_at, poll.closes_at,
+    (SELECT username FROM users WHERE id = poll.author_id) AS author,
+    (SELECT json_agg(json_build_object('id', id, 'text', text) ORDER BY position) FROM options) AS options
+FROM poll
+"""
+
+GET_POLL = """
+SELECT polls.id, polls.question, polls.created_at, polls.closes_at, users.username AS author,
+    (
+        SELECT json_agg(json_build_object('id', id, 'text', text) ORDER BY position)
+        FROM poll_options WHERE poll_id = polls.id
+    ) AS options
+FROM polls JOIN users ON users.id = polls.author_id
+WHERE polls.id = $1
+"""
+
+# workers LISTEN on it to stream results, the payload is a poll id
+POLL_VOTES_CHANNEL = "poll_votes"
+
+# options of another poll are dropped by the join, duplicates by the key;
+# only new votes are added to the tallies, in the shard of this backend.
+# Polls with new votes are notified in the same statement, so the notices
+# go out exactly when the votes commit; pg_notify is volatile, which keeps
+# the notified CTE from being optimized away
+INSERT_VOTES = f"""
+WITH inserted AS (
+    INSERT INTO votes (poll_id, user_id, option_id)
+    SELECT vote.poll_id, vote.user_id, vote.option_id
+    FROM unnest($1::int[], $2::int[], $3::int[]) AS vote (poll_id, user_id, option_id)
+    JOIN poll_options ON poll_options.id = vote.option_id AND poll_options.poll_id = vote.poll_id
+    ON CONFLICT (poll_id, user_id) DO NOTHING
+    RETURNING poll_id, option_id
+), tallied AS (
+    INSERT INTO poll_option_tallies AS tallies (option_id, shard, poll_id, votes)
+    SELECT option_id, pg_backend_pid() % $4::int, poll_id, count(*)
+    FROM inserted
+    GROUP BY poll_id, option_id
+    ORDER BY option_id
+    ON CONFLICT (option_id, shard) DO UPDATE SET votes = tallies.votes + EXCLUDED.votes
+), voted AS (
+    SELECT poll_id, count(*) AS votes FROM inserted GROUP BY poll_id
+), notified AS (
+    SELECT poll_id, votes, pg_notify('{POLL_VOTES_CHANNEL}', poll_id::text) FROM voted
+)
+SELECT poll_id, votes FROM notified
+"""
+
+GET_POLLS_RESULTS = """
+SELECT poll_id, option_id, sum(votes)::bigint AS votes
+FROM poll_option_tallies
+WHERE poll_id = ANY($1::int[])
+GROUP BY poll_id, option_id
+"""
+
+# next batch of polls after $1 and whether each one could be locked, the
+# lock is taken before RECONCILE_POLL_TALLIES so it counts from a snapshot
+# that includes what another worker fixed before releasing it
+LOCK_POLLS_BATCH_QUERY = """
+SELECT id, pg_try_advisory_xact_lock($3, id) AS locked
+FROM (SELECT id FROM polls WHERE id > $1 ORDER BY id LIMIT $2) AS batch
+ORDER BY id
+"""
+
+# votes and tallies of a flush commit together, so the drift seen in one
+# snapshot is still right when added to shard 0 after more flushes; returns
+# what was fixed
+RECONCILE_POLL_TALLIES = """
+WITH counted AS (
+    SELECT poll_id, option_id, count(*) AS votes
+    FROM votes
+    WHERE poll_id = ANY($1::int[])
+    GROUP BY poll_id, option_id
+), tallied AS (
+    SELECT poll_id, option_id, sum(votes)::bigint AS votes
+    FROM poll_option_tallies
+    WHERE poll_id = ANY($1::int[])
+    GROUP BY poll_id, option_id
+), drifted AS (
+    SELECT poll_id, option_id, coalesce(counted.votes, 0) AS votes, coalesce(tallied.votes, 0) AS tallied_votes
+    FROM counted FULL JOIN tallied USING (poll_id, option_id)
+    WHERE coalesce(counted.votes, 0) <> coalesce(tallied.votes, 0)
+), fixed AS (
+    INSERT INTO poll_option_tallies AS tallies (option_id, shard, poll_id, votes)
+    SELECT option_id, 0, poll_id, votes - tallied_votes FROM drifted
+    ORDER BY option_id
+    ON CONFLICT (option_id, shard) DO UPDATE SET votes = tallies.votes + EXCLUDED.votes
+)
+SELECT poll_id, option_id, votes, tallied_votes FROM drifted
+"""
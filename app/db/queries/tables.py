@@ -10,3 +10,261 @@ CREATE TABLE users(
     is_super BOOL,
     is_staff BOOL
 )"""
+
+# run before a unique index is created on existing rows, so a failing
+# migration names the users to merge or rename instead of a bare
+# "could not create unique index"
+_CHECK_USERS_UNIQUE_QUERY = """
+DO $$
+DECLARE
+    duplicates TEXT;
+BEGIN
+    SELECT string_agg(format('%s (user ids %s)', value, ids), '; ' ORDER BY value)
+    INTO duplicates
+    FROM (
+        SELECT {expression} AS value, string_agg(id::text, ', ' ORDER BY id) AS ids
+        FROM users
+        WHERE {expression} IS NOT NULL
+        GROUP BY {expression}
+        HAVING count(*) > 1
+        ORDER BY value
+        LIMIT 50
+    ) AS duplicated;
+    IF duplicates IS NOT NULL THEN
+        RAISE EXCEPTION 'users share {what}: %', duplicates
+            USING HINT = 'rename or merge these users, then run the migrations again';
+    END IF;
+END
+$$
+"""
+
+CHECK_USERS_USERNAME_UNIQUE_QUERY = _CHECK_USERS_UNIQUE_QUERY.format(
+    expression="username", what="a username"
+)
+
+CHECK_USERS_EMAIL_UNIQUE_QUERY = _CHECK_USERS_UNIQUE_QUERY.format(
+    expression="email", what="an email"
+)
+
+CHECK_USERS_USERNAME_LOWER_UNIQUE_QUERY = _CHECK_USERS_UNIQUE_QUERY.format(
+    expression="lower(username)", what="a username in different case"
+)
+
+CHECK_USERS_EMAIL_NORMALIZED_UNIQUE_QUERY = _CHECK_USERS_UNIQUE_QUERY.format(
+    expression="email_normalized", what="an email in different case or spacing"
+)
+
+CREATE_USERS_USERNAME_UNIQUE_INDEX_QUERY = """
+CREATE UNIQUE INDEX users_username_key ON users (username)
+"""
+
+DROP_USERS_USERNAME_UNIQUE_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_username_key
+"""
+
+CREATE_USERS_EMAIL_UNIQUE_INDEX_QUERY = """
+CREATE UNIQUE INDEX users_email_key ON users (email)
+"""
+
+DROP_USERS_EMAIL_UNIQUE_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_email_key
+"""
+
+ADD_USERS_EMAIL_NORMALIZED_COLUMN_QUERY = """
+ALTER TABLE users ADD COLUMN email_normalized TEXT
+"""
+
+DROP_USERS_EMAIL_NORMALIZED_COLUMN_QUERY = """
+ALTER TABLE users DROP COLUMN IF EXISTS email_normalized
+"""
+
+FILL_USERS_EMAIL_NORMALIZED_COLUMN_QUERY = """
+UPDATE users SET email_normalized = lower(trim(email))
+"""
+
+CREATE_USERS_USERNAME_LOWER_UNIQUE_INDEX_QUERY = """
+CREATE UNIQUE INDEX users_username_lower_key ON users (lower(username))
+"""
+
+DROP_USERS_USERNAME_LOWER_UNIQUE_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_username_lower_key
+"""
+
+CREATE_USERS_EMAIL_NORMALIZED_UNIQUE_INDEX_QUERY = """
+CREATE UNIQUE INDEX users_email_normalized_key ON users (email_normalized)
+"""
+
+DROP_USERS_EMAIL_NORMALIZED_UNIQUE_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_email_normalized_key
+"""
+
+CREATE_REFRESH_TOKENS_TABLE_QUERY = """
+CREATE TABLE refresh_tokens(
+    id TEXT PRIMARY KEY,
+    token_hash TEXT NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    family_id TEXT NOT NULL,
+    access_jti TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    used_at TIMESTAMPTZ,
+    revoked_at TIMESTAMPTZ
+)"""
+
+DROP_REFRESH_TOKENS_TABLE_QUERY = """
+DROP TABLE IF EXISTS refresh_tokens
+"""
+
+CREATE_REFRESH_TOKENS_FAMILY_INDEX_QUERY = """
+CREATE INDEX refresh_tokens_family_id_idx ON refresh_tokens (family_id)
+"""
+
+CREATE_REFRESH_TOKENS_EXPIRES_AT_INDEX_QUERY = """
+CREATE INDEX refresh_tokens_expires_at_idx ON refresh_tokens (expires_at)
+"""
+
+CREATE_REVOKED_TOKENS_TABLE_QUERY = """
+CREATE TABLE revoked_tokens(
+    jti TEXT PRIMARY KEY,
+    expires_at TIMESTAMPTZ NOT NULL,
+    revoked_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+)"""
+
+DROP_REVOKED_TOKENS_TABLE_QUERY = """
+DROP TABLE IF EXISTS revoked_tokens
+"""
+
+CREATE_REVOKED_TOKENS_REVOKED_AT_INDEX_QUERY = """
+CREATE INDEX revoked_tokens_revoked_at_idx ON revoked_tokens (revoked_at)
+"""
+
+CREATE_POLLS_TABLE_QUERY = """
+CREATE TABLE polls(
+    id serial PRIMARY KEY,
+    author_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    question TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    closes_at TIMESTAMPTZ
+)"""
+
+DROP_POLLS_TABLE_QUERY = """
+DROP TABLE IF EXISTS polls
+"""
+
+CREATE_POLL_OPTIONS_TABLE_QUERY = """
+CREATE TABLE poll_options(
+    id serial PRIMARY KEY,
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    position SMALLINT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (poll_id, position)
+)"""
+
+DROP_POLL_OPTIONS_TABLE_QUERY = """
+DROP TABLE IF EXISTS poll_options
+"""
+
+CREATE_VOTES_TABLE_QUERY = """
+CREATE TABLE votes(
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    option_id INTEGER NOT NULL REFERENCES poll_options (id) ON DELETE CASCADE,
+    voted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (poll_id, user_id)
+)"""
+
+DROP_VOTES_TABLE_QUERY = """
+DROP TABLE IF EXISTS votes
+"""
+
+CREATE_VOTES_OPTION_INDEX_QUERY = """
+CREATE INDEX votes_option_id_idx ON votes (option_id)
+"""
+
+# votes per option split over a few rows, so concurrent flushes do not
+# queue up on one hot row; a poll's results are the sums per option
+CREATE_POLL_OPTION_TALLIES_TABLE_QUERY = """
+CREATE TABLE poll_option_tallies(
+    option_id INTEGER NOT NULL REFERENCES poll_options (id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    votes BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (option_id, shard)
+)"""
+
+DROP_POLL_OPTION_TALLIES_TABLE_QUERY = """
+DROP TABLE IF EXISTS poll_option_tallies
+"""
+
+CREATE_POLL_OPTION_TALLIES_POLL_INDEX_QUERY = """
+CREATE INDEX poll_option_tallies_poll_id_idx ON poll_option_tallies (poll_id)
+"""
+
+FILL_POLL_OPTION_TALLIES_QUERY = """
+INSERT INTO poll_option_tallies (option_id, shard, poll_id, votes)
+SELECT option_id, 0, poll_id, count(*) FROM votes GROUP BY poll_id, option_id
+"""
+
+CREATE_PG_TRGM_EXTENSION_QUERY = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm
+"""
+
+# pattern_ops indexes serve prefix ranges (~>=~, ~<~) in any collation,
+# trigram indexes serve fuzzy matches (%)
+CREATE_USERS_USERNAME_PATTERN_INDEX_QUERY = """
+CREATE INDEX users_username_pattern_idx ON users (lower(username) text_pattern_ops)
+"""
+
+DROP_USERS_USERNAME_PATTERN_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_username_pattern_idx
+"""
+
+CREATE_USERS_EMAIL_PATTERN_INDEX_QUERY = """
+CREATE INDEX users_email_normalized_pattern_idx ON users (email_normalized text_pattern_ops)
+"""
+
+DROP_USERS_EMAIL_PATTERN_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_email_normalized_pattern_idx
+"""
+
+CREATE_USERS_USERNAME_TRGM_INDEX_QUERY = """
+CREATE INDEX users_username_trgm_idx ON users USING gin (lower(username) gin_trgm_ops)
+"""
+
+DROP_USERS_USERNAME_TRGM_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_username_trgm_idx
+"""
+
+CREATE_USERS_EMAIL_TRGM_INDEX_QUERY = """
+CREATE INDEX users_email_normalized_trgm_idx ON users USING gin (email_normalized gin_trgm_ops)
+"""
+
+DROP_USERS_EMAIL_TRGM_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_email_normalized_trgm_idx
+"""
+
+# GiST trigram indexes serve % as well, and also return rows ordered by
+# distance (<->), which the GIN ones above can not
+CREATE_USERS_USERNAME_TRGM_GIST_INDEX_QUERY = """
+CREATE INDEX users_username_trgm_gist_idx ON users USING gist (lower(username) gist_trgm_ops)
+"""
+
+DROP_USERS_USERNAME_TRGM_GIST_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_username_trgm_gist_idx
+"""
+
+CREATE_USERS_EMAIL_TRGM_GIST_INDEX_QUERY = """
+CREATE INDEX users_email_normalized_trgm_gist_idx ON users USING gist (email_normalized gist_trgm_ops)
+"""
+
+DROP_USERS_EMAIL_TRGM_GIST_INDEX_QUERY = """
+DROP INDEX IF EXISTS users_email_normalized_trgm_gist_idx
+"""
+
+ADD_USERS_VERSION_COLUMN_QUERY = """
+ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 0
+"""
+
+DROP_USERS_VERSION_COLUMN_QUERY = """
+ALTER TABLE users DROP COLUMN IF EXISTS version
+"""
@@ -0,0 +1,57 @@
+CREATE_REFRESH_TOKEN = """
+INSERT INTO refresh_tokens (id, token_hash, user_id, family_id, access_jti, expires_at)
+VALUES ($1, $2, $3, $4, $5, $6)
+"""
+
+# marks the token used and issues its successor in the same family
+ROTATE_REFRESH_TOKEN = """
+WITH used AS (
+    UPDATE refresh_tokens SET used_at = now()
+    WHERE id = $1 AND token_hash = $2
+        AND used_at IS NULL AND revoked_at IS NULL AND expires_at > now()
+    RETURNING user_id, family_id
+), created AS (
+    INSERT INTO refresh_tokens (id, token_hash, user_id, family_id, access_jti, expires_at)
+    SELECT $3::text, $4::text, used.user_id, used.family_id, $5::text, $6::timestamptz FROM used
+)
+SELECT users.id, users.username, users.email, users.hashed_password, users.bio, users.image
+FROM used JOIN users ON users.id = used.user_id
+"""
+
+# revokes the whole family and the access tokens issued with it,
+# with $4 only when the token was already used (a replayed token)
+REVOKE_REFRESH_TOKEN_FAMILY = """
+WITH family AS (
+    SELECT family_id FROM refresh_tokens
+    WHERE id = $1 AND token_hash = $2 AND (NOT $4::bool OR used_at IS NOT NULL)
+), revoked AS (
+    UPDATE refresh_tokens SET revoked_at = now()
+    WHERE family_id IN (SELECT family_id FROM family) AND revoked_at IS NULL
+    RETURNING access_jti, created_at
+)
+INSERT INTO revoked_tokens (jti, expires_at)
+SELECT access_jti, created_at + $3::interval FROM revoked
+ON CONFLICT (jti) DO NOTHING
+RETURNING jti
+"""
+
+REVOKE_ACCESS_TOKEN = """
+INSERT INTO revoked_tokens (jti, expires_at) VALUES ($1, $2)
+ON CONFLICT (jti) DO NOTHING
+"""
+
+IS_TOKEN_REVOKED = """
+SELECT EXISTS (SELECT 1 FROM revoked_tokens WHERE jti = $1)
+"""
+
+GET_REVOKED_TOKENS_SINCE = """
+SELECT jti, revoked_at FROM revoked_tokens
+WHERE revoked_at > $1 AND expires_at > now()
+"""
+
+PURGE_EXPIRED_TOKENS = """
+WITH expired_revocations AS (
+    DELETE FROM revoked_tokens WHERE expires_at < now()
+)
+DELETE FROM refresh_tokens WHERE expires_at < now()
+"""
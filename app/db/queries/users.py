@@ -1,15 +1,121 @@
 CREATE_USER_QUERY = """
-INSERT INTO users (username, email, hashed_password, bio, image, is_active, is_super, is_staff) VALUES($1, $2, $3, $4, $5, $6, $7, $8)
+WITH taken AS (
+    SELECT CASE WHEN lower(username) = lower($1) THEN 'username' ELSE 'email' END AS conflict
+    FROM users
+    WHERE lower(username) = lower($1) OR email_normalized = $9
+    ORDER BY lower(username) = lower($1) DESC
+    LIMIT 1
+), created AS (
+    INSERT INTO users (username, email, email_normalized, hashed_password, bio, image, is_active, is_super, is_staff)
+    SELECT $1::varchar, $2::text, $9::text, $3::text, $4::text, $5::varchar, $6::bool, $7::bool, $8::bool
+    WHERE NOT EXISTS (SELECT 1 FROM taken)
+    RETURNING id, username, email, hashed_password, bio, image, is_active, is_super, is_staff, version
+)
+SELECT (SELECT conflict FROM taken) AS conflict, created.* FROM (SELECT 1) AS single LEFT JOIN created ON TRUE
 """
 
 GET_USER_BY_USERNAME = """
-SELECT id, username, email, hashed_password, bio, image FROM users WHERE username=$1
+SELECT id, username, email, hashed_password, bio, image, is_active, is_super, is_staff, version FROM users WHERE lower(username)=lower($1)
 """
 
 GET_USER_BY_EMAIL = """
-SELECT id, username, email, hashed_password, bio, image FROM users WHERE email=$1
+SELECT id, username, email, hashed_password, bio, image, is_active, is_super, is_staff, version FROM users WHERE email_normalized=$1
 """
 
+GET_USER_BY_LOGIN = """
+SELECT id, username, email, hashed_password, bio, image, is_active, is_super, is_staff, version FROM users
+WHERE lower(username)=lower($1) OR email_normalized=$2
+ORDER BY lower(username)=lower($1) DESC
+LIMIT 1
+"""
+
+# NULL keeps a column as is, only the user as loaded ($1 id, $2 version) is
+# updated; no row is returned if it changed since
 UPDATE_USER = """
-UPDATE users SET username=$2, email=$3, hashed_password=$4, bio=$5, image=$6 WHERE username=$1
+UPDATE users SET
+    username = COALESCE($3, username),
+    email = COALESCE($4, email),
+    email_normalized = COALESCE($5, email_normalized),
+    hashed_password = COALESCE($6, hashed_password),
+    bio = COALESCE($7, bio),
+    image = COALESCE($8, image),
+    version = version + 1
+WHERE id = $1 AND version = $2
+RETURNING id, username, email, hashed_password, bio, image, is_active, is_super, is_staff, version
+"""
+
+# keyset pages: a page starts after the key of the previous one, so it
+# costs the same however deep it is. Prefixes are given as the range
+# [$1, $2) with pattern operators, a LIKE pattern parameter would not
+# use the pattern_ops index with a generic plan.
+_SEARCH_USERS_BY_PREFIX = """
+SELECT id, username, email, bio, image, {key} AS key FROM users
+WHERE {key} ~>=~ $1 AND {key} ~<~ $2 AND {key} ~>~ $3
+ORDER BY {key} USING ~<~
+LIMIT $4
+"""
+
+# best matches first, ties by key; the first page passes NULL as $2.
+# Only the $5 nearest matches are ranked, read in distance order from the
+# GiST index (KNN), so a page costs the same however many rows match
+_SEARCH_USERS_BY_SIMILARITY = """
+WITH matches AS (
+    SELECT id, username, email, bio, image, {key} AS key
+    FROM users
+    WHERE {key} % $1
+    ORDER BY {key} <-> $1
+    LIMIT $5
+), ranked AS (
+    SELECT id, username, email, bio, image, key, similarity(key, $1) AS rank FROM matches
+)
+SELECT id, username, email, bio, image, key, rank FROM ranked
+WHERE $2::real IS NULL OR rank < $2::real OR (rank = $2::real AND key > $3)
+ORDER BY rank DESC, key
+LIMIT $4
+"""
+
+SEARCH_USERS_BY_USERNAME_PREFIX = _SEARCH_USERS_BY_PREFIX.format(key="lower(username)")
+SEARCH_USERS_BY_EMAIL_PREFIX = _SEARCH_USERS_BY_PREFIX.format(key="email_normalized")
+SEARCH_USERS_BY_USERNAME_SIMILARITY = _SEARCH_USERS_BY_SIMILARITY.format(
+    key="lower(username)"
+)
+SEARCH_USERS_BY_EMAIL_SIMILARITY = _SEARCH_USERS_BY_SIMILARITY.format(
+    key="email_normalized"
+)
+
+# bulk import goes through a staging table of the importing transaction,
+# filled with COPY, so these are not prepared ahead like other statements
+CREATE_USERS_IMPORT_TABLE = """
+CREATE TEMPORARY TABLE users_import(
+    line INTEGER NOT NULL,
+    username VARCHAR(24) NOT NULL,
+    email TEXT NOT NULL,
+    hashed_password TEXT NOT NULL,
+    bio TEXT NOT NULL,
+    image VARCHAR
+) ON COMMIT DROP
+"""
+
+USERS_IMPORT_COLUMNS = ("line", "username", "email", "hashed_password", "bio", "image")
+
+# rows taken by an existing user or by an earlier row are skipped and
+# returned as conflicts
+IMPORT_USERS_FROM_STAGING = """
+WITH imported AS (
+    INSERT INTO users (username, email, email_normalized, hashed_password, bio, image, is_active, is_super, is_staff)
+    SELECT username, email, lower(trim(email)), hashed_password, bio, image, TRUE, FALSE, FALSE
+    FROM users_import
+    ORDER BY line
+    ON CONFLICT DO NOTHING
+    RETURNING username
+)
+SELECT line, username, email FROM users_import
+WHERE username NOT IN (SELECT username FROM imported)
+ORDER BY line
+"""
+
+EXPORT_USERS = """
+SELECT id, username, email, hashed_password, bio, image, is_active, is_super, is_staff
+FROM users
+ORDER BY id
 """
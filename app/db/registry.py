@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Mapping, Optional
+from weakref import WeakKeyDictionary
+
+from asyncpg import Record
+from asyncpg.connection import Connection
+from asyncpg.exceptions import InvalidCachedStatementError, PostgresError
+from asyncpg.pool import PoolConnectionProxy
+from asyncpg.prepared_stmt import PreparedStatement
+from loguru import logger
+
+_Statements = Dict[str, PreparedStatement]
+
+
+class QueryRegistry:
+    """Named SQL statements prepared once per database connection.
+
+    ``prepare_all`` is meant to be the pool ``init`` hook, statements that
+    can not be prepared there (e.g. before migrations) are prepared lazily.
+    """
+
+    def __init__(self) -> None:
+        self._queries: Dict[str, str] = {}
+        self._prepared: "WeakKeyDictionary[Connection, _Statements]" = (
+            WeakKeyDictionary()
+        )
+
+    @property
+    def queries(self) -> Mapping[str, str]:
+        return dict(self._queries)
+
+    def register(self, name: str, query: str) -> str:
+        if self._queries.get(name, query) != query:
+            raise ValueError(f"query {name} is already registered")
+
+        self._queries[name] = query
+        return name
+
+    async def prepare_all(self, conn: Connection) -> None:
+        statements = self._statements_of(conn)
+        for name, query in self._queries.items():
+            try:
+                statements[name] = await conn.prepare(query)
+            except PostgresError as prepare_error:
+                logger.warning(
+                    "Query {0} will be prepared on first use: {1}", name, prepare_error
+                )
+
+    async def statement(self, conn: Connection, name: str) -> PreparedStatement:
+        """Prepared statement, e.g. to open a server-side cursor with it"""
+        statements = self._statements_of(conn)
+        statement = statements.get(name)
+        if statement is None:
+            statement = statements[name] = await conn.prepare(self._queries[name])
+
+        return statement
+
+    async def fetch(
+        self, conn: Connection, name: str, *args: Any, timeout: Optional[float] = None
+    ) -> List[Record]:
+        return await self._run(conn, name, "fetch", *args, timeout=timeout)
+
+    async def fetchrow(
+        self, conn: Connection, name: str, *args: Any, timeout: Optional[float] = None
+    ) -> Optional[Record]:
+        return await self._run(conn, name, "fetchrow", *args, timeout=timeout)
+
+    async def fetchval(
+        self, conn: Connection, name: str, *args: Any, timeout: Optional[float] = None
+    ) -> Any:
+        return await self._run(conn, name, "fetchval", *args, timeout=timeout)
+
+    async def _run(
+        self,
+        conn: Connection,
+        name: str,
+        method: str,
+        *args: Any,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        statement = await self.statement(conn, name)
+        try:
+            return await getattr(statement, method)(*args, timeout=timeout)
+        except InvalidCachedStatementError:
+            # schema changed since the statement was prepared (e.g. migration)
+            statement = await conn.prepare(self._queries[name])
+            self._statements_of(conn)[name] = statement
+            return await getattr(statement, method)(*args, timeout=timeout)
+
+    def _statements_of(self, conn: Connection) -> _Statements:
+        if isinstance(conn, PoolConnectionProxy):
+            # statements belong to the real connection, proxies are per acquire
+            conn = conn._con
+
+        return self._prepared.setdefault(conn, {})
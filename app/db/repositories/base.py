@@ -1,10 +1,48 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Union
+
+from asyncpg import Record
 from asyncpg.connection import Connection
+from asyncpg.pool import Pool
+
+from app.db.pool import acquire_connection
+from app.db.statements import registry
+from app.services import timing
 
 
 class BaseRepository:
-    def __init__(self, conn: Connection) -> None:
+    """Repository over a single connection or a pool.
+
+    With a pool, a connection is acquired per statement only, so work
+    between queries (hashing, JWT) does not pin a pooled connection.
+    """
+
+    def __init__(self, conn: Union[Connection, Pool]) -> None:
         self._conn = conn
 
     @property
-    def connection(self) -> Connection:
+    def connection(self) -> Union[Connection, Pool]:
         return self._conn
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[Connection]:
+        if isinstance(self._conn, Pool):
+            async with acquire_connection(self._conn) as conn:
+                yield conn
+        else:
+            yield self._conn
+
+    async def _fetch(self, statement: str, *args: Any) -> List[Record]:
+        async with self._acquire() as conn:
+            with timing.span("db"):
+                return await registry.fetch(conn, statement, *args)
+
+    async def _fetchrow(self, statement: str, *args: Any) -> Optional[Record]:
+        async with self._acquire() as conn:
+            with timing.span("db"):
+                return await registry.fetchrow(conn, statement, *args)
+
+    async def _fetchval(self, statement: str, *args: Any) -> Any:
+        async with self._acquire() as conn:
+            with timing.span("db"):
+                return await registry.fetchval(conn, statement, *args)
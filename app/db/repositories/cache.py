@@ -0,0 +1,136 @@
+import json
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import (CACHE_BACKEND, CACHE_MAX_ENTRIES,
+                             CACHE_NEGATIVE_TTL_SECONDS, CACHE_TTL_SECONDS,
+                             CACHE_URL)
+from app.db.cache.base import CacheBackend, CacheError
+from app.db.cache.memory import InMemoryCacheBackend
+from app.db.cache.resp import RespCacheBackend
+from app.services import metrics, timing
+
+Row = Dict[str, Any]
+
+_MISSING = b""
+
+
+class CacheLookup(NamedTuple):
+    key: str
+    found: bool
+    row: Optional[Row]
+
+
+class CacheAside:
+    """Cache-aside helper with negative caching, one key per lookup.
+
+    Writers ``invalidate`` the lookups their change affects, including
+    cached "does not exist" results of new values. A read that started
+    before a write may still store the old row, it lives until its TTL.
+    """
+
+    def __init__(
+        self, namespace: str, backend: CacheBackend, *, ttl: int, negative_ttl: int,
+    ) -> None:
+        self._namespace = namespace
+        self._backend = backend
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+
+        self.hits = metrics.counter(
+            f"{namespace}_cache_hits_total", f"Lookups of {namespace} served by cache"
+        )
+        self.negative_hits = metrics.counter(
+            f"{namespace}_cache_negative_hits_total",
+            f"Lookups of missing {namespace} served by cache",
+        )
+        self.misses = metrics.counter(
+            f"{namespace}_cache_misses_total", f"Lookups of {namespace} sent to db"
+        )
+        self.errors = metrics.counter(
+            f"{namespace}_cache_errors_total", f"Failed {namespace} cache operations"
+        )
+
+    @timing.timed("cache")
+    async def get(self, kind: str, value: str) -> Optional[CacheLookup]:
+        """Look ``value`` up, ``None`` means the cache is unavailable.
+
+        The returned lookup is passed back to ``set`` to fill a miss.
+        """
+        key = self._key(kind, value)
+        try:
+            cached = await self._backend.get(key)
+        except CacheError as cache_error:
+            self._on_error(cache_error)
+            return None
+
+        if cached is None:
+            self.misses.inc()
+            return CacheLookup(key, False, None)
+
+        if cached == _MISSING:
+            self.negative_hits.inc()
+            return CacheLookup(key, True, None)
+
+        self.hits.inc()
+        return CacheLookup(key, True, json.loads(cached))
+
+    @timing.timed("cache")
+    async def set(self, lookup: CacheLookup, row: Optional[Row]) -> None:
+        try:
+            if row is None:
+                await self._backend.set(lookup.key, _MISSING, self._negative_ttl)
+            else:
+                await self._backend.set(lookup.key, json.dumps(row).encode(), self._ttl)
+        except CacheError as cache_error:
+            self._on_error(cache_error)
+
+    async def put(self, kind: str, value: str, row: Row) -> None:
+        """Store ``row`` for ``(kind, value)`` without looking it up first"""
+        await self.set(CacheLookup(self._key(kind, value), False, None), row)
+
+    async def invalidate(self, lookups: Iterable[Tuple[str, str]]) -> None:
+        """Drop the entries of ``(kind, value)`` lookups, in one round trip"""
+        try:
+            await self._backend.delete(
+                *{self._key(kind, value) for kind, value in lookups}
+            )
+        except CacheError as cache_error:
+            self._on_error(cache_error)
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+    def _key(self, kind: str, value: str) -> str:
+        return f"{self._namespace}:{kind}:{value}"
+
+    def _on_error(self, cache_error: CacheError) -> None:
+        self.errors.inc()
+        logger.warning("{0} cache is unavailable: {1}", self._namespace, cache_error)
+
+
+def _create_backend() -> Optional[CacheBackend]:
+    if CACHE_BACKEND == "none":
+        return None
+
+    if CACHE_BACKEND == "memory":
+        return InMemoryCacheBackend(max_entries=CACHE_MAX_ENTRIES)
+
+    if CACHE_BACKEND == "redis":
+        return RespCacheBackend(str(CACHE_URL))
+
+    raise ValueError(f"unsupported cache backend: {CACHE_BACKEND}")
+
+
+def _create_cache(namespace: str) -> Optional[CacheAside]:
+    backend = _create_backend()
+    if backend is None:
+        return None
+
+    return CacheAside(
+        namespace, backend, ttl=CACHE_TTL_SECONDS, negative_ttl=CACHE_NEGATIVE_TTL_SECONDS
+    )
+
+
+users_cache = _create_cache("users")
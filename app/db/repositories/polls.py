@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from asyncpg import Record
+from asyncpg.connection import Connection
+from asyncpg.pool import Pool
+
+from app.core.config import (DB_COMMAND_TIMEOUT, DB_STATEMENT_TIMEOUT_MS,
+                             POLL_CACHE_MAX_SIZE, POLL_CACHE_TTL_SECONDS,
+                             POLL_RESULTS_CACHE_TTL_SECONDS, POLL_TALLY_SHARDS)
+from app.db.errors.users import EntityDoesNotExistError
+from app.db.queries.locks import SET_LOCAL_STATEMENT_TIMEOUT_QUERY
+from app.db.queries.polls import LOCK_POLLS_BATCH_QUERY
+from app.db.repositories.base import BaseRepository
+from app.db.statements import (CREATE_POLL, GET_POLL, GET_POLLS_RESULTS,
+                               INSERT_VOTES, RECONCILE_POLL_TALLIES, registry)
+from app.models.domain.polls import PollRecord, Vote
+from app.models.domain.users import UserRecord
+from app.services import timing
+from app.services.ttl_cache import TTLCache
+
+TALLIES_LOCK_ID = 7_046_312
+# the client gives up this much after the server, as it does for the pool
+_CLIENT_TIMEOUT_MARGIN = DB_COMMAND_TIMEOUT - DB_STATEMENT_TIMEOUT_MS / 1000
+
+# polls and their options never change once created
+polls_cache: TTLCache[PollRecord] = TTLCache(
+    max_size=POLL_CACHE_MAX_SIZE, ttl=POLL_CACHE_TTL_SECONDS
+)
+# results of popular polls are read far more often than a flush changes them
+poll_results_cache: TTLCache[Dict[int, int]] = TTLCache(
+    max_size=POLL_CACHE_MAX_SIZE, ttl=POLL_RESULTS_CACHE_TTL_SECONDS
+)
+
+
+class PollsRepository(BaseRepository):
+    def __init__(
+        self,
+        conn: Union[Connection, Pool],
+        cache: Optional[TTLCache[PollRecord]] = polls_cache,
+        results_cache: Optional[TTLCache[Dict[int, int]]] = poll_results_cache,
+    ) -> None:
+        super().__init__(conn)
+        self._cache = cache
+        self._results_cache = results_cache
+
+    async def create_poll(
+        self,
+        *,
+        author: UserRecord,
+        question: str,
+        options: List[str],
+        closes_at: Optional[datetime] = None,
+    ) -> PollRecord:
+        record = await self._fetchrow(
+            CREATE_POLL, author.id, question, closes_at, options
+        )
+        return PollRecord.from_row(record)
+
+    async def get_poll(self, *, poll_id: int) -> PollRecord:
+        poll = self._cache.get(poll_id) if self._cache is not None else None
+        if poll is not None:
+            return poll
+
+        record = await self._fetchrow(GET_POLL, poll_id)
+        if record is None:
+            raise EntityDoesNotExistError(f"poll with id {poll_id} does not exist")
+
+        poll = PollRecord.from_row(record)
+        if self._cache is not None:
+            self._cache.set(poll_id, poll)
+
+        return poll
+
+    async def insert_votes(self, votes: Sequence[Vote]) -> int:
+        """Store votes and add them to the tallies, returns how many were new.
+
+        Votes for options of another poll and repeated votes of a user
+        in the same poll are dropped, so retrying a batch is safe. Polls
+        that got new votes are announced on ``POLL_VOTES_CHANNEL``.
+        """
+        records = await self._fetch(
+            INSERT_VOTES,
+            [vote.poll_id for vote in votes],
+            [vote.user_id for vote in votes],
+            [vote.option_id for vote in votes],
+            POLL_TALLY_SHARDS,
+        )
+        if self._results_cache is not None:
+            for record in records:
+                self._results_cache.pop(record["poll_id"])
+
+        return sum(record["votes"] for record in records)
+
+    async def get_poll_results(self, *, poll_id: int) -> Dict[int, int]:
+        """Votes per option from the tallies, O(options) for any poll size"""
+        if self._results_cache is not None:
+            results = self._results_cache.get(poll_id)
+            if results is not None:
+                return results
+
+        results = (await self.get_polls_results(poll_ids=[poll_id]))[poll_id]
+        if self._results_cache is not None:
+            self._results_cache.set(poll_id, results)
+
+        return results
+
+    async def get_polls_results(
+        self, *, poll_ids: Sequence[int]
+    ) -> Dict[int, Dict[int, int]]:
+        """Uncached results of many polls in one query"""
+        polls_results: Dict[int, Dict[int, int]] = {
+            poll_id: {} for poll_id in poll_ids
+        }
+        for record in await self._fetch(GET_POLLS_RESULTS, list(poll_ids)):
+            polls_results[record["poll_id"]][record["option_id"]] = record["votes"]
+
+        return polls_results
+
+    async def reconcile_tallies(
+        self, *, after_poll_id: int, batch_size: int, timeout: float
+    ) -> Tuple[Optional[int], List[Record]]:
+        """Rebuild drifted tallies of the ``batch_size`` polls after ``after_poll_id``.
+
+        Returns the last poll id of the batch, ``None`` past the last poll,
+        and the fixed tallies. Polls another worker reconciles are skipped.
+        """
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                await conn.fetchval(
+                    SET_LOCAL_STATEMENT_TIMEOUT_QUERY, str(int(timeout * 1000))
+                )
+                batch = await conn.fetch(
+                    LOCK_POLLS_BATCH_QUERY, after_poll_id, batch_size, TALLIES_LOCK_ID
+                )
+                if not batch:
+                    return None, []
+
+                poll_ids = [record["id"] for record in batch if record["locked"]]
+                records: List[Record] = []
+                if poll_ids:
+                    with timing.span("db"):
+                        records = await registry.fetch(
+                            conn,
+                            RECONCILE_POLL_TALLIES,
+                            poll_ids,
+                            timeout=timeout + _CLIENT_TIMEOUT_MARGIN,
+                        )
+
+                return batch[-1]["id"], records
@@ -0,0 +1,122 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+from asyncpg import Record
+
+from app.core.config import (ACCESS_TOKEN_EXPIRE_MINUTES,
+                             REFRESH_TOKEN_EXPIRE_DAYS)
+from app.db.errors.tokens import InvalidRefreshTokenError
+from app.db.queries.locks import TRY_ADVISORY_XACT_LOCK_QUERY
+from app.db.repositories.base import BaseRepository
+from app.db.statements import (CREATE_REFRESH_TOKEN, GET_REVOKED_TOKENS_SINCE,
+                               IS_TOKEN_REVOKED, PURGE_EXPIRED_TOKENS,
+                               REVOKE_ACCESS_TOKEN,
+                               REVOKE_REFRESH_TOKEN_FAMILY,
+                               ROTATE_REFRESH_TOKEN, registry)
+from app.models.domain.users import UserRecord
+from app.services import timing
+
+# arbitrary, but the same for every worker of every deployment
+PURGE_LOCK_ID = 7_046_313
+
+
+def _hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _new_refresh_token() -> Tuple[str, str, str]:
+    """Opaque ``<id>.<secret>`` token, only a digest of the secret is stored"""
+    token_id, secret = secrets.token_urlsafe(12), secrets.token_urlsafe(32)
+    return f"{token_id}.{secret}", token_id, _hash_secret(secret)
+
+
+def _parse_refresh_token(refresh_token: str) -> Tuple[str, str]:
+    token_id, _, secret = refresh_token.partition(".")
+    if not token_id or not secret:
+        raise InvalidRefreshTokenError
+    return token_id, _hash_secret(secret)
+
+
+def _refresh_token_expires_at() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+class TokensRepository(BaseRepository):
+    async def create_refresh_token(self, *, user_id: int, access_jti: str) -> str:
+        """Start a new refresh token family, e.g. on log in"""
+        refresh_token, token_id, token_hash = _new_refresh_token()
+        await self._fetch(
+            CREATE_REFRESH_TOKEN,
+            token_id,
+            token_hash,
+            user_id,
+            secrets.token_urlsafe(12),
+            access_jti,
+            _refresh_token_expires_at(),
+        )
+        return refresh_token
+
+    async def rotate_refresh_token(
+        self, *, refresh_token: str, access_jti: str,
+    ) -> Tuple[UserRecord, str]:
+        """Exchange refresh token for its successor, each one works once.
+
+        Presenting an already used token means it leaked, so its whole
+        family is revoked, including access tokens issued along with it.
+        """
+        token_id, token_hash = _parse_refresh_token(refresh_token)
+        new_refresh_token, new_token_id, new_token_hash = _new_refresh_token()
+        user_row = await self._fetchrow(
+            ROTATE_REFRESH_TOKEN,
+            token_id,
+            token_hash,
+            new_token_id,
+            new_token_hash,
+            access_jti,
+            _refresh_token_expires_at(),
+        )
+        if user_row is None:
+            await self._revoke_family(token_id, token_hash, used_only=True)
+            raise InvalidRefreshTokenError
+
+        return UserRecord.from_row(user_row), new_refresh_token
+
+    async def revoke_refresh_token_family(self, *, refresh_token: str) -> List[str]:
+        token_id, token_hash = _parse_refresh_token(refresh_token)
+        return await self._revoke_family(token_id, token_hash, used_only=False)
+
+    async def revoke_access_token(self, *, jti: str, expires_at: datetime) -> None:
+        await self._fetch(REVOKE_ACCESS_TOKEN, jti, expires_at)
+
+    async def is_revoked(self, *, jti: str) -> bool:
+        return await self._fetchval(IS_TOKEN_REVOKED, jti)
+
+    async def get_revoked_since(self, *, since: datetime) -> List[Record]:
+        """Revocations of not yet expired tokens, as ``jti, revoked_at``"""
+        return await self._fetch(GET_REVOKED_TOKENS_SINCE, since)
+
+    async def purge_expired(self) -> bool:
+        """Delete expired tokens, returns ``False`` if another worker does it"""
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                if not await conn.fetchval(TRY_ADVISORY_XACT_LOCK_QUERY, PURGE_LOCK_ID):
+                    return False
+
+                with timing.span("db"):
+                    await registry.fetch(conn, PURGE_EXPIRED_TOKENS)
+
+        return True
+
+    async def _revoke_family(
+        self, token_id: str, token_hash: str, *, used_only: bool,
+    ) -> List[str]:
+        records = await self._fetch(
+            REVOKE_REFRESH_TOKEN_FAMILY,
+            token_id,
+            token_hash,
+            timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+            used_only,
+        )
+        return [record["jti"] for record in records]
@@ -1,75 +1,320 @@
-from typing import Optional
+from typing import (Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple,
+                    Union)
 
-from app.db.errors.users import EntityDoesNotExistError
-from app.db.queries.users import (CREATE_USER_QUERY, GET_USER_BY_EMAIL,
-                                  GET_USER_BY_USERNAME, UPDATE_USER)
+from asyncpg import Record
+from asyncpg.connection import Connection
+from asyncpg.exceptions import UniqueViolationError
+from asyncpg.pool import Pool
+
+from app.core.config import USERS_SEARCH_FUZZY_MATCHES
+from app.db.errors.users import (EntityAlreadyExistsError,
+                                 EntityDoesNotExistError,
+                                 EntityVersionConflictError)
+from app.db.queries.users import (CREATE_USERS_IMPORT_TABLE,
+                                  IMPORT_USERS_FROM_STAGING,
+                                  USERS_IMPORT_COLUMNS)
 from app.db.repositories.base import BaseRepository
-from app.models.schemas.users import UserInDB
+from app.db.repositories.cache import CacheAside, users_cache
+from app.db.statements import (CREATE_USER, EXPORT_USERS, GET_USER_BY_EMAIL,
+                               GET_USER_BY_LOGIN, GET_USER_BY_USERNAME,
+                               SEARCH_USERS_BY_EMAIL_PREFIX,
+                               SEARCH_USERS_BY_EMAIL_SIMILARITY,
+                               SEARCH_USERS_BY_USERNAME_PREFIX,
+                               SEARCH_USERS_BY_USERNAME_SIMILARITY,
+                               UPDATE_USER, registry)
+from app.models.domain.users import UserRecord
+from app.services import security, timing
+from app.services.token_cache import token_cache
+
+# line, username, email, hashed_password, bio, image
+ImportRow = Tuple[int, str, str, str, str, Optional[str]]
+
+_SEARCH_STATEMENTS = {
+    ("username", False): SEARCH_USERS_BY_USERNAME_PREFIX,
+    ("username", True): SEARCH_USERS_BY_USERNAME_SIMILARITY,
+    ("email", False): SEARCH_USERS_BY_EMAIL_PREFIX,
+    ("email", True): SEARCH_USERS_BY_EMAIL_SIMILARITY,
+}
+
+
+def normalize_email(email: str) -> str:
+    """Must match ``lower(trim(email))`` used to fill ``email_normalized``"""
+    return email.strip().lower()
+
+
+def _cached_row(user_row: Record) -> Dict[str, Any]:
+    # a cache that missed an invalidation must not keep an old password valid,
+    # users served from the cache come without ``hashed_password``
+    return {
+        field: value for field, value in user_row.items() if field != "hashed_password"
+    }
+
+
+def _conflicting_field(unique_error: UniqueViolationError) -> str:
+    return "username" if "username" in str(unique_error.constraint_name) else "email"
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string above every string starting with ``prefix``"""
+    next_code_point = ord(prefix[-1]) + 1
+    if 0xD800 <= next_code_point <= 0xDFFF:  # surrogates can not be sent
+        next_code_point = 0xE000
+    return prefix[:-1] + chr(min(next_code_point, 0x10FFFF))
 
 
 class UsersRepository(BaseRepository):
+    def __init__(
+        self,
+        conn: Union[Connection, Pool],
+        cache: Optional[CacheAside] = users_cache,
+    ) -> None:
+        super().__init__(conn)
+        self._cache = cache
+
+    @timing.timed("users_repo.create_user")
     async def create_user(
         self, *, username: str, email: str, password: str,
-    ) -> UserInDB:
-        user = UserInDB(username=username, email=email, password=password)
-        user.change_password(password)
-        await self._conn.execute(
-            CREATE_USER_QUERY,
-            user.username,
-            user.email,
-            user.hashed_password,
-            user.bio,
-            user.image,
-            user.is_active,
-            user.is_super,
-            user.is_staff,
+    ) -> UserRecord:
+        """Insert user unless username or email is taken, in one round trip.
+
+        Raises ``EntityAlreadyExistsError`` with the conflicting field.
+        """
+        user = UserRecord(username=username, email=email)
+        await user.change_password(password)
+        try:
+            record = await self._fetchrow(
+                CREATE_USER,
+                user.username,
+                user.email,
+                user.hashed_password,
+                user.bio,
+                user.image,
+                user.is_active,
+                user.is_super,
+                user.is_staff,
+                normalize_email(user.email),
+            )
+        except UniqueViolationError as unique_error:
+            # a concurrent signup won the race between the check and the insert
+            raise EntityAlreadyExistsError(
+                _conflicting_field(unique_error)
+            ) from unique_error
+
+        if record["conflict"]:
+            raise EntityAlreadyExistsError(record["conflict"])
+
+        # "does not exist" may be cached for the new username or email
+        await self._invalidate_cache((user.username, user.email))
+
+        return UserRecord.from_row(record)
+
+    @timing.timed("users_repo.get_user_by_username")
+    async def get_user_by_username(self, *, username: str) -> UserRecord:
+        return await self._get_user(
+            "username", username.lower(), GET_USER_BY_USERNAME, username
         )
 
-        return user
+    @timing.timed("users_repo.get_user_by_email")
+    async def get_user_by_email(self, *, email: str) -> UserRecord:
+        normalized_email = normalize_email(email)
+        return await self._get_user(
+            "email", normalized_email, GET_USER_BY_EMAIL, normalized_email
+        )
 
-    async def get_user_by_username(self, *, username: str) -> UserInDB:
-        user_row = await self._conn.fetchrow(GET_USER_BY_USERNAME, username)
+    @timing.timed("users_repo.get_user_version")
+    async def get_user_version(self, *, username: str) -> Optional[Tuple[int, int]]:
+        """Cached ``(id, version)`` of a user, ``None`` when not cached.
 
-        if user_row:
-            return UserInDB(**user_row)
+        Enough to revalidate a representation of the user without loading
+        it. Filled by ``cache_user_version``, dropped on every write of the
+        user; always ``None`` without a cache backend.
+        """
+        if self._cache is None:
+            return None
+
+        lookup = await self._cache.get("version", username.lower())
+        if lookup is None or lookup.row is None:
+            return None
+
+        return lookup.row["id"], lookup.row["version"]
 
-        raise EntityDoesNotExistError(f"entity with username {username} does not exist")
+    async def cache_user_version(self, *, user: UserRecord) -> None:
+        if self._cache is not None:
+            await self._cache.put(
+                "version",
+                user.username.lower(),
+                {"id": user.id, "version": user.version},
+            )
 
-    async def get_user_by_email(self, *, email: str) -> UserInDB:
-        user_row = await self._conn.fetchrow(GET_USER_BY_EMAIL, email)
+    @timing.timed("users_repo.get_user_by_login")
+    async def get_user_by_login(self, *, login: str) -> UserRecord:
+        """Find user by username or email, username match wins.
 
+        Always read from the db, the password hash is never cached.
+        """
+        user_row = await self._fetchrow(
+            GET_USER_BY_LOGIN, login, normalize_email(login)
+        )
         if user_row:
-            return UserInDB(**user_row)
+            return UserRecord.from_row(user_row)
 
-        raise EntityDoesNotExistError(f"entity with email {email} does not exist")
+        raise EntityDoesNotExistError(f"entity with login {login} does not exist")
 
+    @timing.timed("users_repo.update_user")
     async def update_user(
         self,
         *,
-        user: UserInDB,
+        user: UserRecord,
         username: Optional[str] = None,
         email: Optional[str] = None,
         password: Optional[str] = None,
         bio: Optional[str] = None,
         image: Optional[str] = None,
-    ) -> UserInDB:
-        user_in_db = await self.get_user_by_username(username=user.username)
+    ) -> UserRecord:
+        """Write the fields that differ from ``user`` as loaded, in one round trip.
 
-        user_in_db.username = username or user_in_db.username
-        user_in_db.email = email or user_in_db.email
-        user_in_db.bio = bio or user_in_db.bio
-        user_in_db.image = image or user_in_db.image
+        Empty fields are left as they are, a password is hashed only when
+        given. Taken usernames and emails are reported by the unique
+        indexes as ``EntityAlreadyExistsError``, and a user changed since
+        it was loaded as ``EntityVersionConflictError``.
+        """
+        username = username if username and username != user.username else None
+        email = email if email and email != user.email else None
+        bio = bio if bio and bio != user.bio else None
+        image = image if image and image != user.image else None
+        hashed_password = None
         if password:
-            user_in_db.change_password(password)
-
-        await self._conn.execute(
-            UPDATE_USER,
-            user.username,
-            user_in_db.username,
-            user_in_db.email,
-            user_in_db.hashed_password,
-            user_in_db.bio,
-            user_in_db.image,
+            hashed_password = await security.password_hasher.hash(password)
+        if not (username or email or bio or image or hashed_password):
+            return user
+
+        try:
+            record = await self._fetchrow(
+                UPDATE_USER,
+                user.id,
+                user.version,
+                username,
+                email,
+                normalize_email(email) if email else None,
+                hashed_password,
+                bio,
+                image,
+            )
+        except UniqueViolationError as unique_error:
+            raise EntityAlreadyExistsError(
+                _conflicting_field(unique_error)
+            ) from unique_error
+
+        # cached entries hold the whole hydrated user, so any change
+        # (not only username, email or password) makes them stale; after a
+        # conflict they are dropped too, so that a retry loads the user again
+        await self._invalidate_cache(
+            (user.username, user.email),
+            (username or user.username, email or user.email),
+        )
+        token_cache.invalidate_user(user.username)
+        if record is None:
+            raise EntityVersionConflictError(
+                f"entity with id {user.id} changed since version {user.version}"
+            )
+
+        return UserRecord.from_row(record)
+
+    @timing.timed("users_repo.search_users")
+    async def search_users(
+        self,
+        *,
+        query: str,
+        field: str,
+        fuzzy: bool,
+        limit: int,
+        after_key: str = "",
+        after_rank: Optional[float] = None,
+    ) -> List[Record]:
+        """Users whose ``field`` starts with, or if ``fuzzy`` resembles, ``query``.
+
+        Rows come with their ``key`` (and ``rank`` when fuzzy), the next
+        page starts after the ``key`` and ``rank`` of the last row. Fuzzy
+        results stop after the ``USERS_SEARCH_FUZZY_MATCHES`` closest users.
+        """
+        value = query.lower() if field == "username" else normalize_email(query)
+        if not value:
+            return []
+
+        statement = _SEARCH_STATEMENTS[field, fuzzy]
+        if fuzzy:
+            return await self._fetch(
+                statement,
+                value,
+                after_rank,
+                after_key,
+                limit,
+                USERS_SEARCH_FUZZY_MATCHES,
+            )
+
+        return await self._fetch(
+            statement, value, _prefix_upper_bound(value), after_key, limit
         )
 
-        return user_in_db
+    @timing.timed("users_repo.import_users")
+    async def import_users(self, rows: Sequence[ImportRow]) -> List[Record]:
+        """COPY users in, skipping taken ones, in one transaction per batch.
+
+        Returns ``line, username, email`` of the skipped rows. Usernames
+        and emails must be unique within ``rows``.
+        """
+        async with self._acquire() as conn:
+            with timing.span("db"):
+                async with conn.transaction():
+                    await conn.execute(CREATE_USERS_IMPORT_TABLE)
+                    await conn.copy_records_to_table(
+                        "users_import", records=rows, columns=USERS_IMPORT_COLUMNS
+                    )
+                    conflicts = await conn.fetch(IMPORT_USERS_FROM_STAGING)
+
+        await self._invalidate_cache(*((row[1], row[2]) for row in rows))
+
+        return conflicts
+
+    async def export_users(self, *, prefetch: int) -> AsyncIterator[Record]:
+        """All users by id from a server-side cursor, ``prefetch`` at a time.
+
+        Holds one connection and a consistent snapshot until exhausted.
+        """
+        async with self._acquire() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                statement = await registry.statement(conn, EXPORT_USERS)
+                async for record in statement.cursor(prefetch=prefetch):
+                    yield record
+
+    async def _get_user(
+        self, field: str, value: str, statement: str, *query_args: str,
+    ) -> UserRecord:
+        lookup = await self._cache.get(field, value) if self._cache else None
+
+        if lookup is not None and lookup.found:
+            user_row = lookup.row
+        else:
+            user_row = await self._fetchrow(statement, *query_args)
+            if lookup is not None:
+                await self._cache.set(  # type: ignore
+                    lookup, _cached_row(user_row) if user_row else None
+                )
+
+        if user_row:
+            return UserRecord.from_row(user_row)
+
+        raise EntityDoesNotExistError(f"entity with {field} {value} does not exist")
+
+    async def _invalidate_cache(self, *users: Tuple[str, str]) -> None:
+        """Drop cached lookups of ``(username, email)`` pairs"""
+        if self._cache is not None:
+            await self._cache.invalidate(
+                lookup
+                for username, email in users
+                for lookup in (
+                    ("username", username.lower()),
+                    ("version", username.lower()),
+                    ("email", normalize_email(email)),
+                )
+            )
@@ -0,0 +1,63 @@
+"""Every statement the service issues, see ``QueryRegistry``"""
+from app.db.queries import polls as polls_queries
+from app.db.queries import tokens as tokens_queries
+from app.db.queries import users as users_queries
+from app.db.registry import QueryRegistry
+
+registry = QueryRegistry()
+
+CREATE_USER = registry.register("users.create", users_queries.CREATE_USER_QUERY)
+GET_USER_BY_USERNAME = registry.register(
+    "users.get_by_username", users_queries.GET_USER_BY_USERNAME
+)
+GET_USER_BY_EMAIL = registry.register(
+    "users.get_by_email", users_queries.GET_USER_BY_EMAIL
+)
+GET_USER_BY_LOGIN = registry.register(
+    "users.get_by_login", users_queries.GET_USER_BY_LOGIN
+)
+UPDATE_USER = registry.register("users.update", users_queries.UPDATE_USER)
+EXPORT_USERS = registry.register("users.export", users_queries.EXPORT_USERS)
+SEARCH_USERS_BY_USERNAME_PREFIX = registry.register(
+    "users.search_by_username_prefix", users_queries.SEARCH_USERS_BY_USERNAME_PREFIX
+)
+SEARCH_USERS_BY_EMAIL_PREFIX = registry.register(
+    "users.search_by_email_prefix", users_queries.SEARCH_USERS_BY_EMAIL_PREFIX
+)
+SEARCH_USERS_BY_USERNAME_SIMILARITY = registry.register(
+    "users.search_by_username_similarity",
+    users_queries.SEARCH_USERS_BY_USERNAME_SIMILARITY,
+)
+SEARCH_USERS_BY_EMAIL_SIMILARITY = registry.register(
+    "users.search_by_email_similarity", users_queries.SEARCH_USERS_BY_EMAIL_SIMILARITY
+)
+
+CREATE_REFRESH_TOKEN = registry.register(
+    "tokens.create_refresh", tokens_queries.CREATE_REFRESH_TOKEN
+)
+ROTATE_REFRESH_TOKEN = registry.register(
+    "tokens.rotate_refresh", tokens_queries.ROTATE_REFRESH_TOKEN
+)
+REVOKE_REFRESH_TOKEN_FAMILY = registry.register(
+    "tokens.revoke_refresh_family", tokens_queries.REVOKE_REFRESH_TOKEN_FAMILY
+)
+REVOKE_ACCESS_TOKEN = registry.register(
+    "tokens.revoke_access", tokens_queries.REVOKE_ACCESS_TOKEN
+)
+IS_TOKEN_REVOKED = registry.register("tokens.is_revoked", tokens_queries.IS_TOKEN_REVOKED)
+GET_REVOKED_TOKENS_SINCE = registry.register(
+    "tokens.get_revoked_since", tokens_queries.GET_REVOKED_TOKENS_SINCE
+)
+PURGE_EXPIRED_TOKENS = registry.register(
+    "tokens.purge_expired", tokens_queries.PURGE_EXPIRED_TOKENS
+)
+
+CREATE_POLL = registry.register("polls.create", polls_queries.CREATE_POLL)
+GET_POLL = registry.register("polls.get", polls_queries.GET_POLL)
+INSERT_VOTES = registry.register("polls.insert_votes", polls_queries.INSERT_VOTES)
+GET_POLLS_RESULTS = registry.register(
+    "polls.get_results", polls_queries.GET_POLLS_RESULTS
+)
+RECONCILE_POLL_TALLIES = registry.register(
+    "polls.reconcile_tallies", polls_queries.RECONCILE_POLL_TALLIES
+)
@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 
 from app.api.metadata import TAGS_METADATA
+from app.api.middleware import ServerTimingMiddleware
+from app.api.responses import FastJSONResponse
 from app.api.routes.api import router as api_router
-from app.core.config import (API_PREFIX, DEBUG, PROJECT_DESCRIPTION,
-                             PROJECT_NAME, VERSION)
+from app.api.routes.jwks import router as jwks_router
+from app.api.routes.metrics import router as metrics_router
+from app.core.config import (API_PREFIX, DEBUG, METRICS_ENABLED,
+                             PROJECT_DESCRIPTION, PROJECT_NAME,
+                             SERVER_TIMING_ENABLED, VERSION)
 from app.core.events import create_start_app_handler, create_stop_app_handler
 
 
@@ -14,6 +19,7 @@ def get_application() -> FastAPI:
         version=VERSION,
         debug=DEBUG,
         openapi_tags=TAGS_METADATA,
+        default_response_class=FastJSONResponse,
     )
 
     application.add_event_handler(
@@ -23,6 +29,13 @@ def get_application() -> FastAPI:
         "shutdown", create_stop_app_handler(application)
     )  # noqa: E501
 
+    if METRICS_ENABLED:
+        application.add_middleware(
+            ServerTimingMiddleware, server_timing=SERVER_TIMING_ENABLED
+        )
+        application.include_router(metrics_router)
+
+    application.include_router(jwks_router)
     application.include_router(api_router, prefix=API_PREFIX)
 
     return application
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import Any, List, Mapping, NamedTuple, Optional
+
+
+class PollOption(NamedTuple):
+    id: int
+    text: str
+
+
+class PollRecord:
+    """Read model of a poll with its options, see ``UserRecord``"""
+
+    __slots__ = ("id", "author", "question", "created_at", "closes_at", "options")
+
+    def __init__(
+        self,
+        *,
+        id: int,
+        author: str,
+        question: str,
+        created_at: datetime,
+        closes_at: Optional[datetime],
+        options: List[PollOption],
+    ) -> None:
+        self.id = id
+        self.author = author
+        self.question = question
+        self.created_at = created_at
+        self.closes_at = closes_at
+        self.options = options
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "PollRecord":
+        return cls(
+            id=row["id"],
+            author=row["author"],
+            question=row["question"],
+            created_at=row["created_at"],
+            closes_at=row["closes_at"],
+            options=[
+                PollOption(option["id"], option["text"])
+                for option in row["options"] or ()
+            ],
+        )
+
+    def __repr__(self) -> str:
+        return f"PollRecord(id={self.id!r}, question={self.question!r})"
+
+    @property
+    def is_closed(self) -> bool:
+        if self.closes_at is None:
+            return False
+        return self.closes_at <= datetime.now(timezone.utc)
+
+    def has_option(self, option_id: int) -> bool:
+        return any(option.id == option_id for option in self.options)
+
+
+class Vote(NamedTuple):
+    poll_id: int
+    user_id: int
+    option_id: int
@@ -0,0 +1,78 @@
+from typing import Any, Dict, Mapping, Optional
+
+from app.services import security
+
+
+class UserRecord:
+    """Read model of a ``users`` row for internal use.
+
+    Built straight from a ``Record`` (or a cached row) without pydantic
+    validation, the database already enforces the schema. Pydantic models
+    in ``app.models.schemas`` are kept for the API boundaries.
+    """
+
+    __slots__ = (
+        "id",
+        "username",
+        "email",
+        "hashed_password",
+        "bio",
+        "image",
+        "is_active",
+        "is_super",
+        "is_staff",
+        "version",
+    )
+
+    def __init__(
+        self,
+        *,
+        id: int = 0,
+        username: str,
+        email: str,
+        hashed_password: str = "",
+        bio: Optional[str] = "",
+        image: Optional[str] = None,
+        is_active: bool = True,
+        is_super: bool = False,
+        is_staff: bool = False,
+        version: int = 0,
+    ) -> None:
+        self.id = id
+        self.username = username
+        self.email = email
+        self.hashed_password = hashed_password
+        self.bio = bio
+        self.image = image
+        self.is_active = is_active
+        self.is_super = is_super
+        self.is_staff = is_staff
+        # bumped by every update, see ``UsersRepository.update_user``
+        self.version = version
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "UserRecord":
+        return cls(
+            id=row["id"],
+            username=row["username"],
+            email=row["email"],
+            hashed_password=row.get("hashed_password", ""),
+            bio=row["bio"],
+            image=row["image"],
+            is_active=row.get("is_active", True),
+            is_super=row.get("is_super", False),
+            is_staff=row.get("is_staff", False),
+            version=row.get("version", 0),
+        )
+
+    def to_row(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"UserRecord(id={self.id!r}, username={self.username!r})"
+
+    async def check_password(self, password: str) -> bool:
+        return await security.password_hasher.verify(password, self.hashed_password)
+
+    async def change_password(self, password: str) -> None:
+        self.hashed_password = await security.password_hasher.hash(password)
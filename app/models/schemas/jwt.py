@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -6,7 +7,12 @@ from pydantic import BaseModel
 class JWTMeta(BaseModel):
     exp: datetime
     sub: str
+    jti: Optional[str] = None
 
 
 class JWTUser(BaseModel):
     username: str
+
+
+class JWTPayload(JWTMeta, JWTUser):
+    pass
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, conint, conlist, constr
+
+MAX_POLL_OPTIONS = 20
+# ids are INTEGER columns, larger values can not even be sent to Postgres
+MAX_ID = 2 ** 31 - 1
+
+PollQuestion = constr(strip_whitespace=True, min_length=1, max_length=300)
+PollOptionText = constr(strip_whitespace=True, min_length=1, max_length=200)
+PollOptions = conlist(PollOptionText, min_items=2, max_items=MAX_POLL_OPTIONS)
+
+
+class PollInCreate(BaseModel):
+    question: PollQuestion  # type: ignore
+    options: PollOptions  # type: ignore
+    closes_at: Optional[datetime] = None
+
+
+class PollOptionInResponse(BaseModel):
+    id: int
+    text: str
+    votes: Optional[int] = None
+
+
+class Poll(BaseModel):
+    id: int
+    author: str
+    question: str
+    created_at: datetime
+    closes_at: Optional[datetime]
+    options: List[PollOptionInResponse]
+
+
+class PollInResponse(BaseModel):
+    poll: Poll
+
+
+class VoteInCreate(BaseModel):
+    option_id: conint(ge=1, le=MAX_ID)  # type: ignore
@@ -1,10 +1,12 @@
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, constr, root_validator
 
 from app.models.common import IDModelMixin
 from app.services import security
 
+BCRYPT_HASH_REGEX = r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$"
+
 
 class User(BaseModel):
     username: str
@@ -30,14 +32,48 @@ class UserInCreate(BaseModel):
     password: str
 
 
+class UserInImport(BaseModel):
+    """One row of a bulk import, with a password or an existing bcrypt hash"""
+
+    username: constr(min_length=1, max_length=24)  # type: ignore
+    email: EmailStr
+    password: Optional[str] = None
+    hashed_password: Optional[constr(regex=BCRYPT_HASH_REGEX)] = None  # type: ignore
+    bio: Optional[str] = ""
+    image: Optional[str] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_password_or_hash(cls, values: dict) -> dict:  # noqa: N805
+        if bool(values.get("password")) == bool(values.get("hashed_password")):
+            raise ValueError("either password or hashed_password is required")
+
+        return values
+
+
 class UserWithToken(User):
     token: str
+    refresh_token: Optional[str] = None
 
 
 class UserInResponse(BaseModel):
     user: UserWithToken
 
 
+class Profile(BaseModel):
+    username: str
+    bio: Optional[str] = ""
+    image: Optional[str] = None
+
+
+class ProfileInResponse(BaseModel):
+    profile: Profile
+
+
+class UsersInResponse(BaseModel):
+    users: List[User]
+    next_cursor: Optional[str] = None
+
+
 class UserInUpdate(BaseModel):
     username: Optional[str]
     email: Optional[EmailStr]
@@ -50,9 +86,9 @@ class UserInDB(IDModelMixin, UserWithStates):
     # salt: str = ""
     hashed_password: str = ""
 
-    def check_password(self, password: str) -> bool:
-        return security.verify_password(password, self.hashed_password)
+    async def check_password(self, password: str) -> bool:
+        return await security.password_hasher.verify(password, self.hashed_password)
 
-    def change_password(self, password: str) -> None:
+    async def change_password(self, password: str) -> None:
         # self.salt = security.generate_salt()
-        self.hashed_password = security.get_password_hash(password)
+        self.hashed_password = await security.password_hasher.hash(password)
@@ -3,8 +3,28 @@
 INCORRECT_LOGIN_INPUT = "incorrect login/email or password"
 USERNAME_TAKEN = "user with this username already exists"
 EMAIL_TAKEN = "user with this email already exists"
+USER_DOES_NOT_EXIST = "user does not exist"
+USER_CHANGED = "user was changed by another request, please retry"
 
 WRONG_TOKEN_PREFIX = "unsupported authorization type"
 MALFORMED_PAYLOAD = "could not validate credentials"
+TOKEN_REVOKED = "token has been revoked"
+INVALID_REFRESH_TOKEN = "refresh token is invalid or expired"
+
+POLL_DOES_NOT_EXIST = "poll does not exist"
+POLL_OPTION_DOES_NOT_EXIST = "option does not belong to this poll"
+POLL_CLOSED = "poll is closed"
+
+SEARCH_CURSOR_INVALID = "cursor is invalid"
+USERS_EMAIL_SEARCH_FORBIDDEN = "only staff users can search by email"
 
 AUTHENTICATION_REQUIRED = "authentication required"
+ADMIN_TOKEN_INVALID = "admin token is missing or invalid"
+
+RATE_LIMIT_EXCEEDED = "too many attempts, please retry later"
+PASSWORD_HASHER_OVERLOADED = "server is busy, please retry later"
+DATABASE_UNAVAILABLE = "database is busy, please retry later"
+VOTES_OVERLOADED = "too many votes in flight, please retry later"
+LIVE_RESULTS_OVERLOADED = "too many results streams open, please retry later"
+PROFILER_BUSY = "profiler is already running"
+USERS_IMPORT_BUSY = "users import is already running"
@@ -1,20 +0,0 @@
-from app.db.errors.users import EntityDoesNotExistError
-from app.db.repositories.users import UsersRepository
-
-
-async def check_username_is_taken(repo: UsersRepository, username: str) -> bool:
-    try:
-        await repo.get_user_by_username(username=username)
-    except EntityDoesNotExistError:
-        return False
-
-    return True
-
-
-async def check_email_is_taken(repo: UsersRepository, email: str) -> bool:
-    try:
-        await repo.get_user_by_email(email=email)
-    except EntityDoesNotExistError:
-        return False
-
-    return True
@@ -0,0 +1,49 @@
+from fastapi import HTTPException, status
+
+from app.resources.strings import (LIVE_RESULTS_OVERLOADED,
+                                   PASSWORD_HASHER_OVERLOADED,
+                                   RATE_LIMIT_EXCEEDED, VOTES_OVERLOADED)
+
+
+class PasswordHasherOverloadedError(HTTPException):
+    """Raised when the password hashing queue is saturated"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=PASSWORD_HASHER_OVERLOADED,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class VotesOverloadedError(HTTPException):
+    """Raised when the vote buffer holds too many votes not yet flushed"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=VOTES_OVERLOADED,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class LiveResultsOverloadedError(HTTPException):
+    """Raised when a worker already streams results to too many clients"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=LIVE_RESULTS_OVERLOADED,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class RateLimitExceededError(HTTPException):
+    """Raised when a client IP or identity ran out of attempts"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=RATE_LIMIT_EXCEEDED,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -1,38 +1,123 @@
-from datetime import datetime, timedelta
-from typing import Dict
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import ModuleType
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
 
-import jwt
+from loguru import logger
 from pydantic import ValidationError
 
-from app.models.schemas.jwt import JWTMeta, JWTUser
+from app.core.config import (ACCESS_TOKEN_EXPIRE_MINUTES, JWT_ACCEPT_HS256,
+                             JWT_ALGORITHM)
+from app.models.domain.users import UserRecord
+from app.models.schemas.jwt import JWTMeta, JWTPayload, JWTUser
 from app.models.schemas.users import User
+from app.services import timing
+from app.services.keys import KEY_ALGORITHM, get_key_ring
 
 JWT_SUBJECT = "access"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # one week
+SECRET_ALGORITHM = "HS256"
+
+
+class AccessToken(NamedTuple):
+    token: str
+    jti: str
+    expires_at: datetime
+
+
+def _pyjwt() -> ModuleType:
+    # PyJWT pulls in cryptography, import it with the first token instead
+    import jwt
+
+    return jwt
+
+
+def check_signing_keys() -> None:
+    """Fail at startup instead of at the first login on a broken key setup"""
+    if JWT_ALGORITHM not in {SECRET_ALGORITHM, KEY_ALGORITHM}:
+        raise ValueError(f"unsupported JWT algorithm: {JWT_ALGORITHM}")
+
+    if JWT_ALGORITHM == KEY_ALGORITHM:
+        signing_key = get_key_ring().signing_key
+        logger.info("Signing access tokens with {0} key {1}", KEY_ALGORITHM, signing_key.kid)
 
 
 def create_jwt_token(
-    *, jwt_content: Dict[str, str], secret_key: str, expires_delta: timedelta,
+    *,
+    jwt_content: Dict[str, str],
+    secret_key: str,
+    expires_delta: timedelta,
+    jti: Optional[str] = None,
 ) -> str:
     to_encode = jwt_content.copy()
     expire = datetime.utcnow() + expires_delta
-    to_encode.update(JWTMeta(exp=expire, sub=JWT_SUBJECT).dict())
-    return jwt.encode(to_encode, secret_key, algorithm=ALGORITHM)
+    to_encode.update(JWTMeta(exp=expire, sub=JWT_SUBJECT, jti=jti).dict(exclude_none=True))
+    if JWT_ALGORITHM == SECRET_ALGORITHM:
+        token = _pyjwt().encode(to_encode, secret_key, algorithm=SECRET_ALGORITHM)
+    else:
+        key = get_key_ring().signing_key
+        token = _pyjwt().encode(
+            to_encode, key.private_key, algorithm=KEY_ALGORITHM, headers={"kid": key.kid}
+        )
+    # PyJWT 1.x returns bytes, which only pydantic models used to coerce
+    return token.decode() if isinstance(token, bytes) else token
+
 
+def new_jti() -> str:
+    return uuid.uuid4().hex
 
-def create_access_token_for_user(user: User, secret_key: str) -> str:
-    return create_jwt_token(
+
+@timing.timed("jwt_encode")
+def create_access_token(
+    user: Union[User, UserRecord], secret_key: str, jti: Optional[str] = None,
+) -> AccessToken:
+    """Short lived token, revocable by its ``jti``"""
+    jti = jti or new_jti()
+    expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    token = create_jwt_token(
         jwt_content=JWTUser(username=user.username).dict(),
         secret_key=secret_key,
-        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        expires_delta=expires_delta,
+        jti=jti,
     )
+    return AccessToken(token, jti, datetime.now(timezone.utc) + expires_delta)
 
 
-def get_username_from_token(token: str, secret_key: str) -> str:
+def create_access_token_for_user(
+    user: Union[User, UserRecord], secret_key: str,
+) -> str:
+    return create_access_token(user, secret_key).token
+
+
+@timing.timed("jwt_decode")
+def get_payload_from_token(token: str, secret_key: str) -> JWTPayload:
+    pyjwt = _pyjwt()
     try:
-        return JWTUser(**jwt.decode(token, secret_key, algorithms=[ALGORITHM])).username
-    except jwt.PyJWTError as decode_error:
+        key, algorithm = _get_verification_key(token, secret_key)
+        return JWTPayload(**pyjwt.decode(token, key, algorithms=[algorithm]))
+    except pyjwt.PyJWTError as decode_error:
         raise ValueError("unable to decode JWT token") from decode_error
     except ValidationError as validation_error:
         raise ValueError("malformed payload in token") from validation_error
+
+
+def _get_verification_key(token: str, secret_key: str) -> Tuple[Any, str]:
+    """Pick the key by ``kid``, each key verifies only its own algorithm.
+
+    Tokens without ``kid`` are HS256 ones, accepted with ``JWT_ACCEPT_HS256``
+    so switching to ES256 does not log out holders of live tokens.
+    """
+    pyjwt = _pyjwt()
+    kid = pyjwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        if JWT_ALGORITHM != SECRET_ALGORITHM and not JWT_ACCEPT_HS256:
+            raise pyjwt.InvalidTokenError("token without kid")
+        return secret_key, SECRET_ALGORITHM
+
+    key = get_key_ring().get(kid)
+    if key is None:
+        raise pyjwt.InvalidTokenError(f"unknown kid {kid}")
+    return key.public_key, KEY_ALGORITHM
+
+
+def get_username_from_token(token: str, secret_key: str) -> str:
+    return get_payload_from_token(token, secret_key).username
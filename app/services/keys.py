@@ -0,0 +1,133 @@
+"""Key ring of access token signing keys, loaded from ``JWT_KEYS_DIR``.
+
+Every ``<kid>.pem`` file is a P-256 key: private keys sign and verify,
+public keys only verify. To rotate, add a new private key and make it
+the signing one (``JWT_SIGNING_KID``, by default the last kid in sort
+order); keep the old key, or only its public half, until the tokens it
+signed have expired::
+
+    python -m app.services.keys generate --dir keys
+"""
+import argparse
+import base64
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.core.config import JWT_KEYS_DIR, JWT_SIGNING_KID
+
+KEY_ALGORITHM = "ES256"
+_CURVE_NAME = "secp256r1"
+_COORDINATE_SIZE = 32
+
+
+class Key(NamedTuple):
+    kid: str
+    public_key: Any  # EllipticCurvePublicKey
+    private_key: Optional[Any] = None  # EllipticCurvePrivateKey
+
+
+class KeyRing:
+    def __init__(self, keys: List[Key], signing_kid: str = "") -> None:
+        self._keys = {key.kid: key for key in keys}
+        private_kids = sorted(key.kid for key in keys if key.private_key is not None)
+        self._signing_kid = signing_kid or (private_kids[-1] if private_kids else "")
+
+    @classmethod
+    def from_directory(cls, path: str, signing_kid: str = "") -> "KeyRing":
+        keys = []
+        if path:
+            for file_name in sorted(os.listdir(path)):
+                kid, extension = os.path.splitext(file_name)
+                if extension == ".pem":
+                    with open(os.path.join(path, file_name), "rb") as pem_file:
+                        keys.append(_load_key(kid, pem_file.read()))
+
+        return cls(keys, signing_kid)
+
+    @property
+    def signing_key(self) -> Key:
+        key = self._keys.get(self._signing_kid)
+        if key is None or key.private_key is None:
+            raise ValueError(f"no private key for kid {self._signing_kid!r}")
+        return key
+
+    def get(self, kid: str) -> Optional[Key]:
+        return self._keys.get(kid)
+
+    def jwks(self) -> Dict[str, List[Dict[str, str]]]:
+        return {"keys": [_to_jwk(key) for _, key in sorted(self._keys.items())]}
+
+
+@lru_cache()
+def get_key_ring() -> KeyRing:
+    return KeyRing.from_directory(JWT_KEYS_DIR, JWT_SIGNING_KID)
+
+
+def _load_key(kid: str, pem: bytes) -> Key:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+
+    if b"PRIVATE KEY" in pem:
+        private_key = serialization.load_pem_private_key(
+            pem, password=None, backend=default_backend()
+        )
+        key = Key(kid, private_key.public_key(), private_key)
+    else:
+        key = Key(kid, serialization.load_pem_public_key(pem, default_backend()))
+
+    if getattr(getattr(key.public_key, "curve", None), "name", None) != _CURVE_NAME:
+        raise ValueError(f"key {kid} is not a P-256 key, required by {KEY_ALGORITHM}")
+
+    return key
+
+
+def _to_jwk(key: Key) -> Dict[str, str]:
+    numbers = key.public_key.public_numbers()
+    return {
+        "kty": "EC",
+        "crv": "P-256",
+        "x": _base64url(numbers.x),
+        "y": _base64url(numbers.y),
+        "kid": key.kid,
+        "use": "sig",
+        "alg": KEY_ALGORITHM,
+    }
+
+
+def _base64url(coordinate: int) -> str:
+    raw = coordinate.to_bytes(_COORDINATE_SIZE, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def generate_key(directory: str, kid: str = "") -> str:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    kid = kid or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kid}.pem")
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as pem_file:
+        pem_file.write(pem)
+
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage access token signing keys")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate_parser = subparsers.add_parser("generate", help="add a new private key")
+    generate_parser.add_argument("--dir", default=JWT_KEYS_DIR, required=not JWT_KEYS_DIR)
+    generate_parser.add_argument("--kid", default="", help="by default a timestamp")
+    arguments = parser.parse_args()
+
+    print(generate_key(arguments.dir, arguments.kid))
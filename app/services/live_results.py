@@ -0,0 +1,297 @@
+import asyncio
+from typing import (TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict,
+                    Mapping, Optional, Set)
+
+import asyncpg
+from asyncpg.connection import Connection
+from loguru import logger
+
+from app.core import serialization
+from app.core.config import (LIVE_RESULTS_HEARTBEAT_INTERVAL,
+                             LIVE_RESULTS_INTERVAL,
+                             LIVE_RESULTS_MAX_STREAM_SECONDS,
+                             LIVE_RESULTS_MAX_SUBSCRIBERS,
+                             LIVE_RESULTS_RETRY_AFTER)
+from app.db.errors.database import DATABASE_ERRORS
+from app.db.queries.polls import POLL_VOTES_CHANNEL
+from app.services import metrics
+from app.services.errors import LiveResultsOverloadedError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.db.repositories.polls import PollsRepository
+
+HEARTBEAT_FRAME = b":\n\n"
+
+
+def _frame(event: str, poll_id: int, results: Mapping[int, int]) -> bytes:
+    data = serialization.dumps_bytes(
+        {
+            "poll_id": poll_id,
+            "options": [
+                {"id": option_id, "votes": votes}
+                for option_id, votes in results.items()
+            ],
+        }
+    )
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+class Subscription:
+    """One results stream, holds at most the next frame to send"""
+
+    __slots__ = ("poll_id", "frame", "ready", "closed", "expires_at")
+
+    def __init__(self, poll_id: int, frame: bytes, expires_at: float) -> None:
+        self.poll_id = poll_id
+        self.frame: Optional[bytes] = frame
+        self.ready = asyncio.Event()
+        self.ready.set()
+        self.closed = False
+        self.expires_at = expires_at
+
+
+class LiveResultsHub:
+    """Streams poll results to many clients from one LISTEN per worker.
+
+    Polls announced on ``POLL_VOTES_CHANNEL`` are re-read together every
+    ``interval`` seconds and the changed options are sent as ``delta``
+    frames, encoded once per poll. A client that has not taken its last
+    frame yet gets a full ``snapshot`` in place of it, so a slow client
+    costs one pending frame, never a growing queue. Idle streams get a
+    heartbeat comment and are closed after ``max_stream_seconds``, clients
+    reconnect on their own (see ``retry`` of the first frame).
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float,
+        heartbeat_interval: float,
+        max_subscribers: int,
+        max_stream_seconds: float,
+        retry_after: int,
+    ) -> None:
+        self._interval = interval
+        self._heartbeat_interval = heartbeat_interval
+        self._max_subscribers = max_subscribers
+        self._max_stream_seconds = max_stream_seconds
+        self._retry_after = retry_after
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._results: Dict[int, Dict[int, int]] = {}
+        self._dirty: Set[int] = set()
+        self._count = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+        self._frames = metrics.counter(
+            "live_results_frames_total", "Results frames queued to streams"
+        )
+        self._coalesced = metrics.counter(
+            "live_results_coalesced_total",
+            "Frames replaced by a snapshot because the client was slow",
+        )
+        self._publish_errors = metrics.counter(
+            "live_results_publish_errors_total", "Failed reads of voted polls results"
+        )
+        self._listen_errors = metrics.counter(
+            "live_results_listen_errors_total", "Lost or failed LISTEN connections"
+        )
+        metrics.gauge(
+            "live_results_subscribers", "Open results streams", lambda: self._count
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def subscribe(self, poll_id: int, results: Mapping[int, int]) -> Subscription:
+        """Open a stream starting with a snapshot of ``results``"""
+        if self._count >= self._max_subscribers:
+            raise LiveResultsOverloadedError(retry_after=self._retry_after)
+
+        current = self._results.setdefault(poll_id, dict(results))
+        retry = "retry: {0}\n".format(self._retry_after * 1000).encode()
+        subscription = Subscription(
+            poll_id,
+            retry + _frame("snapshot", poll_id, current),
+            asyncio.get_event_loop().time() + self._max_stream_seconds,
+        )
+        self._subscriptions.setdefault(poll_id, set()).add(subscription)
+        self._count += 1
+
+        return subscription
+
+    async def stream(
+        self,
+        subscription: Subscription,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncIterator[bytes]:
+        """Frames of ``subscription`` until it is closed or the client is gone.
+
+        Writes to a gone client do not fail, so ``is_disconnected`` is
+        checked on every wake up, at the latest with the next heartbeat.
+        """
+        try:
+            while True:
+                if not subscription.closed:
+                    await subscription.ready.wait()
+                    subscription.ready.clear()
+                if is_disconnected is not None and await is_disconnected():
+                    return
+
+                frame, subscription.frame = subscription.frame, None
+                if frame is not None:
+                    yield frame
+                elif subscription.closed:
+                    return
+        finally:
+            self._unsubscribe(subscription)
+
+    def notify(self, poll_id: int) -> None:
+        """Mark results of ``poll_id`` as changed, sent with the next frame"""
+        if poll_id in self._subscriptions:
+            self._dirty.add(poll_id)
+
+    async def publish(self, repo: "PollsRepository") -> None:
+        dirty, self._dirty = self._dirty, set()
+        poll_ids = [poll_id for poll_id in dirty if poll_id in self._subscriptions]
+        if not poll_ids:
+            return
+
+        polls_results = await repo.get_polls_results(poll_ids=poll_ids)
+        for poll_id, results in polls_results.items():
+            subscriptions = self._subscriptions.get(poll_id)
+            if not subscriptions:
+                continue
+
+            previous = self._results.get(poll_id, {})
+            changed = {
+                option_id: votes
+                for option_id, votes in results.items()
+                if previous.get(option_id) != votes
+            }
+            self._results[poll_id] = results
+            if changed:
+                self._send(subscriptions, poll_id, changed, results)
+
+    def start(self, repo: "PollsRepository", dsn: Optional[str] = None) -> None:
+        """Start publishing, without ``dsn`` only ``notify`` marks polls"""
+        if not self._tasks:
+            loop = asyncio.get_event_loop()
+            self._tasks.add(loop.create_task(self._run(repo)))
+            if dsn is not None:
+                self._tasks.add(loop.create_task(self._listen(dsn)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                self._close(subscription)
+
+    def _send(
+        self,
+        subscriptions: Set[Subscription],
+        poll_id: int,
+        changed: Mapping[int, int],
+        results: Mapping[int, int],
+    ) -> None:
+        delta = _frame("delta", poll_id, changed)
+        snapshot = None
+        for subscription in subscriptions:
+            if subscription.frame is None or subscription.frame is HEARTBEAT_FRAME:
+                subscription.frame = delta
+            else:
+                if snapshot is None:
+                    snapshot = _frame("snapshot", poll_id, results)
+                subscription.frame = snapshot
+                self._coalesced.inc()
+            subscription.ready.set()
+        self._frames.inc(len(subscriptions))
+
+    def _heartbeat(self) -> None:
+        now = asyncio.get_event_loop().time()
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                if subscription.expires_at <= now:
+                    self._close(subscription)
+                elif subscription.frame is None:
+                    subscription.frame = HEARTBEAT_FRAME
+                    subscription.ready.set()
+
+    def _close(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        subscription.ready.set()
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.poll_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+
+        subscriptions.discard(subscription)
+        self._count -= 1
+        if not subscriptions:
+            del self._subscriptions[subscription.poll_id]
+            self._results.pop(subscription.poll_id, None)
+            self._dirty.discard(subscription.poll_id)
+
+    def _on_notification(
+        self, conn: Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        try:
+            self.notify(int(payload))
+        except ValueError:
+            logger.warning("Unexpected {0} payload: {1!r}", channel, payload)
+
+    async def _run(self, repo: "PollsRepository") -> None:
+        loop = asyncio.get_event_loop()
+        heartbeat_at = loop.time() + self._heartbeat_interval
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.publish(repo)
+            except DATABASE_ERRORS as publish_error:
+                self._publish_errors.inc()
+                logger.warning("Publishing poll results failed: {0}", publish_error)
+            except Exception:
+                self._publish_errors.inc()
+                logger.exception("Publishing poll results failed")
+
+            if loop.time() >= heartbeat_at:
+                self._heartbeat()
+                heartbeat_at = loop.time() + self._heartbeat_interval
+
+    async def _listen(self, dsn: str) -> None:
+        while True:
+            # a connection of its own, LISTEN holds it for the worker lifetime
+            conn: Optional[Connection] = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                await conn.add_listener(POLL_VOTES_CHANNEL, self._on_notification)
+                # votes may have come in while nobody was listening
+                self._dirty.update(self._subscriptions)
+                while not conn.is_closed():
+                    await asyncio.sleep(self._interval)
+            except DATABASE_ERRORS as listen_error:
+                logger.warning("Listening for poll votes failed: {0}", listen_error)
+            except Exception:
+                logger.exception("Listening for poll votes failed")
+            finally:
+                if conn is not None:
+                    conn.terminate()
+            self._listen_errors.inc()
+            await asyncio.sleep(self._retry_after)
+
+
+live_results_hub = LiveResultsHub(
+    interval=LIVE_RESULTS_INTERVAL,
+    heartbeat_interval=LIVE_RESULTS_HEARTBEAT_INTERVAL,
+    max_subscribers=LIVE_RESULTS_MAX_SUBSCRIBERS,
+    max_stream_seconds=LIVE_RESULTS_MAX_STREAM_SECONDS,
+    retry_after=LIVE_RESULTS_RETRY_AFTER,
+)
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import Optional
+
+from loguru import logger
+
+from app.services import metrics
+
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopLagMonitor:
+    """Detects callbacks blocking the event loop.
+
+    Sleeps ``interval`` seconds in a loop, any extra time it takes to wake
+    up is lag caused by something running on the loop without yielding.
+    """
+
+    def __init__(self, *, threshold: float, interval: float) -> None:
+        self._threshold = threshold
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lag = metrics.histogram(
+            "event_loop_lag_seconds", "Event loop wake up delay", LAG_BUCKETS
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            lag = max(0.0, time.perf_counter() - started_at - self._interval)
+            self._lag.observe(lag)
+            if lag > self._threshold:
+                logger.warning(
+                    "Event loop was blocked for {0:.3f}s (threshold {1:.3f}s)",
+                    lag,
+                    self._threshold,
+                )
@@ -0,0 +1,168 @@
+import bisect
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+Labels = Dict[str, str]
+
+
+class Counter:
+    def __init__(
+        self, name: str, documentation: str, labels: Optional[Labels] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Gauge whose value is read from ``function`` at collection time"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Callable[[], float],
+        labels: Optional[Labels] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return float(self._function())
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labels: Optional[Labels] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        cumulative, total = [], 0
+        for bucket_count in self.counts:
+            total += bucket_count
+            cumulative.append(total)
+        return cumulative
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+REGISTRY: Dict[str, Metric] = {}
+
+
+def _key(name: str, labels: Optional[Labels]) -> str:
+    return name + _format_labels(labels or {})
+
+
+def counter(
+    name: str, documentation: str, labels: Optional[Labels] = None,
+) -> Counter:
+    return REGISTRY.setdefault(  # type: ignore
+        _key(name, labels), Counter(name, documentation, labels)
+    )
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    function: Callable[[], float],
+    labels: Optional[Labels] = None,
+) -> Gauge:
+    metric = Gauge(name, documentation, function, labels)
+    REGISTRY[_key(name, labels)] = metric
+    return metric
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+    labels: Optional[Labels] = None,
+) -> Histogram:
+    return REGISTRY.setdefault(  # type: ignore
+        _key(name, labels), Histogram(name, documentation, buckets, labels)
+    )
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format"""
+    families: Dict[str, List[Metric]] = {}
+    for metric in list(REGISTRY.values()):
+        families.setdefault(metric.name, []).append(metric)
+
+    lines: List[str] = []
+    for name, family in sorted(families.items()):
+        lines.append(f"# HELP {name} {family[0].documentation}")
+        lines.append(f"# TYPE {name} {_TYPES[type(family[0])]}")
+        for metric in family:
+            lines.extend(_samples(metric))
+
+    return "\n".join(lines) + "\n"
+
+
+_TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+
+
+def _samples(metric: Metric) -> Iterator[str]:
+    if not isinstance(metric, Histogram):
+        yield f"{metric.name}{_format_labels(metric.labels)} {metric.value}"
+        return
+
+    bounds = [repr(float(bucket)) for bucket in metric.buckets] + ["+Inf"]
+    for bound, cumulative in zip(bounds, metric.cumulative_counts()):
+        labels = _format_labels(dict(metric.labels, le=bound))
+        yield f"{metric.name}_bucket{labels} {cumulative}"
+    yield f"{metric.name}_sum{_format_labels(metric.labels)} {metric.sum}"
+    yield f"{metric.name}_count{_format_labels(metric.labels)} {metric.count}"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(
+        '{0}="{1}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return f"{{{pairs}}}"
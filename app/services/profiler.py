@@ -0,0 +1,129 @@
+"""Sampling profiler for a live worker.
+
+A helper thread walks ``sys._current_frames()`` every ``interval`` seconds,
+so both the event loop thread and executor threads (password hashing,
+migrations) are sampled without instrumenting the code being profiled.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Frame(NamedTuple):
+    name: str
+    file: str
+    line: int
+
+
+Stack = Tuple[Frame, ...]  # root first, the thread name is the root frame
+
+
+class Profile(NamedTuple):
+    samples: Counter  # Counter[Stack]
+    duration: float
+    interval: float
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+_lock = threading.Lock()
+
+
+def _stack(frame: Optional[FrameType], thread_name: str) -> Stack:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(Frame(code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.append(Frame(thread_name, "", 0))
+    frames.reverse()
+    return tuple(frames)
+
+
+def sample(seconds: float, interval: float) -> Profile:
+    """Sample every thread except the sampler itself, blocking the caller.
+
+    Only one profile runs at a time, raises ``ProfilerBusyError`` otherwise.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("profiler is already running")
+
+    try:
+        own_id = threading.get_ident()
+        samples: Counter = Counter()
+        started_at = time.perf_counter()
+        deadline = started_at + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    samples[_stack(frame, names.get(thread_id, str(thread_id)))] += 1
+            time.sleep(interval)
+
+        return Profile(samples, time.perf_counter() - started_at, interval)
+    finally:
+        _lock.release()
+
+
+def _frame_label(frame: Frame) -> str:
+    if not frame.file:
+        return frame.name
+    return f"{frame.name} ({os.path.basename(frame.file)}:{frame.line})"
+
+
+def to_collapsed(profile: Profile) -> str:
+    """Brendan Gregg's collapsed format, as read by flamegraph.pl and speedscope"""
+    lines = (
+        "{0} {1}".format(
+            ";".join(_frame_label(frame).replace(";", ":") for frame in stack), count
+        )
+        for stack, count in profile.samples.most_common()
+    )
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(profile: Profile, name: str = "worker") -> Dict[str, Any]:
+    """Speedscope sampled profile per thread, see speedscope.app file format"""
+    frame_indexes: Dict[Frame, int] = {}
+    by_thread: Dict[str, List[Tuple[Stack, int]]] = {}
+    for stack, count in profile.samples.items():
+        by_thread.setdefault(stack[0].name, []).append((stack[1:], count))
+
+    profiles = []
+    for thread_name, stacks in sorted(by_thread.items()):
+        samples, weights = [], []
+        for stack, count in stacks:
+            samples.append(
+                [frame_indexes.setdefault(frame, len(frame_indexes)) for frame in stack]
+            )
+            weights.append(count * profile.interval)
+        profiles.append(
+            {
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        )
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "app.services.profiler",
+        "shared": {
+            "frames": [
+                {"name": frame.name, "file": frame.file, "line": frame.line}
+                for frame in frame_indexes
+            ]
+        },
+        "profiles": profiles,
+    }
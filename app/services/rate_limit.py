@@ -0,0 +1,208 @@
+import math
+import time
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from loguru import logger
+
+from app.core.config import (CACHE_URL, RATE_LIMIT_BACKEND,
+                             RATE_LIMIT_IDENTITY_BURST,
+                             RATE_LIMIT_IDENTITY_PER_MINUTE,
+                             RATE_LIMIT_IP_BURST, RATE_LIMIT_IP_PER_MINUTE)
+from app.db.cache.base import CacheError
+from app.db.cache.resp import RespCacheBackend
+from app.db.cache.scripts import GCRA_SCRIPT
+from app.services import metrics
+
+
+class TokenBuckets:
+    """In-process token buckets of ``burst`` tokens refilled ``per_minute``.
+
+    Only one float is kept per key. A key is forgotten once its bucket
+    would be full again, which is detected by a wheel of one second
+    slots, swept as time passes. ``hit`` is O(1) amortized, however many
+    keys are kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        per_minute: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._interval = 60.0 / per_minute
+        self._capacity = self._interval * burst
+        self._clock = clock
+        self._tats: Dict[str, float] = {}
+        # a key expires within ``capacity`` seconds, the wheel never laps it
+        self._wheel: List[Set[str]] = [
+            set() for _ in range(math.ceil(self._capacity) + 2)
+        ]
+        self._swept_until = math.floor(clock())
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def hit(self, key: str) -> float:
+        """Take a token, returns 0 or seconds to wait for the next one"""
+        return self.hit_nowait(key)
+
+    def hit_nowait(self, key: str) -> float:
+        now = self._clock()
+        self._sweep(now)
+
+        tat = max(self._tats.get(key, now), now) + self._interval
+        wait = tat - now - self._capacity
+        if wait > 0:
+            return wait
+
+        self._tats[key] = tat
+        self._wheel[math.floor(tat) % len(self._wheel)].add(key)
+        return 0.0
+
+    async def close(self) -> None:
+        """Nothing to release, see ``SharedTokenBuckets.close``"""
+
+    def _sweep(self, now: float) -> None:
+        current = math.floor(now)
+        if current - self._swept_until >= len(self._wheel):
+            self._swept_until = current - len(self._wheel)
+
+        # slots of whole seconds that have passed only
+        while self._swept_until < current:
+            index = self._swept_until % len(self._wheel)
+            slot = self._wheel[index]
+            self._wheel[index] = set()
+            for key in slot:
+                tat = self._tats.get(key)
+                if tat is None:
+                    continue
+                if tat <= now:
+                    del self._tats[key]
+                elif math.floor(tat) % len(self._wheel) == index:
+                    self._wheel[index].add(key)
+            self._swept_until += 1
+
+
+class SharedTokenBuckets:
+    """Token buckets kept in a RESP server, shared by all workers.
+
+    Falls back to the buckets of this worker while the server fails.
+    """
+
+    def __init__(
+        self,
+        backend: RespCacheBackend,
+        *,
+        namespace: str,
+        per_minute: float,
+        burst: int,
+    ) -> None:
+        self._backend = backend
+        self._namespace = namespace
+        self._interval = 60.0 / per_minute
+        self._capacity = self._interval * burst
+        self._fallback = TokenBuckets(per_minute=per_minute, burst=burst)
+        self._errors = metrics.counter(
+            "rate_limit_backend_errors_total",
+            "Rate limit checks answered locally because the backend failed",
+        )
+
+    async def hit(self, key: str) -> float:
+        try:
+            wait = await self._backend.eval(
+                GCRA_SCRIPT,
+                [f"{self._namespace}:{key}"],
+                repr(time.time()),
+                repr(self._interval),
+                repr(self._capacity),
+            )
+        except CacheError as cache_error:
+            self._errors.inc()
+            logger.warning("Rate limit backend is unavailable: {0}", cache_error)
+            return self._fallback.hit_nowait(key)
+
+        return float(wait)  # type: ignore
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+
+Buckets = Union[TokenBuckets, SharedTokenBuckets]
+
+
+class RateLimiter:
+    """Token buckets per client IP and per identity (login or email)"""
+
+    def __init__(
+        self, by_ip: Optional[Buckets], by_identity: Optional[Buckets]
+    ) -> None:
+        self._by_ip = by_ip
+        self._by_identity = by_identity
+        self._rejected = {
+            kind: metrics.counter(
+                "rate_limit_rejected_total",
+                "Requests rejected by rate limits",
+                labels={"key": kind},
+            )
+            for kind in ("ip", "identity")
+        }
+
+    async def check(self, *, ip: str, identity: Optional[str]) -> float:
+        """Returns 0 if allowed or seconds after which to retry"""
+        if self._by_ip is not None:
+            wait = await self._by_ip.hit(ip)
+            if wait:
+                self._rejected["ip"].inc()
+                return wait
+
+        if self._by_identity is not None and identity:
+            wait = await self._by_identity.hit(identity.lower())
+            if wait:
+                self._rejected["identity"].inc()
+                return wait
+
+        return 0.0
+
+    async def close(self) -> None:
+        for buckets in (self._by_ip, self._by_identity):
+            if buckets is not None:
+                await buckets.close()
+
+
+def _create_rate_limiter() -> RateLimiter:
+    if RATE_LIMIT_BACKEND == "none":
+        return RateLimiter(None, None)
+
+    if RATE_LIMIT_BACKEND == "memory":
+        return RateLimiter(
+            TokenBuckets(
+                per_minute=RATE_LIMIT_IP_PER_MINUTE, burst=RATE_LIMIT_IP_BURST
+            ),
+            TokenBuckets(
+                per_minute=RATE_LIMIT_IDENTITY_PER_MINUTE,
+                burst=RATE_LIMIT_IDENTITY_BURST,
+            ),
+        )
+
+    if RATE_LIMIT_BACKEND == "redis":
+        backend = RespCacheBackend(str(CACHE_URL))
+        return RateLimiter(
+            SharedTokenBuckets(
+                backend,
+                namespace="rate:ip",
+                per_minute=RATE_LIMIT_IP_PER_MINUTE,
+                burst=RATE_LIMIT_IP_BURST,
+            ),
+            SharedTokenBuckets(
+                backend,
+                namespace="rate:identity",
+                per_minute=RATE_LIMIT_IDENTITY_PER_MINUTE,
+                burst=RATE_LIMIT_IDENTITY_BURST,
+            ),
+        )
+
+    raise ValueError(f"unsupported rate limit backend: {RATE_LIMIT_BACKEND}")
+
+
+rate_limiter = _create_rate_limiter()
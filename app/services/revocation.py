@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from loguru import logger
+
+from app.core.config import (REVOCATION_ERROR_RATE,
+                             REVOCATION_REBUILD_INTERVAL,
+                             REVOCATION_SYNC_INTERVAL)
+from app.db.errors.database import DATABASE_ERRORS
+from app.services import metrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.db.repositories.tokens import TokensRepository
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# re-read a bit of already synced history, rows are not committed in
+# ``revoked_at`` order and adding a jti twice is harmless
+_SYNC_OVERLAP = timedelta(seconds=10)
+_MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # double hashing, two 64 bit halves of one digest give all positions
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+
+class RevocationSet:
+    """Bloom filter of revoked access token ``jti``s, synced from the db.
+
+    Tokens are checked in memory only: a miss means not revoked, a hit
+    is confirmed with ``revoked_tokens``. Rows are synced incrementally
+    every ``sync_interval`` seconds; every ``rebuild_interval`` the filter
+    is rebuilt without expired tokens and sized to the current count, and
+    one of the workers deletes expired rows.
+    """
+
+    def __init__(
+        self, *, error_rate: float, sync_interval: float, rebuild_interval: float,
+    ) -> None:
+        self._error_rate = error_rate
+        self._sync_interval = sync_interval
+        self._rebuild_interval = rebuild_interval
+        self._filter = BloomFilter(_MIN_CAPACITY, error_rate)
+        self._count = 0
+        self._synced_until = _EPOCH
+        self._rebuilt_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._sync_errors = metrics.counter(
+            "revocation_sync_errors_total", "Failed syncs of revoked tokens"
+        )
+        metrics.gauge(
+            "revocation_set_size",
+            "Revoked tokens added to the bloom filter, approximately",
+            lambda: self._count,
+        )
+
+    def might_contain(self, jti: str) -> bool:
+        return jti in self._filter
+
+    def add(self, jtis: Iterable[str]) -> None:
+        for jti in jtis:
+            self._filter.add(jti)
+            self._count += 1
+
+    async def load(self, repo: "TokensRepository") -> None:
+        """First ``rebuild``, on database errors it is retried by the sync job.
+
+        Until then the filter is empty, so revoked tokens are accepted.
+        """
+        try:
+            await self.rebuild(repo)
+        except DATABASE_ERRORS as rebuild_error:
+            self._sync_errors.inc()
+            logger.warning("Loading revoked tokens failed: {0}", rebuild_error)
+
+    async def rebuild(self, repo: "TokensRepository") -> None:
+        records = await repo.get_revoked_since(since=_EPOCH)
+
+        bloom = BloomFilter(max(_MIN_CAPACITY, len(records) * 2), self._error_rate)
+        for record in records:
+            bloom.add(record["jti"])
+
+        self._filter, self._count = bloom, len(records)
+        self._synced_until = max(
+            (record["revoked_at"] for record in records), default=_EPOCH
+        )
+        self._rebuilt_at = time.monotonic()
+
+    async def sync(self, repo: "TokensRepository") -> None:
+        records = await repo.get_revoked_since(since=self._synced_until - _SYNC_OVERLAP)
+        for record in records:
+            self._filter.add(record["jti"])
+            if record["revoked_at"] > self._synced_until:
+                self._count += 1
+        self._synced_until = max(
+            (record["revoked_at"] for record in records), default=self._synced_until
+        )
+
+    def start(self, repo: "TokensRepository") -> None:
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run(repo))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _rebuild_is_due(self) -> bool:
+        if self._rebuilt_at is None:
+            return True
+
+        return time.monotonic() - self._rebuilt_at >= self._rebuild_interval
+
+    async def _run(self, repo: "TokensRepository") -> None:
+        while True:
+            await asyncio.sleep(self._sync_interval)
+            try:
+                if self._rebuild_is_due():
+                    await self.rebuild(repo)
+                    await repo.purge_expired()
+                else:
+                    await self.sync(repo)
+            except DATABASE_ERRORS as sync_error:
+                self._sync_errors.inc()
+                logger.warning("Revoked tokens sync failed: {0}", sync_error)
+            except Exception:
+                self._sync_errors.inc()
+                logger.exception("Revoked tokens sync failed")
+
+
+revocation_set = RevocationSet(
+    error_rate=REVOCATION_ERROR_RATE,
+    sync_interval=REVOCATION_SYNC_INTERVAL,
+    rebuild_interval=REVOCATION_REBUILD_INTERVAL,
+)
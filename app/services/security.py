@@ -1,6 +1,27 @@
-from passlib.context import CryptContext
+import asyncio
+import time
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import (PASSWORD_HASHER_EXECUTOR,
+                             PASSWORD_HASHER_QUEUE_SIZE,
+                             PASSWORD_HASHER_RETRY_AFTER,
+                             PASSWORD_HASHER_WORKERS)
+from app.services import metrics, timing
+from app.services.errors import PasswordHasherOverloadedError
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context() -> "CryptContext":
+    # passlib and bcrypt are loaded by the first hashing job, in a worker
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 # def generate_salt() -> str:
@@ -8,8 +29,125 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+def _run_timed(function: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    # time.monotonic is system-wide, so the start mark is comparable
+    # even when the job runs in a worker process
+    started_at = time.monotonic()
+    return function(*args), started_at
+
+
+class PasswordHasher:
+    """Runs bcrypt in a worker pool so it never blocks the event loop.
+
+    At most ``workers + queue_size`` jobs are admitted at once, any job
+    above that is rejected with 503 and ``Retry-After``.
+    """
+
+    def __init__(
+        self, *, executor: str, workers: int, queue_size: int, retry_after: int,
+    ) -> None:
+        if executor not in {"thread", "process"}:
+            raise ValueError(f"unsupported password hasher executor: {executor}")
+
+        self._executor_type = executor
+        self._workers = workers
+        self._capacity = workers + queue_size
+        self._retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+        self._rejected = metrics.counter(
+            "password_hasher_rejected_total",
+            "Password hashing jobs rejected because the queue was full",
+        )
+        self._queue_wait = metrics.histogram(
+            "password_hasher_queue_wait_seconds",
+            "Time password hashing jobs spent waiting for a worker",
+        )
+        self._latency = metrics.histogram(
+            "password_hasher_latency_seconds",
+            "Total time of password hashing jobs including queue wait",
+        )
+        metrics.gauge(
+            "password_hasher_in_flight",
+            "Password hashing jobs admitted and not yet finished",
+            lambda: self._in_flight,
+        )
+        metrics.gauge(
+            "password_hasher_queue_depth",
+            "Password hashing jobs waiting for a free worker",
+            lambda: self.queue_depth,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self._workers)
+
+    @timing.timed("password_hash")
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    @timing.timed("password_verify")
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="password-hasher"
+                )
+
+        return self._executor
+
+    async def _submit(self, function: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self._capacity:
+            self._rejected.inc()
+            raise PasswordHasherOverloadedError(retry_after=self._retry_after)
+
+        loop = asyncio.get_event_loop()
+        submitted_at = time.monotonic()
+        job = self._get_executor().submit(_run_timed, function, *args)
+        self._in_flight += 1
+        # a cancelled caller does not stop a running job, so the slot is
+        # only freed once the executor is done with it
+        job.add_done_callback(lambda done: self._on_job_done(loop, done))
+        result, started_at = await asyncio.wrap_future(job)
+
+        self._queue_wait.observe(started_at - submitted_at)
+        self._latency.observe(time.monotonic() - submitted_at)
+
+        return result
+
+    def _on_job_done(self, loop: asyncio.AbstractEventLoop, job: Future) -> None:
+        # called from an executor thread
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # the loop is closed, nothing is admitted anymore
+            pass
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+
+
+password_hasher = PasswordHasher(
+    executor=PASSWORD_HASHER_EXECUTOR,
+    workers=PASSWORD_HASHER_WORKERS,
+    queue_size=PASSWORD_HASHER_QUEUE_SIZE,
+    retry_after=PASSWORD_HASHER_RETRY_AFTER,
+)
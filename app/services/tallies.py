@@ -0,0 +1,80 @@
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+from loguru import logger
+
+from app.db.errors.database import DATABASE_ERRORS
+from app.services import metrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.db.repositories.polls import PollsRepository
+
+
+class TallyReconciler:
+    """Periodically checks poll tallies against raw votes.
+
+    Tallies are only ever incremented together with the votes they count,
+    so drift means a bug or a manual change of ``votes``; it is fixed and
+    logged. Polls are checked ``batch_size`` at a time, each batch in its
+    own transaction bounded by ``timeout``; workers running at the same
+    time skip the polls locked by each other.
+    """
+
+    def __init__(self, *, interval: float, batch_size: int, timeout: float) -> None:
+        self._interval = interval
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._task: Optional[asyncio.Task] = None
+        self._drifted = metrics.counter(
+            "poll_tallies_drifted_total", "Option tallies fixed by reconciliation"
+        )
+        self._errors = metrics.counter(
+            "poll_tallies_reconcile_errors_total", "Failed tally reconciliations"
+        )
+
+    async def reconcile(self, repo: "PollsRepository") -> int:
+        fixed = 0
+        after_poll_id: Optional[int] = 0
+        while after_poll_id is not None:
+            after_poll_id, records = await repo.reconcile_tallies(
+                after_poll_id=after_poll_id,
+                batch_size=self._batch_size,
+                timeout=self._timeout,
+            )
+            for record in records:
+                logger.warning(
+                    "Tally of option {0} in poll {1} drifted: {2} counted, {3} tallied",
+                    record["option_id"],
+                    record["poll_id"],
+                    record["votes"],
+                    record["tallied_votes"],
+                )
+            self._drifted.inc(len(records))
+            fixed += len(records)
+
+        return fixed
+
+    def start(self, repo: "PollsRepository") -> None:
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run(repo))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, repo: "PollsRepository") -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.reconcile(repo)
+            except DATABASE_ERRORS as reconcile_error:
+                self._errors.inc()
+                logger.warning("Tallies reconciliation failed: {0}", reconcile_error)
+            except Exception:
+                self._errors.inc()
+                logger.exception("Tallies reconciliation failed")
@@ -0,0 +1,102 @@
+"""Lightweight per-request timing spans.
+
+Spans add up per stage into the current request (see
+``app.api.middleware.ServerTimingMiddleware``) and feed the
+``request_stage_seconds`` histogram. With ``METRICS_ENABLED`` off the
+``timed`` decorator returns functions untouched, so spans cost nothing.
+"""
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from app.core.config import METRICS_ENABLED
+from app.services import metrics
+
+Timings = Dict[str, float]
+
+FunctionType = TypeVar("FunctionType", bound=Callable[..., Any])
+
+_request_timings: ContextVar[Optional[Timings]] = ContextVar(
+    "request_timings", default=None
+)
+_stage_histograms: Dict[str, metrics.Histogram] = {}
+
+
+def start_request() -> Token:
+    return _request_timings.set({})
+
+
+def finish_request(token: Token) -> Timings:
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def current_timings() -> Optional[Timings]:
+    return _request_timings.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    if not METRICS_ENABLED:
+        return
+
+    histogram = _stage_histograms.get(stage)
+    if histogram is None:
+        histogram = _stage_histograms[stage] = metrics.histogram(
+            "request_stage_seconds",
+            "Time spent per stage of request handling",
+            labels={"stage": stage},
+        )
+    histogram.observe(seconds)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started_at)
+
+
+def timed(stage: str) -> Callable[[FunctionType], FunctionType]:
+    def decorator(function: FunctionType) -> FunctionType:
+        if not METRICS_ENABLED:
+            return function
+
+        if asyncio.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                started_at = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    record(stage, time.perf_counter() - started_at)
+
+            return async_wrapper  # type: ignore
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - started_at)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def format_server_timing(timings: Timings) -> str:
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()
+    )
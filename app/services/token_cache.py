@@ -0,0 +1,100 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+
+from app.core.config import TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL_SECONDS
+from app.models.domain.users import UserRecord
+from app.models.schemas.jwt import JWTPayload
+from app.services import metrics
+
+
+class CachedToken(NamedTuple):
+    claims: JWTPayload
+    user: UserRecord
+    expires_at: float
+
+
+class TokenCache:
+    """TTL+LRU cache of verified access tokens keyed by the token digest.
+
+    An entry lives until the token ``exp`` or ``ttl`` seconds, whichever
+    comes first, so a worker that missed an invalidation converges quickly.
+    """
+
+    def __init__(self, *, max_size: int, ttl: int) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: "OrderedDict[bytes, CachedToken]" = OrderedDict()
+        self._digests_by_username: Dict[str, Set[bytes]] = {}
+
+        self._hits = metrics.counter(
+            "token_cache_hits_total", "Access tokens served from the token cache"
+        )
+        self._misses = metrics.counter(
+            "token_cache_misses_total", "Access tokens verified and loaded from db"
+        )
+        metrics.gauge(
+            "token_cache_size", "Entries in the token cache", lambda: len(self)
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        if not self._max_size:
+            return None
+
+        digest = _digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self._misses.inc()
+            return None
+
+        if entry.expires_at <= time.time():
+            self._remove(digest)
+            self._misses.inc()
+            return None
+
+        self._entries.move_to_end(digest)
+        self._hits.inc()
+        return entry
+
+    def set(self, token: str, claims: JWTPayload, user: UserRecord) -> None:
+        if not self._max_size:
+            return
+
+        expires_at = min(claims.exp.timestamp(), time.time() + self._ttl)
+        digest = _digest(token)
+        self._remove(digest)
+        self._entries[digest] = CachedToken(claims, user, expires_at)
+        self._digests_by_username.setdefault(user.username, set()).add(digest)
+
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str) -> None:
+        for digest in self._digests_by_username.pop(username, set()):
+            self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._digests_by_username.clear()
+
+    def _remove(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+
+        digests = self._digests_by_username.get(entry.user.username)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._digests_by_username[entry.user.username]
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+token_cache = TokenCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
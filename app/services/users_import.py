@@ -0,0 +1,405 @@
+"""Bulk users import and export: ``python -m app.services.users_import``
+
+    python -m app.services.users_import import users.csv
+    python -m app.services.users_import export --format ndjson --hashes > users.ndjson
+
+CSV needs a header row naming its columns, NDJSON is one object per line.
+Both take ``username``, ``email``, ``bio``, ``image`` and either
+``password`` or a bcrypt ``hashed_password``, so exports can be imported.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.core import serialization
+from app.core.config import (USERS_EXPORT_PREFETCH, USERS_IMPORT_BATCH_SIZE,
+                             USERS_IMPORT_WORKERS)
+from app.db.repositories.users import (ImportRow, UsersRepository,
+                                       normalize_email)
+from app.models.schemas.users import UserInImport
+from app.services import metrics
+from app.services.security import get_password_hash
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = ("username", "email", "bio", "image")
+
+# rows listed in a report, the counts are always complete
+_MAX_REPORTED_ROWS = 1000
+_READ_CHUNK_SIZE = 64 * 1024
+# a quoted CSV value spanning more is taken for a stray quote
+_MAX_RECORD_LINES = 100
+_MAX_RECORD_LENGTH = 64 * 1024
+_NOT_UTF8 = "not valid UTF-8"
+
+
+class ImportBusyError(RuntimeError):
+    """Another import is running in this worker"""
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.imported = 0
+        self.conflicts = 0
+        self.invalid = 0
+        self.conflicting_rows: List[Dict[str, Any]] = []
+        self.invalid_rows: List[Dict[str, Any]] = []
+
+    def add_conflict(self, line: int, username: str, email: str) -> None:
+        self.conflicts += 1
+        if len(self.conflicting_rows) < _MAX_REPORTED_ROWS:
+            self.conflicting_rows.append(
+                {"line": line, "username": username, "email": email}
+            )
+
+    def add_invalid(self, line: int, error: str) -> None:
+        self.invalid += 1
+        if len(self.invalid_rows) < _MAX_REPORTED_ROWS:
+            self.invalid_rows.append({"line": line, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "conflicts": self.conflicts,
+            "invalid": self.invalid,
+            "conflicting_rows": self.conflicting_rows,
+            "invalid_rows": self.invalid_rows,
+        }
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    # one job per chunk, a job per password would cost a pickling round trip
+    return [get_password_hash(password) for password in passwords]
+
+
+async def read_records(
+    chunks: AsyncIterator[bytes], input_format: str,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Yields ``(line, fields)``, fields is an error message if unreadable"""
+    lines = _iter_lines(chunks)
+    if input_format == "ndjson":
+        async for line, text in lines:
+            if text is None:
+                yield line, _NOT_UTF8
+                continue
+            if not text.strip():
+                continue
+            try:
+                fields = json.loads(text)
+            except ValueError as decode_error:
+                yield line, str(decode_error)
+                continue
+            yield line, fields if isinstance(fields, dict) else "not an object"
+        return
+
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    first_line = length = quotes = 0
+    async for line, text in lines:
+        if text is None:
+            # the record can not be completed, it is reported from its start
+            yield first_line if record else line, _NOT_UTF8
+            record, length, quotes = [], 0, 0
+            continue
+        if not record:
+            if not text.strip():
+                continue
+            first_line = line
+        record.append(text)
+        length += len(text)
+        quotes += text.count('"')
+        # quoted values may span lines, a record ends with balanced quotes
+        if quotes % 2:
+            if len(record) < _MAX_RECORD_LINES and length < _MAX_RECORD_LENGTH:
+                continue
+            yield first_line, f"unterminated quoted value in lines {first_line}-{line}"
+            record, length, quotes = [], 0, 0
+            continue
+
+        values = next(csv.reader(["\n".join(record)]))
+        record, length, quotes = [], 0, 0
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield first_line, f"expected {len(header)} values, got {len(values)}"
+        else:
+            yield first_line, {
+                name: value or None for name, value in zip(header, values)
+            }
+
+    if record:
+        yield first_line, "unterminated quoted value"
+
+
+async def _iter_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Numbered lines, ``None`` for a line that is not valid UTF-8"""
+    line = 0
+    rest = b""
+    async for chunk in chunks:
+        *complete, rest = (rest + chunk).split(b"\n")
+        for raw in complete:
+            line += 1
+            yield line, _decode(raw, line)
+
+    if rest:
+        yield line + 1, _decode(rest, line + 1)
+
+
+def _decode(raw: bytes, line: int) -> Optional[str]:
+    try:
+        return raw.decode("utf-8-sig" if line == 1 else "utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+
+class UsersImporter:
+    """Validates, hashes and COPYs users in batches of ``batch_size``.
+
+    Passwords are hashed by ``workers`` processes while the previous batch
+    is being loaded, rows with a bcrypt ``hashed_password`` skip hashing.
+    Rows whose username or email is taken, by a user or by an earlier row,
+    are skipped and reported. Each batch is committed on its own, so an
+    interrupted import can be run again and reports the loaded rows as
+    conflicts.
+    """
+
+    def __init__(self, *, batch_size: int, workers: int) -> None:
+        self._batch_size = batch_size
+        self._workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._busy = False
+
+        self._rows = {
+            result: metrics.counter(
+                "users_import_rows_total",
+                "Rows read by bulk users imports",
+                labels={"result": result},
+            )
+            for result in ("imported", "conflict", "invalid")
+        }
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    async def run(
+        self, repo: UsersRepository, chunks: AsyncIterator[bytes], input_format: str,
+    ) -> ImportReport:
+        if self._busy:
+            raise ImportBusyError
+        self._busy = True
+
+        report = ImportReport()
+        records = read_records(chunks, input_format)
+        pending: Optional["asyncio.Future[List[ImportRow]]"] = None
+        try:
+            async for batch in self._batches(records, report):
+                # the next batch is read and hashed while this one is loaded
+                prepared, pending = pending, asyncio.ensure_future(self._prepare(batch))
+                if prepared is not None:
+                    await self._load(repo, await prepared, report)
+
+            if pending is not None:
+                prepared, pending = pending, None
+                await self._load(repo, await prepared, report)
+        finally:
+            if pending is not None:
+                pending.cancel()
+            self._busy = False
+
+        return report
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _batches(
+        self, records: AsyncIterator[Tuple[int, Any]], report: ImportReport,
+    ) -> AsyncIterator[List[Tuple[int, UserInImport]]]:
+        batch: List[Tuple[int, UserInImport]] = []
+        usernames: Set[str] = set()
+        emails: Set[str] = set()
+        async for line, fields in records:
+            if isinstance(fields, str):
+                report.add_invalid(line, fields)
+                self._rows["invalid"].inc()
+                continue
+
+            try:
+                user = UserInImport(**fields)
+            except (TypeError, ValidationError) as validation_error:
+                report.add_invalid(line, str(validation_error).replace("\n", " "))
+                self._rows["invalid"].inc()
+                continue
+
+            username, email = user.username.lower(), normalize_email(user.email)
+            if username in usernames or email in emails:
+                report.add_conflict(line, user.username, user.email)
+                self._rows["conflict"].inc()
+                continue
+
+            usernames.add(username)
+            emails.add(email)
+            batch.append((line, user))
+            if len(batch) >= self._batch_size:
+                yield batch
+                batch, usernames, emails = [], set(), set()
+
+        if batch:
+            yield batch
+
+    async def _prepare(self, batch: List[Tuple[int, UserInImport]]) -> List[ImportRow]:
+        passwords = [user.password for _, user in batch if user.password]
+        hashes = iter(await self._hash(passwords))
+
+        return [
+            (
+                line,
+                user.username,
+                user.email,
+                user.hashed_password or next(hashes),
+                user.bio or "",
+                user.image,
+            )
+            for line, user in batch
+        ]
+
+    async def _hash(self, passwords: List[str]) -> List[str]:
+        if not passwords:
+            return []
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+
+        loop = asyncio.get_event_loop()
+        size = -(-len(passwords) // self._workers)
+        jobs = []
+        for start in range(0, len(passwords), size):
+            end = start + size
+            jobs.append(
+                loop.run_in_executor(
+                    self._executor, _hash_passwords, passwords[start:end]
+                )
+            )
+        hashed_chunks = await asyncio.gather(*jobs)
+
+        return [hashed for chunk in hashed_chunks for hashed in chunk]
+
+    async def _load(
+        self, repo: UsersRepository, rows: List[ImportRow], report: ImportReport,
+    ) -> None:
+        conflicts = await repo.import_users(rows)
+        for conflict in conflicts:
+            report.add_conflict(
+                conflict["line"], conflict["username"], conflict["email"]
+            )
+
+        report.imported += len(rows) - len(conflicts)
+        self._rows["imported"].inc(len(rows) - len(conflicts))
+        self._rows["conflict"].inc(len(conflicts))
+
+
+async def export_users(
+    repo: UsersRepository,
+    output_format: str,
+    *,
+    hashes: bool = False,
+    prefetch: int = USERS_EXPORT_PREFETCH,
+) -> AsyncIterator[bytes]:
+    """Users as CSV or NDJSON chunks of about ``prefetch`` rows each"""
+    fields = (EXPORT_FIELDS + ("hashed_password",)) if hashes else EXPORT_FIELDS
+    if output_format == "csv":
+        yield _csv_rows([fields])
+
+    rows: List[Tuple[Any, ...]] = []
+    async for record in repo.export_users(prefetch=prefetch):
+        rows.append(tuple(record[field] for field in fields))
+        if len(rows) >= prefetch:
+            yield _encode(output_format, fields, rows)
+            rows = []
+
+    if rows:
+        yield _encode(output_format, fields, rows)
+
+
+def _encode(output_format: str, fields: Tuple[str, ...], rows: List[Tuple]) -> bytes:
+    if output_format == "csv":
+        return _csv_rows(rows)
+
+    return b"".join(
+        serialization.dumps_bytes(dict(zip(fields, row))) + b"\n" for row in rows
+    )
+
+
+def _csv_rows(rows: List[Tuple]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+users_importer = UsersImporter(
+    batch_size=USERS_IMPORT_BATCH_SIZE, workers=USERS_IMPORT_WORKERS
+)
+
+
+async def _read_file(path: str) -> AsyncIterator[bytes]:
+    with (open(path, "rb") if path != "-" else sys.stdin.buffer) as source:
+        for chunk in iter(lambda: source.read(_READ_CHUNK_SIZE), b""):
+            yield chunk
+
+
+async def _main(arguments: argparse.Namespace) -> None:
+    import asyncpg
+
+    from app.core.config import DATABASE_URL
+    from app.db.repositories.cache import users_cache
+
+    conn = await asyncpg.connect(str(DATABASE_URL))
+    try:
+        repo = UsersRepository(conn)
+        if arguments.command == "import":
+            input_format = arguments.format or (
+                "csv" if arguments.path.endswith(".csv") else "ndjson"
+            )
+            report = await users_importer.run(
+                repo, _read_file(arguments.path), input_format
+            )
+            print(json.dumps(report.as_dict(), indent=2))
+        else:
+            output = sys.stdout.buffer
+            async for chunk in export_users(
+                repo, arguments.format or "ndjson", hashes=arguments.hashes
+            ):
+                output.write(chunk)
+            output.flush()
+    finally:
+        await conn.close()
+        users_importer.shutdown()
+        if users_cache is not None:
+            await users_cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="load users from a file")
+    import_parser.add_argument("path", help="CSV or NDJSON file, - for stdin")
+    import_parser.add_argument("--format", choices=FORMATS)
+    export_parser = commands.add_parser("export", help="write users to stdout")
+    export_parser.add_argument("--format", choices=FORMATS)
+    export_parser.add_argument(
+        "--hashes", action="store_true", help="include password hashes"
+    )
+
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import (VOTE_BUFFER_MAX_PENDING, VOTE_FLUSH_INTERVAL,
+                             VOTE_FLUSH_SIZE, VOTE_RETRY_AFTER)
+from app.db.errors.database import DATABASE_ERRORS
+from app.models.domain.polls import Vote
+from app.services import metrics
+from app.services.errors import VotesOverloadedError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.db.repositories.polls import PollsRepository
+
+_SHUTDOWN_FLUSH_ATTEMPTS = 3
+
+
+class VoteBuffer:
+    """Accepts votes in memory and writes them to Postgres in batches.
+
+    A batch is flushed every ``flush_interval`` seconds or as soon as
+    ``flush_size`` votes are pending. A failed batch is put back and
+    retried, inserts are idempotent, so votes are stored at least once
+    for as long as the worker runs; pending votes are flushed on stop.
+    Only the first vote of a user in a poll is kept, here and in the db.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float,
+        flush_size: int,
+        max_pending: int,
+        retry_after: int,
+    ) -> None:
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._max_pending = max_pending
+        self._retry_after = retry_after
+        self._pending: Dict[Tuple[int, int], Vote] = {}
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._accepted = metrics.counter(
+            "votes_accepted_total", "Votes accepted into the vote buffer"
+        )
+        self._rejected = metrics.counter(
+            "votes_rejected_total", "Votes rejected because the buffer was full"
+        )
+        self._stored = metrics.counter("votes_stored_total", "New votes stored in db")
+        self._flush_errors = metrics.counter(
+            "votes_flush_errors_total", "Vote batches that failed and were requeued"
+        )
+        self._flush_latency = metrics.histogram(
+            "votes_flush_seconds", "Time to store one batch of votes"
+        )
+        metrics.gauge("votes_pending", "Votes waiting to be flushed", lambda: len(self))
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, vote: Vote) -> None:
+        key = (vote.poll_id, vote.user_id)
+        if key not in self._pending and len(self._pending) >= self._max_pending:
+            self._rejected.inc()
+            raise VotesOverloadedError(retry_after=self._retry_after)
+
+        self._pending.setdefault(key, vote)
+        self._accepted.inc()
+        if len(self._pending) >= self._flush_size and self._flush_requested is not None:
+            self._flush_requested.set()
+
+    async def flush(self, repo: "PollsRepository") -> int:
+        """Store pending votes in batches of ``flush_size``"""
+        stored = 0
+        while self._pending:
+            batch = self._take_batch()
+            started_at = time.perf_counter()
+            try:
+                batch_stored = await repo.insert_votes(batch)
+            except BaseException:
+                self._requeue(batch)
+                raise
+            finally:
+                self._flush_latency.observe(time.perf_counter() - started_at)
+
+            self._stored.inc(batch_stored)
+            stored += batch_stored
+
+        return stored
+
+    def start(self, repo: "PollsRepository") -> None:
+        if self._task is None:
+            self._flush_requested = asyncio.Event()
+            self._task = asyncio.get_event_loop().create_task(
+                self._run(repo, self._flush_requested)
+            )
+
+    async def stop(self, repo: "PollsRepository") -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for _ in range(_SHUTDOWN_FLUSH_ATTEMPTS):
+            try:
+                await self.flush(repo)
+                return
+            except DATABASE_ERRORS as flush_error:
+                self._flush_errors.inc()
+                logger.warning("Flushing votes on shutdown failed: {0}", flush_error)
+        if self._pending:
+            logger.error("Dropped {0} votes on shutdown", len(self._pending))
+
+    async def _run(
+        self, repo: "PollsRepository", flush_requested: asyncio.Event
+    ) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(flush_requested.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            flush_requested.clear()
+
+            try:
+                await self.flush(repo)
+            except DATABASE_ERRORS as flush_error:
+                self._flush_errors.inc()
+                logger.warning(
+                    "Flushing votes failed, {0} votes requeued: {1}",
+                    len(self._pending),
+                    flush_error,
+                )
+                await asyncio.sleep(self._flush_interval)
+            except Exception:
+                # the flusher must outlive any bug, or votes pile up unwritten
+                self._flush_errors.inc()
+                logger.exception(
+                    "Flushing votes failed, {0} votes requeued", len(self._pending)
+                )
+                await asyncio.sleep(self._flush_interval)
+
+    def _take_batch(self) -> List[Vote]:
+        if len(self._pending) <= self._flush_size:
+            batch = list(self._pending.values())
+            self._pending = {}
+            return batch
+
+        keys = list(self._pending)[: self._flush_size]
+        return [self._pending.pop(key) for key in keys]
+
+    def _requeue(self, batch: List[Vote]) -> None:
+        # votes of the batch came first, they win over newer duplicates
+        pending = {(vote.poll_id, vote.user_id): vote for vote in batch}
+        for key, vote in self._pending.items():
+            pending.setdefault(key, vote)
+        self._pending = pending
+
+
+vote_buffer = VoteBuffer(
+    flush_interval=VOTE_FLUSH_INTERVAL,
+    flush_size=VOTE_FLUSH_SIZE,
+    max_pending=VOTE_BUFFER_MAX_PENDING,
+    retry_after=VOTE_RETRY_AFTER,
+)
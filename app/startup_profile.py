@@ -0,0 +1,132 @@
+"""Report where worker startup time goes: ``python -m app.startup_profile``
+
+Import time is measured in a fresh interpreter with ``-X importtime``.
+With ``--hooks`` the startup/shutdown handlers of ``app.main.app`` are
+also run, which needs the configured database to be reachable.
+"""
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure_imports(target: str = "app.main") -> List[ImportTiming]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(
+                ImportTiming(module, int(self_us), int(cumulative_us), len(indent) // 2)
+            )
+
+    return timings
+
+
+def summarize_imports(
+    timings: List[ImportTiming], target: str = "app.main", top: int = 15,
+) -> Dict[str, Any]:
+    by_package: Dict[str, int] = defaultdict(int)
+    for timing in timings:
+        by_package[timing.module.split(".")[0]] += timing.self_us
+
+    total_us = next(
+        (timing.cumulative_us for timing in timings if timing.module == target), 0
+    )
+    slowest = sorted(timings, key=lambda timing: timing.self_us, reverse=True)[:top]
+    app_modules = sorted(
+        (timing for timing in timings if timing.module.startswith("app.")),
+        key=lambda timing: timing.cumulative_us,
+        reverse=True,
+    )[:top]
+
+    return {
+        "total_ms": total_us / 1000,
+        "packages_ms": {
+            package: self_us / 1000
+            for package, self_us in sorted(
+                by_package.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        },
+        "slowest_modules_ms": {
+            timing.module: timing.self_us / 1000 for timing in slowest
+        },
+        "app_modules_ms": {
+            timing.module: timing.cumulative_us / 1000 for timing in app_modules
+        },
+    }
+
+
+async def measure_hooks() -> Dict[str, Any]:
+    from app.main import app
+
+    hooks: Dict[str, float] = {}
+    for stage, handlers in (
+        ("startup", app.router.on_startup),
+        ("shutdown", app.router.on_shutdown),
+    ):
+        for handler in handlers:
+            started_at = time.perf_counter()
+            await handler()
+            hooks[f"{stage}:{handler.__module__}.{handler.__qualname__}"] = (
+                time.perf_counter() - started_at
+            ) * 1000
+
+    steps = getattr(app.state, "startup_timings", {})
+    return {
+        "hooks_ms": hooks,
+        "startup_steps_ms": {step: seconds * 1000 for step, seconds in steps.items()},
+    }
+
+
+def _print_section(title: str, values: Dict[str, float]) -> None:
+    print(f"\n{title}")
+    for name, milliseconds in values.items():
+        print(f"  {milliseconds:10.2f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="app.main", help="module to import")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--hooks", action="store_true", help="run startup hooks")
+    parser.add_argument("--json", action="store_true", help="print JSON report")
+    arguments = parser.parse_args()
+
+    report = summarize_imports(
+        measure_imports(arguments.target), arguments.target, arguments.top
+    )
+    if arguments.hooks:
+        report.update(asyncio.run(measure_hooks()))
+
+    if arguments.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {arguments.target}: {report['total_ms']:.2f} ms")
+        _print_section("Self import time by top-level package", report["packages_ms"])
+        _print_section("Slowest modules (self time)", report["slowest_modules_ms"])
+        _print_section("Application modules (cumulative)", report["app_modules_ms"])
+        if arguments.hooks:
+            _print_section("Startup hooks", report["hooks_ms"])
+            _print_section("Startup steps", report["startup_steps_ms"])
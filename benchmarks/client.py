@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class HTTPClient:
+    """Minimal keep-alive HTTP/1.1 JSON client, one request at a time.
+
+    Avoids pulling an HTTP library into the project just for benchmarks.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        parsed = urlparse(base_url)
+        self._host = parsed.hostname or "127.0.0.1"
+        self._port = parsed.port or 80
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Any]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self._host, self._port
+            )
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self._host}:{self._port}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self._writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await self._writer.drain()
+
+        status, response_headers = await self._read_head()
+        content = await self._read_body(response_headers)
+        if response_headers.get("connection") == "close":
+            await self.close()
+
+        if content and "json" in response_headers.get("content-type", ""):
+            return status, json.loads(content)
+
+        return status, content
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def _read_head(self) -> Tuple[int, Dict[str, str]]:
+        status_line = await self._reader.readuntil(b"\r\n")  # type: ignore
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b"\r\n")  # type: ignore
+            if line == b"\r\n":
+                return status, headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _read_body(self, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int(await self._reader.readuntil(b"\r\n"), 16)  # type: ignore
+                chunk = await self._reader.readexactly(size + 2)  # type: ignore
+                if not size:
+                    return b"".join(chunks)
+                chunks.append(chunk[:-2])
+
+        return await self._reader.readexactly(  # type: ignore
+            int(headers.get("content-length", 0))
+        )
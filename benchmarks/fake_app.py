@@ -0,0 +1,286 @@
+"""The application with users kept in memory instead of Postgres::
+
+    uvicorn benchmarks.fake_app:app
+"""
+import secrets
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from fastapi import FastAPI
+
+from app.api.dependencies.database import get_repository
+from app.db.errors.tokens import InvalidRefreshTokenError
+from app.db.errors.users import (EntityAlreadyExistsError,
+                                 EntityDoesNotExistError,
+                                 EntityVersionConflictError)
+from app.db.repositories.polls import PollsRepository
+from app.db.repositories.tokens import TokensRepository
+from app.db.repositories.users import UsersRepository, normalize_email
+from app.main import get_application
+from app.models.domain.polls import PollOption, PollRecord, Vote
+from app.models.domain.users import UserRecord
+from app.services.live_results import live_results_hub
+from app.services.token_cache import token_cache
+from app.services.votes import vote_buffer
+
+
+class InMemoryUsersRepository:
+    """Same interface as ``UsersRepository``, without the database"""
+
+    def __init__(self) -> None:
+        self._users: Dict[str, UserRecord] = {}
+        self._usernames_by_email: Dict[str, str] = {}
+        self._last_id = 0
+
+    async def create_user(self, *, username: str, email: str, password: str) -> UserRecord:
+        if username.lower() in self._users:
+            raise EntityAlreadyExistsError("username")
+        if normalize_email(email) in self._usernames_by_email:
+            raise EntityAlreadyExistsError("email")
+
+        self._last_id += 1
+        user = UserRecord(id=self._last_id, username=username, email=email)
+        await user.change_password(password)
+        self._store(user)
+
+        return UserRecord.from_row(user.to_row())
+
+    async def get_user_by_username(self, *, username: str) -> UserRecord:
+        user = self._users.get(username.lower())
+        if user is None:
+            raise EntityDoesNotExistError(f"entity with username {username} does not exist")
+
+        return UserRecord.from_row(user.to_row())
+
+    async def get_user_version(self, *, username: str) -> Optional[Tuple[int, int]]:
+        user = self._users.get(username.lower())
+        return (user.id, user.version) if user else None
+
+    async def cache_user_version(self, *, user: UserRecord) -> None:
+        """Versions are always at hand"""
+
+    async def get_user_by_email(self, *, email: str) -> UserRecord:
+        username = self._usernames_by_email.get(normalize_email(email))
+        if username is None:
+            raise EntityDoesNotExistError(f"entity with email {email} does not exist")
+
+        return await self.get_user_by_username(username=username)
+
+    async def get_user_by_login(self, *, login: str) -> UserRecord:
+        try:
+            return await self.get_user_by_username(username=login)
+        except EntityDoesNotExistError:
+            return await self.get_user_by_email(email=login)
+
+    async def update_user(
+        self,
+        *,
+        user: UserRecord,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        bio: Optional[str] = None,
+        image: Optional[str] = None,
+    ) -> UserRecord:
+        user_in_db = self._users.get(user.username.lower())
+        if user_in_db is None or user_in_db.version != user.version:
+            token_cache.invalidate_user(user.username)
+            raise EntityVersionConflictError(f"entity with id {user.id} changed")
+
+        if username and username.lower() != user.username.lower():
+            if username.lower() in self._users:
+                raise EntityAlreadyExistsError("username")
+        if email and normalize_email(email) != normalize_email(user.email):
+            if normalize_email(email) in self._usernames_by_email:
+                raise EntityAlreadyExistsError("email")
+
+        del self._users[user_in_db.username.lower()]
+        del self._usernames_by_email[normalize_email(user_in_db.email)]
+
+        user_in_db.username = username or user_in_db.username
+        user_in_db.email = email or user_in_db.email
+        user_in_db.bio = bio or user_in_db.bio
+        user_in_db.image = image or user_in_db.image
+        if password:
+            await user_in_db.change_password(password)
+        user_in_db.version += 1
+        self._store(user_in_db)
+        token_cache.invalidate_user(user.username)
+
+        return UserRecord.from_row(user_in_db.to_row())
+
+    async def search_users(
+        self,
+        *,
+        query: str,
+        field: str,
+        fuzzy: bool,
+        limit: int,
+        after_key: str = "",
+        after_rank: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Scans all users, ``SequenceMatcher`` stands in for trigrams"""
+        value = query.lower() if field == "username" else normalize_email(query)
+        rows = []
+        for user in self._users.values():
+            key = user.username.lower() if field == "username" else normalize_email(
+                user.email
+            )
+            row = dict(user.to_row(), key=key)
+            if fuzzy:
+                row["rank"] = SequenceMatcher(None, key, value).ratio()
+                after = after_rank is None or (-row["rank"], key) > (
+                    -after_rank,
+                    after_key,
+                )
+                if row["rank"] >= 0.3 and after:
+                    rows.append(row)
+            elif key.startswith(value) and key > after_key:
+                rows.append(row)
+
+        rows.sort(key=lambda row: (-row.get("rank", 0), row["key"]))
+        return rows[:limit]
+
+    def _store(self, user: UserRecord) -> None:
+        self._users[user.username.lower()] = user
+        self._usernames_by_email[normalize_email(user.email)] = user.username.lower()
+
+
+class InMemoryTokensRepository:
+    """Same interface as ``TokensRepository``, without reuse detection"""
+
+    def __init__(self, users_repo: InMemoryUsersRepository) -> None:
+        self._users_repo = users_repo
+        self._refresh_tokens: Dict[str, str] = {}
+        self._revoked: Set[str] = set()
+
+    async def create_refresh_token(self, *, user_id: int, access_jti: str) -> str:
+        users = (user for user in self._users_repo._users.values() if user.id == user_id)
+        refresh_token = secrets.token_urlsafe(32)
+        self._refresh_tokens[refresh_token] = next(users).username
+        return refresh_token
+
+    async def rotate_refresh_token(
+        self, *, refresh_token: str, access_jti: str,
+    ) -> Tuple[UserRecord, str]:
+        username = self._refresh_tokens.pop(refresh_token, None)
+        if username is None:
+            raise InvalidRefreshTokenError
+
+        user = await self._users_repo.get_user_by_username(username=username)
+        return user, await self.create_refresh_token(user_id=user.id, access_jti=access_jti)
+
+    async def revoke_refresh_token_family(self, *, refresh_token: str) -> List[str]:
+        self._refresh_tokens.pop(refresh_token, None)
+        return []
+
+    async def revoke_access_token(self, *, jti: str, expires_at: datetime) -> None:
+        self._revoked.add(jti)
+
+    async def is_revoked(self, *, jti: str) -> bool:
+        return jti in self._revoked
+
+
+class InMemoryPollsRepository:
+    """Same interface as ``PollsRepository``, without the database"""
+
+    def __init__(self) -> None:
+        self._polls: Dict[int, PollRecord] = {}
+        self._votes: Dict[Tuple[int, int], Vote] = {}
+        self._last_option_id = 0
+
+    async def create_poll(
+        self,
+        *,
+        author: UserRecord,
+        question: str,
+        options: List[str],
+        closes_at: Optional[datetime] = None,
+    ) -> PollRecord:
+        poll_options = []
+        for text in options:
+            self._last_option_id += 1
+            poll_options.append(PollOption(self._last_option_id, text))
+
+        poll = PollRecord(
+            id=len(self._polls) + 1,
+            author=author.username,
+            question=question,
+            created_at=datetime.now(timezone.utc),
+            closes_at=closes_at,
+            options=poll_options,
+        )
+        self._polls[poll.id] = poll
+        return poll
+
+    async def get_poll(self, *, poll_id: int) -> PollRecord:
+        poll = self._polls.get(poll_id)
+        if poll is None:
+            raise EntityDoesNotExistError(f"poll with id {poll_id} does not exist")
+
+        return poll
+
+    async def insert_votes(self, votes: Sequence[Vote]) -> int:
+        stored = 0
+        for vote in votes:
+            poll = self._polls.get(vote.poll_id)
+            key = (vote.poll_id, vote.user_id)
+            if poll is not None and poll.has_option(vote.option_id):
+                if key not in self._votes:
+                    self._votes[key] = vote
+                    live_results_hub.notify(vote.poll_id)
+                    stored += 1
+
+        return stored
+
+    async def get_poll_results(self, *, poll_id: int) -> Dict[int, int]:
+        return (await self.get_polls_results(poll_ids=[poll_id]))[poll_id]
+
+    async def get_polls_results(
+        self, *, poll_ids: Sequence[int]
+    ) -> Dict[int, Dict[int, int]]:
+        polls_results: Dict[int, Dict[int, int]] = {
+            poll_id: {} for poll_id in poll_ids
+        }
+        for vote in self._votes.values():
+            results = polls_results.get(vote.poll_id)
+            if results is not None:
+                results[vote.option_id] = results.get(vote.option_id, 0) + 1
+
+        return polls_results
+
+
+def create_app() -> FastAPI:
+    application = get_application()
+    application.router.on_startup.clear()
+    application.router.on_shutdown.clear()
+
+    users_repo = InMemoryUsersRepository()
+    tokens_repo = InMemoryTokensRepository(users_repo)
+    polls_repo = InMemoryPollsRepository()
+    application.dependency_overrides[
+        get_repository(UsersRepository)
+    ] = lambda: users_repo
+    application.dependency_overrides[
+        get_repository(TokensRepository)
+    ] = lambda: tokens_repo
+    application.dependency_overrides[
+        get_repository(PollsRepository)
+    ] = lambda: polls_repo
+
+    async def start_polls() -> None:
+        vote_buffer.start(polls_repo)  # type: ignore
+        live_results_hub.start(polls_repo)  # type: ignore
+
+    async def stop_polls() -> None:
+        await live_results_hub.stop()
+        await vote_buffer.stop(polls_repo)  # type: ignore
+
+    application.add_event_handler("startup", start_polls)
+    application.add_event_handler("shutdown", stop_polls)
+
+    return application
+
+
+app = create_app()
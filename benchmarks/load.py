@@ -0,0 +1,195 @@
+"""Load test of the users API: signup, login and update per virtual user.
+
+Starts ``benchmarks.fake_app`` (in-memory users, no rate limits) unless
+``--url`` points to an already running app, e.g. one backed by a local
+Postgres started with ``RATE_LIMIT_BACKEND=none``::
+
+    python -m benchmarks.load --concurrency 50 --iterations 20 --output load.json
+    python -m benchmarks.load --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, DefaultDict, Dict, Iterator, List, Optional
+
+from benchmarks.client import HTTPClient
+from benchmarks.stats import summarize
+
+ENDPOINTS = ("signup", "login", "update")
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: DefaultDict[str, List[float]] = defaultdict(list)
+        self.statuses: DefaultDict[str, Counter] = defaultdict(Counter)
+
+    async def call(
+        self,
+        endpoint: str,
+        client: HTTPClient,
+        method: str,
+        path: str,
+        body: Any,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        started_at = time.perf_counter()
+        try:
+            status, content = await client.request(method, path, body, headers)
+        except (OSError, asyncio.IncompleteReadError):
+            await client.close()
+            self.statuses[endpoint]["error"] += 1
+            return None
+
+        self.latencies[endpoint].append(time.perf_counter() - started_at)
+        self.statuses[endpoint][str(status)] += 1
+        return content if 200 <= status < 300 else None
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            latencies = self.latencies[endpoint]
+            endpoints[endpoint] = dict(
+                summarize(latencies),
+                throughput_rps=len(latencies) / elapsed if elapsed else 0.0,
+                statuses=dict(self.statuses[endpoint]),
+            )
+
+        total = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "elapsed_seconds": elapsed,
+            "total": dict(
+                summarize(total), throughput_rps=len(total) / elapsed if elapsed else 0.0
+            ),
+            "endpoints": endpoints,
+        }
+
+
+async def _virtual_user(
+    base_url: str, prefix: str, iterations: int, recorder: Recorder,
+) -> None:
+    client = HTTPClient(base_url)
+    try:
+        for iteration in range(iterations):
+            username = f"{prefix}{iteration}"
+            password = f"secret-{username}"
+            signup = {
+                "user": {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": password,
+                }
+            }
+            await recorder.call(
+                "signup", client, "POST", "/api/users/signup", signup
+            )
+
+            login = {"user": {"email_or_login": username, "password": password}}
+            logged_in = await recorder.call(
+                "login", client, "POST", "/api/users/login", login
+            )
+            if not logged_in:
+                continue
+
+            headers = {"Authorization": f"Token {logged_in['user']['token']}"}
+            update = {"user": {"bio": f"bio of {username}"}}
+            await recorder.call(
+                "update", client, "PUT", "/api/users/update", update, headers
+            )
+    finally:
+        await client.close()
+
+
+async def run(base_url: str, concurrency: int, iterations: int) -> Dict[str, Any]:
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _virtual_user(base_url, f"b{run_id}u{user}i", iterations, recorder)
+            for user in range(concurrency)
+        )
+    )
+    report = recorder.report(time.perf_counter() - started_at)
+    report["config"] = {
+        "url": base_url,
+        "concurrency": concurrency,
+        "iterations": iterations,
+    }
+
+    return report
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_app(app_path: str) -> Iterator[str]:
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app_path,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        # every virtual user comes from 127.0.0.1
+        env=dict(os.environ, RATE_LIMIT_BACKEND="none"),
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"{app_path} did not start")
+                time.sleep(0.1)
+
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running app, by default fake_app is started")
+    parser.add_argument("--app", default="benchmarks.fake_app:app")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--output", help="write JSON report to this file")
+    arguments = parser.parse_args()
+
+    if arguments.url:
+        result = asyncio.run(
+            run(arguments.url, arguments.concurrency, arguments.iterations)
+        )
+    else:
+        with local_app(arguments.app) as url:
+            result = asyncio.run(
+                run(url, arguments.concurrency, arguments.iterations)
+            )
+
+    rendered = json.dumps(result, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            output.write(rendered)
+    print(rendered)
@@ -0,0 +1,113 @@
+"""Micro-benchmarks of the users hot paths, compared against a stored baseline.
+
+    python -m benchmarks.micro --save benchmarks/baseline.json
+    python -m benchmarks.micro --baseline benchmarks/baseline.json --tolerance 0.2
+
+Exits with status 1 when a benchmark is slower than baseline * (1 + tolerance).
+"""
+import argparse
+import json
+import sys
+import timeit
+from typing import Callable, Dict, List
+
+from app.models.domain.users import UserRecord
+from app.models.schemas.users import UserInDB
+from app.services import jwt, security
+
+SECRET_KEY = "benchmark-secret"
+
+USER_ROW = {
+    "id": 1,
+    "username": "benchmark",
+    "email": "benchmark@example.com",
+    "hashed_password": security.get_password_hash("benchmark"),
+    "bio": "",
+    "image": None,
+}
+
+
+def _benchmarks() -> Dict[str, Callable[[], object]]:
+    user = UserInDB(**USER_ROW)
+    token = jwt.create_access_token_for_user(user, SECRET_KEY)
+    if isinstance(token, bytes):  # PyJWT 1.x
+        token = token.decode()
+
+    return {
+        "jwt.create_access_token_for_user": lambda: jwt.create_access_token_for_user(
+            user, SECRET_KEY
+        ),
+        "jwt.get_username_from_token": lambda: jwt.get_username_from_token(
+            token, SECRET_KEY
+        ),
+        "UserInDB(**row)": lambda: UserInDB(**USER_ROW),
+        "UserRecord.from_row(row)": lambda: UserRecord.from_row(USER_ROW),
+        "security.get_password_hash": lambda: security.get_password_hash("benchmark"),
+        "security.verify_password": lambda: security.verify_password(
+            "benchmark", USER_ROW["hashed_password"]
+        ),
+    }
+
+
+def measure(
+    function: Callable[[], object], repeat: int = 7, min_time: float = 0.2,
+) -> Dict[str, float]:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    return {"mean_us": best * 1e6, "ops_per_sec": 1 / best}
+
+
+def run(only: List[str]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: measure(function)
+        for name, function in _benchmarks().items()
+        if not only or any(part in name for part in only)
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = result["mean_us"] / baseline[name]["mean_us"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x slower than baseline")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="*", default=[], help="name substrings")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--save", help="write results to this file")
+    arguments = parser.parse_args()
+
+    benchmark_results = run(arguments.only)
+    regressions: List[str] = []
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            regressions = compare(
+                benchmark_results, json.load(baseline_file), arguments.tolerance
+            )
+
+    rendered = json.dumps(benchmark_results, indent=2)
+    if arguments.save:
+        with open(arguments.save, "w") as output:
+            output.write(rendered)
+    print(rendered)
+
+    for regression in regressions:
+        print(regression, file=sys.stderr)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,96 @@
+"""Cost of a rate limit check as the number of tracked keys grows.
+
+    python -m benchmarks.rate_limit --keys 10000 100000 1000000
+
+The clock is simulated: each sample advances it, so expired keys are
+swept by the time wheel while being measured. Exits with status 1 when
+a check with the most keys is ``--max-ratio`` times slower than with
+the fewest, i.e. when the check stops being O(1).
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.core.config import RATE_LIMIT_IP_BURST, RATE_LIMIT_IP_PER_MINUTE
+from app.services.rate_limit import TokenBuckets
+
+SAMPLES = 200_000
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _ips(count: int) -> List[str]:
+    return [f"10.{key >> 16 & 255}.{key >> 8 & 255}.{key & 255}" for key in range(count)]
+
+
+def measure(keys: int, per_minute: float, burst: int) -> Dict[str, float]:
+    clock = Clock()
+    buckets = TokenBuckets(per_minute=per_minute, burst=burst, clock=clock)
+    ips = _ips(keys)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for ip in ips:
+            buckets.hit_nowait(ip)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # every key is hit about once per token refill, so most keys are kept
+    # while some expire and get swept all along
+    step = 60.0 / per_minute / keys
+    sample = [random.choice(ips) for _ in range(SAMPLES)]
+    started_at = time.perf_counter()
+    for ip in sample:
+        clock.now += step
+        buckets.hit_nowait(ip)
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "keys": keys,
+        "kept_keys": len(buckets),
+        "bytes_per_key": (after - before) / keys,
+        "check_ns": elapsed / SAMPLES * 1e9,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--keys", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--per-minute", type=float, default=RATE_LIMIT_IP_PER_MINUTE)
+    parser.add_argument("--burst", type=int, default=RATE_LIMIT_IP_BURST)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    parser.add_argument("--output", help="write JSON report to this file")
+    arguments = parser.parse_args()
+
+    results = [
+        measure(keys, arguments.per_minute, arguments.burst)
+        for keys in sorted(arguments.keys)
+    ]
+    ratio = results[-1]["check_ns"] / results[0]["check_ns"]
+    report = {"results": results, "slowdown": ratio}
+
+    rendered = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            output.write(rendered)
+    print(rendered)
+
+    if ratio > arguments.max_ratio:
+        print(f"rate limit check is {ratio:.2f}x slower with more keys", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""CPU per response of the users routes: pydantic models vs FastJSONResponse.
+
+    python -m benchmarks.responses --output responses.json
+
+"legacy" builds ``UserInResponse`` and lets FastAPI validate it against
+``response_model`` and render it with stdlib json, as the routes did
+before; "fast" is the routes' current ``_user_with_token_response``.
+Both include encoding the JWT.
+"""
+import argparse
+import json
+from typing import Any, Coroutine, Dict
+
+from fastapi.routing import APIRoute, serialize_response
+from starlette.responses import JSONResponse
+
+from app.api.routes.users import _user_with_token_response
+from app.core import config
+from app.main import get_application
+from app.models.domain.users import UserRecord
+from app.models.schemas.users import UserInResponse, UserWithToken
+from app.services import jwt
+from benchmarks.micro import USER_ROW, measure
+
+ROUTES = ("users:signup", "users:login", "users:update-current-user")
+
+
+def _complete(coroutine: Coroutine) -> Any:
+    """Run a coroutine that never suspends without an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def _legacy_response(route: APIRoute, user: UserRecord) -> JSONResponse:
+    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
+    content = UserInResponse(
+        user=UserWithToken(
+            username=user.username,
+            email=user.email,
+            bio=user.bio,
+            image=user.image,
+            token=token,
+        )
+    )
+    return JSONResponse(
+        _complete(
+            serialize_response(
+                field=route.secure_cloned_response_field, response_content=content
+            )
+        ),
+        status_code=route.status_code,
+    )
+
+
+def _fast_response(route: APIRoute, user: UserRecord) -> JSONResponse:
+    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
+    return _user_with_token_response(user, route.status_code, token)
+
+
+def run() -> Dict[str, Dict[str, float]]:
+    routes = {
+        route.name: route
+        for route in get_application().routes
+        if isinstance(route, APIRoute)
+    }
+    user = UserRecord.from_row(USER_ROW)
+
+    report = {}
+    for name in ROUTES:
+        route = routes[name]
+        legacy = _legacy_response(route, user)
+        fast = _fast_response(route, user)
+        # legacy also renders the optional refresh_token as null
+        assert json.loads(fast.body)["user"].keys() <= json.loads(legacy.body)["user"].keys()
+
+        legacy_us = measure(lambda: _legacy_response(route, user))["mean_us"]
+        fast_us = measure(lambda: _fast_response(route, user))["mean_us"]
+        report[route.endpoint.__name__] = {
+            "legacy_us": legacy_us,
+            "fast_us": fast_us,
+            "saved_us": legacy_us - fast_us,
+        }
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write JSON report to this file")
+    arguments = parser.parse_args()
+
+    rendered = json.dumps(run(), indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            output.write(rendered)
+    print(rendered)
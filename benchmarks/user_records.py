@@ -0,0 +1,69 @@
+"""Memory and hydration time of UserInDB against the UserRecord read model.
+
+    python -m benchmarks.user_records --users 10000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, Dict, List, Mapping
+
+from app.models.domain.users import UserRecord
+from app.models.schemas.users import UserInDB
+from benchmarks.micro import USER_ROW, measure
+
+HYDRATORS: Dict[str, Callable[[Mapping[str, Any]], object]] = {
+    "UserInDB": lambda row: UserInDB(**row),
+    "UserRecord": UserRecord.from_row,
+}
+
+
+def _rows(users: int) -> List[Dict[str, Any]]:
+    return [
+        dict(
+            USER_ROW,
+            id=user_id,
+            username=f"user{user_id}",
+            email=f"user{user_id}@example.com",
+        )
+        for user_id in range(users)
+    ]
+
+
+def bytes_per_user(hydrate: Callable[[Mapping[str, Any]], object], users: int) -> float:
+    """Memory retained per hydrated user, field values excluded"""
+    rows = _rows(users)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        hydrated = [hydrate(row) for row in rows]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # the list holding the users is not part of the per user cost
+    return (after - before - hydrated.__sizeof__()) / users
+
+
+def run(users: int) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "bytes_per_user": bytes_per_user(hydrate, users),
+            "hydrate_us": measure(lambda: hydrate(USER_ROW))["mean_us"],
+        }
+        for name, hydrate in HYDRATORS.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--output", help="write JSON report to this file")
+    arguments = parser.parse_args()
+
+    rendered = json.dumps(run(arguments.users), indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            output.write(rendered)
+    print(rendered)
@@ -14,4 +14,6 @@ then
     echo "PostgreSQL started"
 fi
 
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
\ No newline at end of file
+python -m app.db.migrations
+
+MIGRATIONS_ON_STARTUP=off uvicorn app.main:app --reload --host 0.0.0.0 --port 8000